@@ -0,0 +1,61 @@
+"""
+Answer cache benchmark: cost of a cache hit (key + lookup) vs a Groq round-trip.
+
+Usage:
+    python backend/benchmarks/bench_answer_cache.py --lookups 100000
+
+The key hashes the normalized question and a full context budget of
+excerpts, so this is the per-question overhead the cache adds on a miss and
+the whole cost of answering on a hit.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services.answer_cache import AnswerCache, answer_cache_key
+
+
+def per_call_us(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    excerpts = [f"[Source {i}] (Doc: notes.pdf): " + "A heap is a complete binary tree. " * 80 + "\n" for i in range(1, 6)]
+    options = {"temperature": 0.6, "max_tokens": 1500}
+    key = answer_cache_key("What is a heap?", excerpts, "llama-3.3-70b-versatile", options)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = AnswerCache(max_entries=256, ttl_s=3600, path=None)
+        disk = AnswerCache(max_entries=256, ttl_s=3600, path=os.path.join(tmp, "answers.sqlite3"))
+        for cache in (memory, disk):
+            cache.put(key, "A heap keeps the smallest element at the root.")
+        cold = AnswerCache(max_entries=256, ttl_s=3600, path=os.path.join(tmp, "answers.sqlite3"))
+
+        print(f"context: {sum(len(e) for e in excerpts)} chars")
+        print(f"{'operation':>22} {'us/call':>9}")
+        rows = (
+            ("key (hash context)", lambda: answer_cache_key("What is a heap?", excerpts, "llama-3.3-70b-versatile", options), args.lookups),
+            ("memory hit", lambda: memory.get(key), args.lookups),
+            ("memory miss + disk", lambda: disk.get("absent"), args.lookups // 10),
+        )
+        for name, fn, calls in rows:
+            print(f"{name:>22} {per_call_us(fn, calls):>9.2f}")
+        start = time.perf_counter()
+        cold.get(key)
+        print(f"{'first disk hit':>22} {(time.perf_counter() - start) * 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
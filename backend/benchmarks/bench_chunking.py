@@ -0,0 +1,116 @@
+"""
+Chunking benchmark: linear overlap handling vs the former insert(0)/double-join loop.
+
+Usage:
+    python backend/benchmarks/bench_chunking.py --mb 10
+
+Both chunkers run over the same pre-split sentences, so only the packing
+loop is timed. The former loop is reproduced verbatim below; outputs are
+checked to be identical before timings are printed. A second table shows
+end-to-end chunk_text throughput (segmentation included) at growing sizes,
+which should stay flat now that large inputs are no longer special-cased,
+and the cost of token-budget chunking (CHUNK_UNIT=tokens) next to
+character chunking and raw estimate_tokens throughput.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.utils.chunking import chunk_sentences, chunk_text, split_into_sentences
+from backend.utils.token_estimator import estimate_tokens
+
+
+def legacy_chunk_sentences(sentences, chunk_size, overlap):
+    current_chunk = []
+    current_size = 0
+    for sentence in sentences:
+        sentence_len = len(sentence)
+        if current_size + sentence_len > chunk_size and current_chunk:
+            chunk_text = ' '.join(current_chunk)
+            if chunk_text.strip():
+                yield chunk_text.strip()
+            overlap_text = ' '.join(current_chunk)
+            if len(overlap_text) > overlap:
+                overlap_sentences = []
+                overlap_size = 0
+                for s in reversed(current_chunk):
+                    if overlap_size + len(s) <= overlap:
+                        overlap_sentences.insert(0, s)
+                        overlap_size += len(s)
+                    else:
+                        break
+                current_chunk = overlap_sentences
+                current_size = overlap_size
+            else:
+                current_chunk = []
+                current_size = 0
+        current_chunk.append(sentence)
+        current_size += sentence_len
+    if current_chunk:
+        chunk_text = ' '.join(current_chunk)
+        if chunk_text.strip():
+            yield chunk_text.strip()
+
+
+def make_text(megabytes: float, max_words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = ["matrix", "vector", "kernel", "graph", "node", "stack", "proof", "lemma", "bit", "cache"]
+    parts, size = [], 0
+    while size < megabytes * 1_000_000:
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(2, max_words))).capitalize() + rng.choice(".!?") + " "
+        parts.append(sentence)
+        size += len(sentence)
+    return "".join(parts)
+
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mb", type=float, default=10.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    # Prose-like sentences, then terse notes/bullets (many sentences per chunk)
+    for label, max_words in (("prose", 25), ("notes", 4)):
+        sentences = split_into_sentences(make_text(args.mb, max_words))
+        print(f"{label}: {args.mb:.0f} MB, {len(sentences)} sentences")
+        print(f"{'chunk/overlap':>14} {'former s':>9} {'linear s':>9} {'speedup':>8}")
+        for chunk_size, overlap in ((1000, 200), (2000, 1000), (4000, 3000)):
+            expected = list(legacy_chunk_sentences(sentences, chunk_size, overlap))
+            assert list(chunk_sentences(sentences, chunk_size, overlap)) == expected, "outputs differ"
+            former = best_of(lambda: list(legacy_chunk_sentences(sentences, chunk_size, overlap)), args.repeats)
+            linear = best_of(lambda: list(chunk_sentences(sentences, chunk_size, overlap)), args.repeats)
+            print(f"{chunk_size:>8}/{overlap:<5} {former:>9.2f} {linear:>9.2f} {former / linear:>7.1f}x")
+
+    print(f"\n{'chunk_text MB':>14} {'best s':>9} {'MB/s':>8}")
+    for megabytes in (args.mb / 8, args.mb / 2, args.mb):
+        text = make_text(megabytes, 25)
+        seconds = best_of(lambda: sum(1 for _ in chunk_text(text, 1200, 200)), args.repeats)
+        print(f"{megabytes:>14.2f} {seconds:>9.2f} {megabytes / seconds:>8.1f}")
+
+    text = make_text(args.mb, 25)
+    print(f"\n{'unit':>14} {'best s':>9} {'MB/s':>8}")
+    for label, fn in (
+        ("chars 1200", lambda: sum(1 for _ in chunk_text(text, 1200, 200))),
+        ("tokens 300", lambda: sum(1 for _ in chunk_text(text, 300, 50, unit="tokens"))),
+        ("estimate only", lambda: estimate_tokens(text)),
+    ):
+        seconds = best_of(fn, args.repeats)
+        print(f"{label:>14} {seconds:>9.2f} {args.mb / seconds:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Groq client benchmark: shared pooled client vs a new client per question.
+
+Usage:
+    python backend/benchmarks/bench_groq_client.py --questions 50
+
+Runs against a local stand-in for the chat completions endpoint, so it
+measures only client construction and connection setup (plain HTTP here;
+against api.groq.com each new connection also pays a TLS handshake, which
+makes the gap larger). Reports time to a complete response per question.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+# The stand-in server ignores the key; setting one keeps config from consulting Streamlit secrets
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+from groq import Groq
+
+from backend.services import groq_client
+
+COMPLETION = json.dumps({
+    "id": "bench", "object": "chat.completion", "created": 0, "model": "bench",
+    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+}).encode()
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; avoid Nagle/delayed-ACK stalls on keep-alive
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        CompletionHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(COMPLETION)))
+        self.end_headers()
+        self.wfile.write(COMPLETION)
+
+    def log_message(self, *args):
+        pass
+
+
+def ask(client: Groq) -> None:
+    client.chat.completions.create(messages=[{"role": "user", "content": "hi"}], model="bench")
+
+
+def run(get_client, questions: int):
+    CompletionHandler.connections = 0
+    latencies = []
+    for _ in range(questions):
+        start = time.perf_counter()
+        ask(get_client())
+        latencies.append(time.perf_counter() - start)
+    return latencies, CompletionHandler.connections
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--questions", type=int, default=50)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CompletionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    per_question = lambda: Groq(api_key="bench", base_url=base_url)
+    with mock.patch.dict(os.environ, {"GROQ_BASE_URL": base_url}):
+        groq_client.reset_groq_client()
+        pooled = groq_client.get_groq_client
+        results = (("new client", run(per_question, args.questions)), ("shared client", run(pooled, args.questions)))
+        groq_client.reset_groq_client()
+    server.shutdown()
+
+    print(f"{'client':>14} {'first ms':>9} {'median ms':>10} {'connections':>12}")
+    for name, (latencies, connections) in results:
+        print(f"{name:>14} {latencies[0] * 1e3:>9.2f} {statistics.median(latencies[1:]) * 1e3:>10.2f} {connections:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+PDF ingest benchmark: single-pass loader vs the former validate-then-reparse flow.
+
+Usage:
+    python backend/benchmarks/bench_pdf_loader.py --pages 400
+
+The former flow built one PdfReader to validate and count pages, discarded
+it, and built a second one for extraction. It is reproduced here by parsing
+once more before calling the loader.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from pypdf import PdfReader
+
+from backend.loaders.pdf_loader import read_pdf_bytes
+from backend.tests.pdf_factory import make_pdf
+
+
+def double_parse(pdf_bytes: bytes) -> str:
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    len(reader.pages)
+    return read_pdf_bytes(pdf_bytes, max_size_mb=200.0)
+
+
+def single_parse(pdf_bytes: bytes) -> str:
+    return read_pdf_bytes(pdf_bytes, max_size_mb=200.0)
+
+
+def measure(fn, pdf_bytes: bytes, repeats: int):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(pdf_bytes)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(pdf_bytes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    line = "The quick brown fox computes the derivative of x squared as two x."
+    pdf_bytes = make_pdf(["\n".join(f"{p}.{i} {line}" for i in range(40)) for p in range(args.pages)])
+    print(f"{args.pages} pages, {len(pdf_bytes) / 1e6:.1f} MB")
+    print(f"{'loader':>14} {'best s':>8} {'peak MB':>8}")
+    for name, fn in (("double parse", double_parse), ("single parse", single_parse)):
+        seconds, peak = measure(fn, pdf_bytes, args.repeats)
+        print(f"{name:>14} {seconds:>8.2f} {peak / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Retrieval throughput benchmark: keyword scan vs BM25 vs CSR engine vs dense vectors vs hybrid.
+
+Usage:
+    python backend/benchmarks/bench_retrieval.py --sizes 10000,100000,1000000
+    EMBEDDING_BACKEND=hashing python backend/benchmarks/bench_retrieval.py  # include dense and hybrid
+
+Builds a synthetic Zipf-distributed corpus per size and reports queries/second
+for each engine. The 1M-chunk run needs several GB of RAM for the Python index
+(plus embedding_dim x 4 bytes per chunk for the dense matrix).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.storage.in_memory_store import InMemoryStore, DocChunk
+from backend.services.retrieval_service import retrieve_top_k
+
+VOCAB_SIZE = 20000
+
+
+def make_corpus(num_chunks: int, words_per_chunk: int, rng: random.Random):
+    vocab = [f"term{i}" for i in range(VOCAB_SIZE)]
+    weights = [1.0 / (rank + 1) for rank in range(VOCAB_SIZE)]
+    chunks = []
+    for i in range(num_chunks):
+        words = rng.choices(vocab, weights=weights, k=words_per_chunk)
+        chunks.append(DocChunk(doc_id=f"doc{i // 500}", doc_name=f"doc{i // 500}.pdf", chunk_id=i % 500, text=" ".join(words)))
+    return vocab, chunks
+
+
+def time_queries(fn, queries, max_seconds: float) -> float:
+    """Runs queries until exhausted or the time budget is spent; returns queries/second."""
+    start = time.perf_counter()
+    done = 0
+    for q in queries:
+        fn(q)
+        done += 1
+        if time.perf_counter() - start > max_seconds:
+            break
+    return done / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--words", type=int, default=40, help="Words per synthetic chunk")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=10.0, help="Seconds per engine per size")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'chunks':>10} {'engine':>8} {'q/s':>10} {'ms/query':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        vocab, chunks = make_corpus(size, args.words, rng)
+        store = InMemoryStore()
+        started = time.perf_counter()
+        for start in range(0, size, 500):
+            part = chunks[start:start + 500]
+            store.upsert_doc(part[0].doc_id, part[0].doc_name, part)
+        work = "tokenize + embed" if store.vectors is not None else "tokenize"
+        print(f"{size:>10} {'ingest':>8} {size / (time.perf_counter() - started):>10.1f} chunks/s ({work})")
+        # Mid-frequency terms, like the content words of a real question
+        queries = [" ".join(rng.sample(vocab[50:2000], 3)) for _ in range(args.queries)]
+        retrieve_top_k(queries[0], [], args.top_k, store=store, mode="sparse")  # build the CSR snapshot
+
+        engines = {
+            "loop": lambda q: retrieve_top_k(q, chunks, args.top_k, mode="keyword"),
+            "bm25": lambda q: retrieve_top_k(q, [], args.top_k, store=store, mode="bm25"),
+            "sparse": lambda q: retrieve_top_k(q, [], args.top_k, store=store, mode="sparse"),
+            "dense": lambda q: retrieve_top_k(q, [], args.top_k, store=store, mode="dense"),
+            "hybrid": lambda q: retrieve_top_k(q, [], args.top_k, store=store, mode="hybrid"),
+        }
+        if store.vectors is None:  # embeddings are off
+            del engines["dense"], engines["hybrid"]
+        for name, fn in engines.items():
+            qps = time_queries(fn, queries, args.budget)
+            print(f"{size:>10} {name:>8} {qps:>10.1f} {1000.0 / qps:>10.2f}")
+        del store, chunks
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Query-time cost of lowercasing raw chunk text vs scanning pre-tokenized term counts.
+
+Usage:
+    python backend/benchmarks/bench_tokenized.py --chunks 20000
+
+Reports per-query latency and bytes allocated for the old `ch.text.lower()`
+substring scan and the pre-tokenized scan, plus the resident cost of keeping
+term counts on every chunk.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.storage.in_memory_store import DocChunk
+from backend.services.retrieval_service import retrieve_top_k
+from backend.utils.tokenizer import encode_terms, tokenize
+
+
+def legacy_scan(query, chunks, top_k):
+    """The pre-tokenization linear scan: lowercases every chunk on every query."""
+    query_tokens = tokenize(query)
+    scored = []
+    for ch in chunks:
+        text_lower = ch.text.lower()
+        s = sum(1.0 for w in query_tokens if w in text_lower)
+        if s > 0:
+            scored.append((ch, s))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:top_k]
+
+
+def measure(fn, queries):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / len(queries) * 1000.0, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=180, help="Words per synthetic chunk (~1200 chars)")
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocab = [f"Term{i}" for i in range(20000)]
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    texts = [" ".join(rng.choices(vocab, weights=weights, k=args.words)) for _ in range(args.chunks)]
+    queries = [" ".join(rng.sample(vocab[50:2000], 3)) for _ in range(args.queries)]
+
+    raw_chunks = [DocChunk(doc_id="d", doc_name="d.pdf", chunk_id=i, text=t) for i, t in enumerate(texts)]
+
+    ingest_start = time.perf_counter()
+    term_counts = [encode_terms(t) for t in texts]
+    ingest_s = time.perf_counter() - ingest_start
+    del term_counts
+
+    tracemalloc.start()
+    term_counts = [encode_terms(t) for t in texts]
+    term_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tokenized_chunks = [
+        DocChunk(doc_id="d", doc_name="d.pdf", chunk_id=i, text=t, term_counts=tc)
+        for i, (t, tc) in enumerate(zip(texts, term_counts))
+    ]
+
+    legacy_ms, legacy_peak = measure(lambda q: legacy_scan(q, raw_chunks, 5), queries)
+    tokenized_ms, tokenized_peak = measure(lambda q: retrieve_top_k(q, tokenized_chunks, 5, mode="keyword"), queries)
+
+    corpus_mb = sum(len(t) for t in texts) / 1e6
+    print(f"corpus: {args.chunks} chunks, {corpus_mb:.1f} MB text")
+    print(f"ingest tokenization: {ingest_s:.2f} s once, term counts resident: {term_bytes / 1e6:.1f} MB "
+          f"({term_bytes / args.chunks:.0f} B/chunk)")
+    print(f"{'scan':>10} {'ms/query':>10} {'peak alloc':>12} {'bytes lowercased/query':>24}")
+    print(f"{'lower()':>10} {legacy_ms:>10.2f} {legacy_peak / 1e3:>10.0f}KB {corpus_mb * 1e6:>24.0f}")
+    print(f"{'term ids':>10} {tokenized_ms:>10.2f} {tokenized_peak / 1e3:>10.0f}KB {0:>24}")
+
+
+if __name__ == "__main__":
+    main()
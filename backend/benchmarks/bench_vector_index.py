@@ -0,0 +1,113 @@
+"""
+Dense search benchmark: recall@k, memory and latency of the IVF and quantized indexes vs exact (flat) search.
+
+Usage:
+    python backend/benchmarks/bench_vector_index.py --sizes 100000,300000 --nprobe 1,4,8,16,32
+    python backend/benchmarks/bench_vector_index.py --sizes 100000 --nprobe 16 --rerank 4,8
+
+Vectors are a synthetic mixture of Gaussian clusters on the unit sphere
+(topics in a textbook library); queries are perturbed corpus vectors.
+Recall@k is the fraction of the exact top_k that an index returns.
+Build time covers incremental add_doc calls in 500-chunk documents,
+k-means training included. int8 and pq rows fetch top_k x rerank
+candidates and re-score them with the float32 vectors, as
+retrieve_dense does with re-embedded chunk text; "raw" is pq without
+the re-rank.
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import numpy as np
+
+from backend.storage.ivf_index import IVFVectorIndex
+from backend.storage.quantized_index import QuantizedVectorIndex
+from backend.storage.vector_index import FlatVectorIndex
+
+DOC_CHUNKS = 500
+
+
+def make_vectors(rng: "np.random.Generator", n: int, dim: int, clusters: int, noise: float) -> "np.ndarray":
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)]
+    vectors += noise * rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def build(index, vectors: "np.ndarray") -> float:
+    start = time.perf_counter()
+    for first in range(0, len(vectors), DOC_CHUNKS):
+        part = vectors[first:first + DOC_CHUNKS]
+        index.add_doc(f"doc{first // DOC_CHUNKS}", list(range(first, first + len(part))), part)
+    return time.perf_counter() - start
+
+
+def reranked_search(index, vectors: "np.ndarray", query: "np.ndarray", top_k: int, rerank: int) -> set:
+    slots = np.array([slot for slot, _ in index.search(query, top_k * rerank)], dtype=np.int64)
+    exact = vectors[slots] @ query
+    return set(slots[np.argsort(-exact, kind="stable")[:top_k]].tolist())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="100000,300000")
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--clusters", type=int, default=1000, help="Topics in the synthetic corpus")
+    parser.add_argument("--noise", type=float, default=0.6, help="Per-dimension spread around a topic centre")
+    parser.add_argument("--nprobe", default="1,4,8,16,32")
+    parser.add_argument("--rerank", default="4,8", help="Candidates per result re-scored for int8/pq")
+    parser.add_argument("--subspaces", type=int, default=128, help="PQ bytes per vector")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"{'chunks':>8} {'index':>10} {'build s':>8} {'MB':>7} {'recall':>7} {'ms/query':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        vectors = make_vectors(rng, size, args.dim, args.clusters, args.noise)
+        queries = vectors[rng.integers(0, size, args.queries)] + 0.3 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        flat, ivf = FlatVectorIndex(args.dim), IVFVectorIndex(args.dim, train_min=min(10000, size))
+        flat_build, ivf_build = build(flat, vectors), build(ivf, vectors)
+
+        start = time.perf_counter()
+        exact = [{slot for slot, _ in flat.search(q, args.top_k)} for q in queries]
+        flat_ms = (time.perf_counter() - start) / args.queries * 1000
+        print(f"{size:>8} {'flat':>10} {flat_build:>8.2f} {flat.memory_bytes() / 2**20:>7.1f} {1.0:>7.3f} {flat_ms:>9.2f}")
+
+        for nprobe in (int(p) for p in args.nprobe.split(",")):
+            start = time.perf_counter()
+            found = [{slot for slot, _ in ivf.search(q, args.top_k, nprobe=nprobe)} for q in queries]
+            ivf_ms = (time.perf_counter() - start) / args.queries * 1000
+            recall = np.mean([len(a & b) / args.top_k for a, b in zip(found, exact)])
+            name = f"ivf/{nprobe}"
+            print(f"{size:>8} {name:>10} {ivf_build:>8.2f} {ivf.memory_bytes() / 2**20:>7.1f} {recall:>7.3f} {ivf_ms:>9.2f}")
+        del ivf
+
+        for method in ("int8", "pq"):
+            index = QuantizedVectorIndex(args.dim, method=method, subspaces=args.subspaces, train_min=min(4096, size))
+            index_build = build(index, vectors)
+            runs = [("raw", 1)] if method == "pq" else []
+            runs += [(f"x{rerank}", rerank) for rerank in (int(r) for r in args.rerank.split(","))]
+            for label, rerank in runs:
+                start = time.perf_counter()
+                if label == "raw":
+                    found = [{slot for slot, _ in index.search(q, args.top_k)} for q in queries]
+                else:
+                    found = [reranked_search(index, vectors, q, args.top_k, rerank) for q in queries]
+                index_ms = (time.perf_counter() - start) / args.queries * 1000
+                recall = np.mean([len(a & b) / args.top_k for a, b in zip(found, exact)])
+                name = f"{method}/{label}"
+                print(f"{size:>8} {name:>10} {index_build:>8.2f} {index.memory_bytes() / 2**20:>7.1f} {recall:>7.3f} {index_ms:>9.2f}")
+            del index
+        del flat, vectors
+
+
+if __name__ == "__main__":
+    main()
@@ -19,17 +19,80 @@ def _get_secret(key: str, default: str = "") -> str:
 class Settings:
     groq_api_key: str = field(default_factory=lambda: _get_secret("GROQ_API_KEY"))
     groq_model: str = os.environ.get("GROQ_MODEL", "llama-3.3-70b-versatile")
+    # Shared Groq HTTP client: connection pool and timeouts (seconds)
+    groq_max_connections: int = int(os.environ.get("GROQ_MAX_CONNECTIONS", "20"))
+    groq_max_keepalive: int = int(os.environ.get("GROQ_MAX_KEEPALIVE", "10"))
+    groq_keepalive_expiry_s: float = float(os.environ.get("GROQ_KEEPALIVE_EXPIRY_S", "60"))
+    groq_timeout_s: float = float(os.environ.get("GROQ_TIMEOUT_S", "60"))
+    groq_connect_timeout_s: float = float(os.environ.get("GROQ_CONNECT_TIMEOUT_S", "5"))
+    groq_max_retries: int = int(os.environ.get("GROQ_MAX_RETRIES", "2"))
+    # Async chat service: completions in flight at once, shared by all sessions
+    groq_max_concurrent_requests: int = int(os.environ.get("GROQ_MAX_CONCURRENT_REQUESTS", "8"))
 
     max_context_chars: int = int(os.environ.get("MAX_CONTEXT_CHARS", "14000"))
+    max_context_tokens: int = int(os.environ.get("MAX_CONTEXT_TOKENS", "0"))  # Estimated tokens (0 = chars only)
     chunk_size: int = int(os.environ.get("CHUNK_SIZE", "1200"))
     chunk_overlap: int = int(os.environ.get("CHUNK_OVERLAP", "200"))
+    # "chars" uses chunk_size/chunk_overlap; "tokens" sizes chunks by estimated LLM tokens
+    chunk_unit: str = os.environ.get("CHUNK_UNIT", "chars")
+    chunk_size_tokens: int = int(os.environ.get("CHUNK_SIZE_TOKENS", "300"))
+    chunk_overlap_tokens: int = int(os.environ.get("CHUNK_OVERLAP_TOKENS", "50"))
     top_k: int = int(os.environ.get("TOP_K", "5"))
+
+    # Retrieval ranking: "bm25", "keyword" (plain term overlap), "sparse", "dense" or "hybrid"
+    retrieval_mode: str = os.environ.get("RETRIEVAL_MODE", "bm25")
+    bm25_k1: float = float(os.environ.get("BM25_K1", "1.2"))
+    bm25_b: float = float(os.environ.get("BM25_B", "0.75"))
+    # Chunk embeddings for dense retrieval, computed at ingest ("none" = off);
+    # only on by default when RETRIEVAL_MODE needs them, so bm25 uploads skip the work
+    embedding_backend: str = os.environ.get(
+        "EMBEDDING_BACKEND",
+        "hashing" if os.environ.get("RETRIEVAL_MODE", "bm25") in ("dense", "hybrid") else "none"
+    )
+    embedding_dim: int = int(os.environ.get("EMBEDDING_DIM", "512"))
+    # Vector search: "flat" (exact scan), "ivf" (approximate inverted-file index),
+    # or "int8" / "pq" (compressed vectors, candidates re-ranked exactly)
+    vector_index: str = os.environ.get("VECTOR_INDEX", "flat")
+    ivf_nlist: int = int(os.environ.get("IVF_NLIST", "0"))  # Clusters (0 = about 4 x sqrt(chunks))
+    ivf_nprobe: int = int(os.environ.get("IVF_NPROBE", "16"))  # Clusters scanned per query (recall vs latency)
+    ivf_train_min: int = int(os.environ.get("IVF_TRAIN_MIN", "10000"))  # Exact search below this many chunks
+    pq_subspaces: int = int(os.environ.get("PQ_SUBSPACES", "128"))  # Bytes per vector; must divide EMBEDDING_DIM
+    pq_train_min: int = int(os.environ.get("PQ_TRAIN_MIN", "4096"))  # Vectors stay int8 until this many chunks
+    vector_rerank_candidates: int = int(os.environ.get("VECTOR_RERANK_CANDIDATES", "8"))  # x top_k re-ranked exactly
+    # Hybrid mode: lexical ("bm25" or "sparse") + dense results fused by "rrf" or "weighted" scores
+    hybrid_lexical_mode: str = os.environ.get("HYBRID_LEXICAL_MODE", "bm25")
+    hybrid_fusion: str = os.environ.get("HYBRID_FUSION", "rrf")
+    hybrid_dense_weight: float = float(os.environ.get("HYBRID_DENSE_WEIGHT", "0.5"))  # Lexical gets 1 - this
+    hybrid_rrf_k: int = int(os.environ.get("HYBRID_RRF_K", "60"))
+    hybrid_candidates: int = int(os.environ.get("HYBRID_CANDIDATES", "4"))  # Each retriever fetches top_k x this
+    retrieval_threads: int = int(os.environ.get("RETRIEVAL_THREADS", "4"))
     
     # File upload limits for memory management
     max_file_size_mb: float = float(os.environ.get("MAX_FILE_SIZE_MB", "50"))
     max_pdf_pages: int = int(os.environ.get("MAX_PDF_PAGES", "500"))
     
+    # Document store: "memory" (DocChunk objects), "columnar" (single text arena)
+    # or "sqlite" (persistent file shared by all sessions of the process)
+    store_backend: str = os.environ.get("STORE_BACKEND", "memory")
+    store_path: str = os.environ.get("STORE_PATH", ".study_buddy/store.sqlite3")
+    store_mmap_mb: int = int(os.environ.get("STORE_MMAP_MB", "256"))
+
+    # Process-wide cache of ingested uploads, keyed by content hash
+    ingest_cache_docs: int = int(os.environ.get("INGEST_CACHE_DOCS", "32"))
+
+    # Answer cache for repeated questions over the same excerpts (entries 0 = off)
+    answer_cache_entries: int = int(os.environ.get("ANSWER_CACHE_ENTRIES", "256"))
+    answer_cache_ttl_s: float = float(os.environ.get("ANSWER_CACHE_TTL_S", "86400"))
+    answer_cache_path: str = os.environ.get("ANSWER_CACHE_PATH", "")  # SQLite file for a disk tier ("" = memory only)
+    answer_cache_disk_entries: int = int(os.environ.get("ANSWER_CACHE_DISK_ENTRIES", "10000"))
+
+    # Semantic cache: reuse answers for paraphrased questions over the same documents (entries 0 = off)
+    semantic_cache_entries: int = int(os.environ.get("SEMANTIC_CACHE_ENTRIES", "1024"))
+    semantic_cache_threshold: float = float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+    semantic_cache_dim: int = int(os.environ.get("SEMANTIC_CACHE_DIM", "512"))
+
     # PDF processing configuration
     pdf_batch_size: int = int(os.environ.get("PDF_BATCH_SIZE", "10"))  # Pages per batch for GC
+    pdf_workers: int = int(os.environ.get("PDF_WORKERS", "1"))  # Extraction processes (0 = one per CPU)
 
 settings = Settings()
\ No newline at end of file
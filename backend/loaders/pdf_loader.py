@@ -1,9 +1,12 @@
 """
 Memory-efficient PDF loader with streaming processing and robust error handling.
 """
-from typing import Union, Optional, Callable, List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Union, Optional, Callable, Deque, Iterator, List, Tuple
 import io
 import gc
+import os
 from pypdf import PdfReader
 from pypdf.errors import PdfReadError
 from backend.utils.text_clean import clean_text
@@ -11,7 +14,7 @@ from backend.utils.file_validator import validate_file_size, FileValidationError
 from backend.utils.error_handler import PDFProcessingError, log_error
 
 
-def validate_pdf_integrity(file_obj: io.BytesIO, filename: str = "PDF") -> None:
+def validate_pdf_integrity(file_obj: io.BytesIO, filename: str = "PDF") -> PdfReader:
     """
     Validates PDF file integrity before processing.
     
@@ -19,6 +22,9 @@ def validate_pdf_integrity(file_obj: io.BytesIO, filename: str = "PDF") -> None:
         file_obj: BytesIO object containing PDF data
         filename: Name of the file for error messages
         
+    Returns:
+        The validated reader, so callers extract with it instead of parsing again
+        
     Raises:
         PDFProcessingError: If PDF is corrupted or invalid
     """
@@ -33,7 +39,10 @@ def validate_pdf_integrity(file_obj: io.BytesIO, filename: str = "PDF") -> None:
         
         # Reset position
         file_obj.seek(current_pos)
+        return reader
         
+    except PDFProcessingError:
+        raise
     except PdfReadError as e:
         raise PDFProcessingError(f"Corrupted or invalid PDF file: {str(e)}", filename)
     except Exception as e:
@@ -61,35 +70,141 @@ def extract_text_from_page(page, page_num: int, filename: str) -> str:
         return ""
 
 
-def read_pdf_bytes(
+def _report_progress(progress_callback: Optional[Callable[[int, int], None]], current: int, total: int) -> None:
+    if progress_callback:
+        try:
+            progress_callback(current, total)
+        except Exception as e:
+            log_error(e, "Progress callback")
+
+
+def _extract_pages_sequential(
+    reader: PdfReader,
+    pages_to_process: int,
+    filename: str,
+    progress_callback: Optional[Callable[[int, int], None]],
+    batch_size: int
+) -> Iterator[str]:
+    """
+    Extracts pages one at a time in the calling thread.
+    
+    Yields:
+        One entry per page, in page order ("" for pages that failed or had no text)
+    """
+    for page_num in range(pages_to_process):
+        try:
+            # Extract text from single page
+            page = reader.pages[page_num]
+            page_text = extract_text_from_page(page, page_num, filename)
+            
+            # Clean up page object to free memory
+            del page
+        except Exception as e:
+            # Log error but continue processing other pages
+            log_error(e, f"Page {page_num + 1} of {filename}")
+            page_text = ""
+        
+        # Call progress callback if provided
+        _report_progress(progress_callback, page_num + 1, pages_to_process)
+        yield page_text
+        
+        # Batch garbage collection for memory efficiency
+        if (page_num + 1) % batch_size == 0:
+            gc.collect()
+
+
+# Per-process reader for parallel extraction, opened once by the pool initializer
+_worker_reader: Optional[PdfReader] = None
+
+
+def _init_extraction_worker(pdf_bytes: bytes) -> None:
+    global _worker_reader
+    _worker_reader = PdfReader(io.BytesIO(pdf_bytes))
+
+
+def _extract_page_range(start: int, end: int, filename: str) -> List[str]:
+    """Worker task: extracts pages [start, end) with the worker's own reader."""
+    page_texts: List[str] = []
+    for page_num in range(start, end):
+        try:
+            page_texts.append(extract_text_from_page(_worker_reader.pages[page_num], page_num, filename))
+        except Exception as e:
+            log_error(e, f"Page {page_num + 1} of {filename}")
+            page_texts.append("")
+    gc.collect()
+    return page_texts
+
+
+def _extract_pages_parallel(
+    pdf_bytes: bytes,
+    pages_to_process: int,
+    workers: int,
+    filename: str,
+    progress_callback: Optional[Callable[[int, int], None]],
+    batch_size: int
+) -> Iterator[str]:
+    """
+    Shards page ranges across a process pool; each worker parses the PDF once
+    and extracts its ranges. Ranges are yielded back in page order, with at
+    most 2 * workers ranges in flight so finished text does not pile up.
+    
+    Yields:
+        One entry per page, in page order ("" for pages that failed or had no text)
+    """
+    starts = iter(range(0, pages_to_process, batch_size))
+    pending: Deque = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_extraction_worker,
+        initargs=(pdf_bytes,)
+    ) as pool:
+        def submit_next() -> None:
+            start = next(starts, None)
+            if start is not None:
+                end = min(start + batch_size, pages_to_process)
+                pending.append((start, end, pool.submit(_extract_page_range, start, end, filename)))
+
+        for _ in range(2 * workers):
+            submit_next()
+        while pending:
+            start, end, future = pending.popleft()
+            try:
+                texts = future.result()
+            except Exception as e:
+                # A crashed shard only loses its own pages
+                log_error(e, f"Pages {start + 1}-{end} of {filename}")
+                texts = [""] * (end - start)
+            submit_next()
+            _report_progress(progress_callback, end, pages_to_process)
+            yield from texts
+
+
+def resolve_pdf_workers(workers: int) -> int:
+    """Maps the configured worker count to a concrete one (0 = one per CPU)."""
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def iter_pdf_pages(
     file_obj: Union[bytes, io.BytesIO],
     max_size_mb: float = 50.0,
     max_pages: Optional[int] = None,
     progress_callback: Optional[Callable[[int, int], None]] = None,
-    batch_size: int = 10
-) -> str:
+    batch_size: int = 10,
+    workers: int = 1
+) -> Iterator[Tuple[int, str]]:
     """
-    Reads PDF from bytes with memory-efficient streaming and robust error handling.
+    Yields (1-based page number, cleaned text) for each PDF page that has
+    text, in page order.
+    
+    Pages are extracted and cleaned one at a time (or one range at a time
+    with workers > 1), so callers such as chunk_text_stream never need the
+    whole document text in memory. Arguments are as for read_pdf_bytes.
     
-    Args:
-        file_obj: PDF file as bytes or BytesIO object
-        max_size_mb: Maximum allowed file size in MB (default: 50MB)
-        max_pages: Maximum number of pages to process (None = all pages)
-        progress_callback: Optional callback function(current_page, total_pages)
-        batch_size: Number of pages to process before garbage collection
-        
-    Returns:
-        Cleaned text extracted from the PDF
-        
     Raises:
         FileValidationError: If file exceeds size limit
-        PDFProcessingError: If PDF processing fails
-        
-    Memory Optimization:
-        - Processes pages in batches with explicit garbage collection
-        - Validates file before processing to prevent memory issues
-        - Uses streaming text accumulation
-        - Cleans up page objects immediately after use
+        PDFProcessingError: If PDF processing fails or no page has text
     """
     filename = "PDF"
     
@@ -101,11 +216,8 @@ def read_pdf_bytes(
         if isinstance(file_obj, bytes):
             file_obj = io.BytesIO(file_obj)
         
-        # Validate PDF integrity
-        validate_pdf_integrity(file_obj, filename)
-        
-        # Create reader
-        reader = PdfReader(file_obj)
+        # Validate PDF integrity; the same reader (and its parsed xref) is used for extraction
+        reader = validate_pdf_integrity(file_obj, filename)
         total_pages = len(reader.pages)
         
         # Limit pages if specified
@@ -114,72 +226,41 @@ def read_pdf_bytes(
         if pages_to_process == 0:
             raise PDFProcessingError("No pages to process", filename)
         
-        # Process pages with streaming and batch garbage collection
-        text_parts: List[str] = []
-        failed_pages: List[int] = []
+        workers = min(resolve_pdf_workers(workers), pages_to_process)
+        if workers > 1 and pages_to_process > batch_size:
+            page_texts = _extract_pages_parallel(
+                file_obj.getvalue(), pages_to_process, workers, filename, progress_callback, batch_size
+            )
+        else:
+            # Process pages with streaming and batch garbage collection
+            page_texts = _extract_pages_sequential(reader, pages_to_process, filename, progress_callback, batch_size)
         
-        for page_num in range(pages_to_process):
-            try:
-                # Extract text from single page
-                page = reader.pages[page_num]
-                page_text = extract_text_from_page(page, page_num, filename)
-                
-                if page_text and page_text.strip():
-                    text_parts.append(page_text)
-                else:
-                    # Track pages with no text
-                    failed_pages.append(page_num + 1)
-                
-                # Call progress callback if provided
-                if progress_callback:
-                    try:
-                        progress_callback(page_num + 1, pages_to_process)
-                    except Exception as e:
-                        log_error(e, "Progress callback")
-                
-                # Clean up page object to free memory
-                del page
-                
-                # Batch garbage collection for memory efficiency
-                if (page_num + 1) % batch_size == 0:
-                    gc.collect()
-                    
-            except Exception as e:
-                # Log error but continue processing other pages
-                log_error(e, f"Page {page_num + 1} of {filename}")
+        pages_with_text = 0
+        failed_pages: List[int] = []
+        for page_num, page_text in enumerate(page_texts):
+            cleaned = clean_text(page_text)
+            if cleaned:
+                pages_with_text += 1
+                yield page_num + 1, cleaned
+            else:
+                # Track pages with no text
                 failed_pages.append(page_num + 1)
-                continue
         
         # Check if we extracted any text
-        if not text_parts:
+        if not pages_with_text:
             raise PDFProcessingError(
                 "No text could be extracted from PDF. It might be image-based or corrupted.",
                 filename
             )
         
-        # Join all text parts
-        full_text = "\n\n".join(text_parts)
-        
         # Log warning if some pages failed
-        if failed_pages and len(failed_pages) < pages_to_process:
+        if failed_pages:
             print(f"⚠️ Warning: {len(failed_pages)} page(s) could not be processed: {failed_pages[:10]}")
         
         # Clean up
-        del text_parts
         del reader
         gc.collect()
         
-        # Clean and return text
-        cleaned_text = clean_text(full_text)
-        
-        if not cleaned_text or len(cleaned_text.strip()) < 10:
-            raise PDFProcessingError(
-                "PDF processed but no meaningful text found",
-                filename
-            )
-        
-        return cleaned_text
-        
     except (FileValidationError, PDFProcessingError):
         # Re-raise our custom errors
         raise
@@ -188,3 +269,52 @@ def read_pdf_bytes(
         log_error(e, "PDF processing")
         raise PDFProcessingError(f"Unexpected error: {str(e)}", filename)
 
+
+def read_pdf_bytes(
+    file_obj: Union[bytes, io.BytesIO],
+    max_size_mb: float = 50.0,
+    max_pages: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    batch_size: int = 10,
+    workers: int = 1
+) -> str:
+    """
+    Reads PDF from bytes with memory-efficient streaming and robust error handling.
+    
+    Args:
+        file_obj: PDF file as bytes or BytesIO object
+        max_size_mb: Maximum allowed file size in MB (default: 50MB)
+        max_pages: Maximum number of pages to process (None = all pages)
+        progress_callback: Optional callback function(current_page, total_pages)
+        batch_size: Number of pages to process before garbage collection
+            (also the page-range size handed to each parallel worker task)
+        workers: Extraction processes; 1 extracts in-process, 0 uses one per CPU
+        
+    Returns:
+        Cleaned text extracted from the PDF
+        
+    Raises:
+        FileValidationError: If file exceeds size limit
+        PDFProcessingError: If PDF processing fails
+        
+    Memory Optimization:
+        - Processes pages in batches with explicit garbage collection
+        - Validates file before processing to prevent memory issues
+        - Parses the PDF once: validation, page counting and extraction share one reader
+        - Cleans up page objects immediately after use
+        - Returns the whole text; use iter_pdf_pages to stream pages instead
+        
+    Parallelism:
+        - With workers > 1, page ranges are extracted in a ProcessPoolExecutor;
+          pages come back in order and progress is reported per finished range
+    """
+    pages = iter_pdf_pages(file_obj, max_size_mb, max_pages, progress_callback, batch_size, workers)
+    cleaned_text = clean_text("\n\n".join(text for _, text in pages))
+    
+    if not cleaned_text or len(cleaned_text.strip()) < 10:
+        raise PDFProcessingError(
+            "PDF processed but no meaningful text found",
+            "PDF"
+        )
+    
+    return cleaned_text
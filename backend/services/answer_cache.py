@@ -0,0 +1,185 @@
+"""
+Response cache for repeated questions over the same excerpts.
+
+A cached answer is reused only when everything that shaped it matches: the
+normalized question, the exact excerpts sent as context (which pins the
+selected chunks and their content), the system prompt, the model and the
+generation parameters. Entries live in a bounded in-memory LRU with a TTL,
+optionally backed by a SQLite file so answers survive restarts and are
+shared by every process using the same path.
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from backend.config import settings
+
+# Puts between sweeps of the disk tier (expired rows, then rows over the cap)
+DISK_PURGE_INTERVAL = 64
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+
+def normalize_question(question: str) -> str:
+    """Case-folds, collapses whitespace and drops trailing ?/!/. so trivial variants share a key."""
+    return _TRAILING_PUNCTUATION.sub("", _WHITESPACE.sub(" ", question.casefold()).strip())
+
+
+def answer_cache_key(
+    question: str,
+    excerpts: Iterable[str],
+    model: str,
+    options: Dict[str, object],
+    system_prompt: str = ""
+) -> str:
+    """
+    Digest of everything that determines an answer.
+    
+    Args:
+        question: Raw user question (normalized here)
+        excerpts: Context excerpts exactly as sent to the model
+        model: Model name
+        options: Generation parameters (temperature, max_tokens, ...)
+        system_prompt: System message text
+        
+    Returns:
+        Hex digest usable as a cache key
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in (normalize_question(question), model, json.dumps(options, sort_keys=True), system_prompt):
+        hasher.update(part.encode("utf-8"))
+        hasher.update(b"\0")
+    for excerpt in excerpts:
+        hasher.update(excerpt.encode("utf-8"))
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+class AnswerCache:
+    """
+    Thread-safe LRU + TTL cache of answers by answer_cache_key, with an
+    optional SQLite tier at `path`. Memory misses fall through to disk and
+    disk hits are promoted back into memory.
+    
+    The disk tier is swept when opened and every DISK_PURGE_INTERVAL puts:
+    expired rows are deleted, then the rows that expire first until at most
+    `max_disk_entries` remain (the TTL is fixed, so those are the oldest).
+    """
+    def __init__(
+        self,
+        max_entries: int = settings.answer_cache_entries,
+        ttl_s: float = settings.answer_cache_ttl_s,
+        path: Optional[str] = settings.answer_cache_path or None,
+        max_disk_entries: int = settings.answer_cache_disk_entries
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.max_disk_entries = max_disk_entries
+        self._puts_since_purge = 0
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()  # key -> (expires_at, answer)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        if path and max_entries > 0:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, answer TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS answers_expiry ON answers (expires_at)")
+            self._purge_disk()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached answer for key, or None (counted as a miss)."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT answer, expires_at FROM answers WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[1], row[0])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, answer: str) -> None:
+        """Stores an answer in memory (and on disk, if configured)."""
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl_s
+        with self._lock:
+            self._remember(key, expires_at, answer)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO answers (key, answer, expires_at) VALUES (?, ?, ?)",
+                        (key, answer, expires_at),
+                    )
+                self._puts_since_purge += 1
+                if self._puts_since_purge >= DISK_PURGE_INTERVAL:
+                    self._purge_disk()
+
+    def _purge_disk(self) -> None:
+        """Deletes expired rows, then the earliest-expiring rows beyond max_disk_entries."""
+        self._puts_since_purge = 0
+        with self._conn:
+            self._conn.execute("DELETE FROM answers WHERE expires_at <= ?", (time.time(),))
+            # Everything expiring no later than the first row past the cap (newest first) goes
+            self._conn.execute(
+                "DELETE FROM answers WHERE expires_at <= ("
+                " SELECT expires_at FROM answers ORDER BY expires_at DESC LIMIT 1 OFFSET ?)",
+                (max(self.max_disk_entries, 0),)
+            )
+
+    def _remember(self, key: str, expires_at: float, answer: str) -> None:
+        self._entries[key] = (expires_at, answer)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM answers")
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses
+            }
+
+
+answer_cache = AnswerCache()
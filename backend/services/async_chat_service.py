@@ -0,0 +1,126 @@
+"""
+Asyncio counterpart of chat_service for serving many sessions at once.
+
+Questions run on one shared background event loop, so every Streamlit
+session draws from the same AsyncGroq connection pool and the same
+concurrency limiter. Retrieval and prompt building run in worker threads
+and overlap with other sessions' network round-trips. submit_question
+returns a Future that can be cancelled when the user moves on.
+"""
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+import asyncio
+import threading
+import weakref
+
+from backend.config import settings
+from backend.services.answer_cache import answer_cache
+from backend.services.chat_service import (
+    COMPLETION_OPTIONS, answer_key, prepare_messages, question_scope, remember_answer, similar_answer
+)
+from backend.services.groq_client import get_async_groq_client
+from backend.storage.in_memory_store import DocChunk, InMemoryStore
+
+# Per-loop limiter on in-flight Groq requests (asyncio primitives belong to one loop)
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _request_limiter() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        limiter = asyncio.Semaphore(max(1, settings.groq_max_concurrent_requests))
+        _limiters[loop] = limiter
+    return limiter
+
+
+async def answer_question_from_docs_async(
+    question: str,
+    all_chunks: Optional[List[DocChunk]] = None,
+    top_k: int = 5,
+    store: Optional[InMemoryStore] = None,
+    mode: Optional[str] = None
+) -> Dict[str, object]:
+    """
+    Async version of chat_service.answer_question_from_docs; same arguments
+    and result. At most settings.groq_max_concurrent_requests completions are
+    in flight per event loop; further callers wait for a slot.
+    
+    Raises:
+        asyncio.CancelledError: If the task is cancelled (the Groq request is
+            abandoned and its slot released)
+    """
+    # Cache lookups embed the question or may hit the SQLite disk tier, and
+    # retrieval is CPU-bound; all of it runs in worker threads, off the event loop
+    scope = question_scope(all_chunks, store, top_k, mode)
+    similar = await asyncio.to_thread(similar_answer, question, scope)
+    if similar is not None:
+        return similar
+
+    timings: Dict[str, float] = {}
+    messages, packed = await asyncio.to_thread(prepare_messages, question, all_chunks, top_k, store, mode, timings)
+    key = answer_key(question, packed)
+    answer = await asyncio.to_thread(answer_cache.get, key)
+    cached = answer is not None
+
+    if not cached:
+        async with _request_limiter():
+            try:
+                client = get_async_groq_client()
+                completion = await client.chat.completions.create(
+                    messages=messages,
+                    model=settings.groq_model,
+                    **COMPLETION_OPTIONS
+                )
+                answer = completion.choices[0].message.content
+                if answer:
+                    await asyncio.to_thread(remember_answer, question, key, scope, packed, answer)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                answer = f"Error generating answer: {e}"
+
+    return {
+        "answer": answer,
+        "used_excerpts": packed.used_excerpts,
+        "context_budget": packed.budget,
+        "retrieval_ms": timings,
+        "cached": cached
+    }
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Starts the shared event loop thread on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="chat-service-loop", daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+def submit_question(
+    question: str,
+    all_chunks: Optional[List[DocChunk]] = None,
+    top_k: int = 5,
+    store: Optional[InMemoryStore] = None,
+    mode: Optional[str] = None
+) -> "Future[Dict[str, object]]":
+    """
+    Schedules answer_question_from_docs_async on the shared event loop.
+    
+    Safe to call from any thread. Call .result() to wait for the answer, or
+    .cancel() when the user sends a new message; cancelling also cancels
+    the underlying task and frees its request slot.
+    
+    Returns:
+        concurrent.futures.Future resolving to the answer dict
+    """
+    return asyncio.run_coroutine_threadsafe(
+        answer_question_from_docs_async(question, all_chunks, top_k, store, mode),
+        _get_loop()
+    )
@@ -1,7 +1,10 @@
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from backend.config import settings
+from backend.services.answer_cache import answer_cache, answer_cache_key
+from backend.services.context_packer import PackedContext, pack_context
 from backend.services.groq_client import get_groq_client
-from backend.storage.in_memory_store import DocChunk
+from backend.services.semantic_cache import document_scope, semantic_cache
+from backend.storage.in_memory_store import DocChunk, InMemoryStore
 from backend.services.retrieval_service import retrieve_top_k
 
 SYSTEM_RULES = """
@@ -31,64 +34,204 @@ CORE BEHAVIORS:
 5. **Natural Conversation**: Greetings and small talk are allowed.
 """
 
-def answer_question_from_docs(
+# Completion parameters shared by the blocking and streaming calls
+COMPLETION_OPTIONS = {
+    "temperature": 0.6, # Increased for more creativity and depth
+    "max_tokens": 1500, # Increased for longer explanations
+}
+
+def prepare_messages(
     question: str,
-    all_chunks: List[DocChunk],
-    top_k: int = 5
-) -> Dict[str, object]:
+    all_chunks: Optional[List[DocChunk]],
+    top_k: int,
+    store: Optional[InMemoryStore],
+    mode: Optional[str],
+    timings: Optional[Dict[str, float]] = None
+) -> Tuple[List[Dict[str, str]], PackedContext]:
     """
-    Retrieves relevant chunks and generates an answer using Groq.
-    Now allows general conversation and fallback to general knowledge.
+    Retrieves and packs excerpts, then builds the chat messages.
+    Shared by the blocking, streaming and async answer paths.
+    Per-retriever latencies (ms) are written to `timings` when given.
     """
-    
     # 1. Retrieve relevant chunks
     # We always try to find relevant chunks first
-    if not all_chunks:
+    if store is not None:
+        relevant_chunks_with_scores = retrieve_top_k(question, [], top_k=top_k, store=store, mode=mode, timings=timings)
+    elif not all_chunks:
          relevant_chunks_with_scores = []
     else:
-        relevant_chunks_with_scores = retrieve_top_k(question, all_chunks, top_k=top_k)
-    
-    used_excerpts = []
-    context_text = ""
+        relevant_chunks_with_scores = retrieve_top_k(question, all_chunks, top_k=top_k, mode=mode, timings=timings)
     
-    for i, (chunk, score) in enumerate(relevant_chunks_with_scores):
-        # We can enforce a minimum score threshold here if needed
-        # For now, we include them but the LLM decides if they are useful
-        excerpt = f"[Source {i+1}] (Doc: {chunk.doc_name}): {chunk.text}\n"
-        context_text += excerpt
-        used_excerpts.append({
-            "doc_name": chunk.doc_name,
-            "chunk_id": chunk.chunk_id,
-            "text": chunk.text,
-            "score": score
-        })
-
-    # 2. Prepare prompt
-    if not context_text:
-        context_text = "No relevant document excerpts found."
+    # 2. Pack the best excerpts into the context budget and prepare the prompt
+    packed = pack_context(relevant_chunks_with_scores)
+    excerpts = packed.excerpts or ["No relevant document excerpts found."]
 
     messages = [
         {"role": "system", "content": SYSTEM_RULES},
         {
             "role": "user",
-            "content": f"User Question: {question}\n\nDOCUMENT EXCERPTS:\n{context_text}"
+            # One join over the packed excerpts instead of repeated concatenation
+            "content": "".join(["User Question: ", question, "\n\nDOCUMENT EXCERPTS:\n", *excerpts])
         }
     ]
+    return messages, packed
+
+def answer_key(question: str, packed: PackedContext) -> str:
+    """Answer cache key: normalized question, exact excerpts, prompt, model and options."""
+    return answer_cache_key(question, packed.excerpts, settings.groq_model, COMPLETION_OPTIONS, SYSTEM_RULES)
+
+def question_scope(
+    all_chunks: Optional[List[DocChunk]],
+    store: Optional[InMemoryStore],
+    top_k: int,
+    mode: Optional[str]
+) -> str:
+    """Semantic cache scope: the loaded documents, retrieval settings, prompt, model and options."""
+    doc_ids = store.docs.keys() if store is not None else {chunk.doc_id for chunk in all_chunks or ()}
+    retrieval = {"top_k": top_k, "mode": mode or settings.retrieval_mode}
+    return document_scope(doc_ids, settings.groq_model, COMPLETION_OPTIONS, SYSTEM_RULES, retrieval)
+
+def similar_answer(question: str, scope: str) -> Optional[Dict[str, object]]:
+    """The result of an earlier, semantically equivalent question in `scope`, if cached."""
+    hit = semantic_cache.lookup(question, scope)
+    if hit is None:
+        return None
+    return {**hit.result, "cached": True, "similar_question": hit.question}
+
+def remember_answer(question: str, key: str, scope: str, packed: PackedContext, answer: str) -> None:
+    """Stores a freshly generated answer in both the exact and the semantic cache."""
+    answer_cache.put(key, answer)
+    semantic_cache.add(question, scope, {
+        "answer": answer,
+        "used_excerpts": packed.used_excerpts,
+        "context_budget": packed.budget
+    })
+
+def answer_question_from_docs(
+    question: str,
+    all_chunks: Optional[List[DocChunk]] = None,
+    top_k: int = 5,
+    store: Optional[InMemoryStore] = None,
+    mode: Optional[str] = None
+) -> Dict[str, object]:
+    """
+    Retrieves relevant chunks and generates an answer using Groq.
+    Now allows general conversation and fallback to general knowledge.
+    Pass `store` to retrieve through its inverted index instead of scanning `all_chunks`.
+    `mode` selects the retrieval ranking (see retrieval_service.RETRIEVAL_MODES).
+    Excerpts are packed into settings.max_context_chars (and max_context_tokens);
+    the result's "context_budget" reports how much of it was used.
+    Repeated questions over the same excerpts are answered from answer_cache
+    ("cached" is True in the result). Paraphrases of an earlier question over
+    the same documents with the same top_k and mode are answered from
+    semantic_cache before retrieval; "similar_question" then holds the
+    question whose answer was reused.
+    "retrieval_ms" maps each retriever that ran to its latency in milliseconds.
+    """
+    scope = question_scope(all_chunks, store, top_k, mode)
+    similar = similar_answer(question, scope)
+    if similar is not None:
+        return similar
+
+    timings: Dict[str, float] = {}
+    messages, packed = prepare_messages(question, all_chunks, top_k, store, mode, timings)
+    key = answer_key(question, packed)
+    answer = answer_cache.get(key)
+    cached = answer is not None
 
     # 3. Call Groq API
+    if not cached:
+        client = get_groq_client()
+        try:
+            completion = client.chat.completions.create(
+                messages=messages,
+                model=settings.groq_model,
+                **COMPLETION_OPTIONS
+            )
+            answer = completion.choices[0].message.content
+            if answer:
+                remember_answer(question, key, scope, packed, answer)
+        except Exception as e:
+            answer = f"Error generating answer: {e}"
+
+    return {
+        "answer": answer,
+        "used_excerpts": packed.used_excerpts,
+        "context_budget": packed.budget,
+        "retrieval_ms": timings,
+        "cached": cached
+    }
+
+def _stream_completion(
+    messages: List[Dict[str, str]],
+    question: str,
+    key: str,
+    scope: str,
+    packed: PackedContext
+) -> Iterator[str]:
     client = get_groq_client()
+    parts: List[str] = []
+    streamed = False
     try:
-        completion = client.chat.completions.create(
+        stream = client.chat.completions.create(
             messages=messages,
             model=settings.groq_model,
-            temperature=0.6, # Increased for more creativity and depth
-            max_tokens=1500, # Increased for longer explanations
+            stream=True,
+            **COMPLETION_OPTIONS
         )
-        answer = completion.choices[0].message.content
+        try:
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    streamed = True
+                    parts.append(delta)
+                    yield delta
+        finally:
+            # Also runs when the consumer abandons the answer (GeneratorExit at the yield),
+            # so the HTTP response is closed and its pooled connection returned
+            stream.close()
     except Exception as e:
-        answer = f"Error generating answer: {e}"
+        # Same message as the blocking call; kept apart from any partial answer
+        separator = "\n\n" if streamed else ""
+        yield f"{separator}Error generating answer: {e}"
+        return
+    # Only complete answers are cached (not ones the consumer abandoned or that failed)
+    if parts:
+        remember_answer(question, key, scope, packed, "".join(parts))
+
+def stream_answer_from_docs(
+    question: str,
+    all_chunks: Optional[List[DocChunk]] = None,
+    top_k: int = 5,
+    store: Optional[InMemoryStore] = None,
+    mode: Optional[str] = None
+) -> Dict[str, object]:
+    """
+    Streaming counterpart of answer_question_from_docs.
+    
+    Retrieval and context packing happen before this returns, so
+    "used_excerpts" and "context_budget" are ready immediately. "answer_stream"
+    yields the answer text as Groq produces it; joining the deltas gives the
+    full answer. The request is only sent when the stream is first iterated.
+    A cached answer is yielded as a single delta ("cached" is True).
+    """
+    scope = question_scope(all_chunks, store, top_k, mode)
+    similar = similar_answer(question, scope)
+    if similar is not None:
+        answer = similar.pop("answer")
+        return {"answer_stream": iter([answer]), **similar}
 
+    timings: Dict[str, float] = {}
+    messages, packed = prepare_messages(question, all_chunks, top_k, store, mode, timings)
+    key = answer_key(question, packed)
+    answer = answer_cache.get(key)
     return {
-        "answer": answer,
-        "used_excerpts": used_excerpts
-    }
\ No newline at end of file
+        "answer_stream": (
+            iter([answer]) if answer is not None
+            else _stream_completion(messages, question, key, scope, packed)
+        ),
+        "used_excerpts": packed.used_excerpts,
+        "context_budget": packed.budget,
+        "retrieval_ms": timings,
+        "cached": answer is not None
+    }
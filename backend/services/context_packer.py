@@ -0,0 +1,117 @@
+"""
+Context assembly: fits the best retrieved excerpts into the prompt budget.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.storage.in_memory_store import DocChunk
+from backend.utils.token_estimator import CHARS_PER_TOKEN, estimate_tokens
+
+# A cut-down excerpt shorter than this is more noise than context; drop it instead
+MIN_TRUNCATED_EXCERPT_CHARS = 200
+TRUNCATION_MARKER = " …"
+
+
+@dataclass
+class PackedContext:
+    """Excerpts chosen for the prompt, in citation order, and the budget they used."""
+    excerpts: List[str] = field(default_factory=list)        # "[Source n] (Doc: ...): text\n"
+    used_excerpts: List[Dict[str, object]] = field(default_factory=list)
+    budget: Dict[str, object] = field(default_factory=dict)
+
+
+def _format_excerpt(number: int, chunk: DocChunk, text: str) -> str:
+    page_label = chunk.page_label()
+    location = f"{chunk.doc_name}, {page_label}" if page_label else chunk.doc_name
+    return f"[Source {number}] (Doc: {location}): {text}\n"
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Cuts text to at most max_chars (marker included), preferring a word boundary."""
+    limit = max_chars - len(TRUNCATION_MARKER)
+    if limit <= 0:
+        return ""
+    cut = text.rfind(" ", 0, limit + 1)
+    if cut < limit // 2:
+        cut = limit
+    return text[:cut].rstrip() + TRUNCATION_MARKER
+
+
+def pack_context(
+    ranked: List[Tuple[DocChunk, float]],
+    max_chars: int = settings.max_context_chars,
+    max_tokens: Optional[int] = settings.max_context_tokens or None
+) -> PackedContext:
+    """
+    Greedily packs ranked excerpts into a character (and optional token) budget.
+    
+    Excerpts are taken best-first. One that does not fit is truncated if at
+    least MIN_TRUNCATED_EXCERPT_CHARS of budget remain (which fills the
+    budget), otherwise it is dropped and smaller later excerpts may still fit.
+    Sources are numbered in packed order so citations match used_excerpts.
+    
+    Args:
+        ranked: (chunk, score) pairs, best first
+        max_chars: Character budget for all excerpts together (<= 0 = unlimited)
+        max_tokens: Estimated-token budget (None = unlimited)
+        
+    Returns:
+        PackedContext with the excerpt strings, their metadata and a budget
+        report (chars/tokens used vs. limits, packed/truncated/dropped counts)
+    """
+    packed = PackedContext()
+    chars_left = max_chars if max_chars > 0 else float("inf")
+    tokens_left = max_tokens if max_tokens else float("inf")
+    chars_used = tokens_used = truncated = dropped = 0
+
+    for chunk, score in ranked:
+        number = len(packed.excerpts) + 1
+        text = chunk.text
+        excerpt = _format_excerpt(number, chunk, text)
+        tokens = estimate_tokens(excerpt)
+        if len(excerpt) > chars_left or tokens > tokens_left:
+            # Room for the text itself once the "[Source n] (Doc: ...)" header is paid for
+            header_chars = len(excerpt) - len(text)
+            room = min(chars_left, tokens_left * CHARS_PER_TOKEN) - header_chars
+            if room < MIN_TRUNCATED_EXCERPT_CHARS:
+                dropped += 1
+                continue
+            text = _truncate(text, int(room))
+            excerpt = _format_excerpt(number, chunk, text)
+            tokens = estimate_tokens(excerpt)
+            while tokens > tokens_left and len(text) > MIN_TRUNCATED_EXCERPT_CHARS:
+                # Token-dense text (code, math): shrink until the estimate fits
+                text = _truncate(text, len(text) * 3 // 4)
+                excerpt = _format_excerpt(number, chunk, text)
+                tokens = estimate_tokens(excerpt)
+            if len(excerpt) > chars_left or tokens > tokens_left:
+                dropped += 1
+                continue
+            truncated += 1
+
+        packed.excerpts.append(excerpt)
+        packed.used_excerpts.append({
+            "doc_name": chunk.doc_name,
+            "chunk_id": chunk.chunk_id,
+            "text": text,
+            "score": score,
+            "page_label": chunk.page_label(),
+            "char_start": chunk.char_start,
+            "char_end": chunk.char_end
+        })
+        chars_left -= len(excerpt)
+        tokens_left -= tokens
+        chars_used += len(excerpt)
+        tokens_used += tokens
+
+    packed.budget = {
+        "chars_used": chars_used,
+        "max_chars": max_chars if max_chars > 0 else None,
+        "tokens_used": tokens_used,
+        "max_tokens": max_tokens,
+        "excerpts_packed": len(packed.excerpts),
+        "excerpts_truncated": truncated,
+        "excerpts_dropped": dropped
+    }
+    return packed
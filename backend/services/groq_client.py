@@ -1,7 +1,95 @@
-from groq import Groq
+"""
+Process-wide Groq clients with pooled, keep-alive HTTP connections.
+"""
+from typing import Optional
+import asyncio
+import threading
+import weakref
+
+import httpx
+from groq import AsyncGroq, Groq
+
 from backend.config import settings
 
+_client: Optional[Groq] = None
+_client_lock = threading.Lock()
+# Async connections belong to the event loop that opened them, so there is one client per loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncGroq]" = weakref.WeakKeyDictionary()
+
+
+def _pool_options() -> dict:
+    timeout = httpx.Timeout(settings.groq_timeout_s, connect=settings.groq_connect_timeout_s)
+    limits = httpx.Limits(
+        max_connections=settings.groq_max_connections,
+        max_keepalive_connections=settings.groq_max_keepalive,
+        keepalive_expiry=settings.groq_keepalive_expiry_s
+    )
+    return {"limits": limits, "timeout": timeout}
+
+
+def _build_client() -> Groq:
+    options = _pool_options()
+    return Groq(
+        api_key=settings.groq_api_key,
+        http_client=httpx.Client(**options),
+        timeout=options["timeout"],
+        max_retries=settings.groq_max_retries
+    )
+
+
 def get_groq_client() -> Groq:
+    """
+    Returns the shared Groq client, creating it on first use.
+    
+    The client (and its httpx connection pool) lives for the whole process,
+    so later questions reuse warm TLS connections instead of paying for a
+    new client, pool and handshake each time. httpx clients are thread-safe,
+    so every Streamlit session and thread can share it.
+    
+    Raises:
+        ValueError: If GROQ_API_KEY is not configured
+    """
+    global _client
     if not settings.groq_api_key:
         raise ValueError("GROQ_API_KEY is missing. Add it to your .env file.")
-    return Groq(api_key=settings.groq_api_key)
\ No newline at end of file
+    client = _client
+    if client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _build_client()
+            client = _client
+    return client
+
+
+def get_async_groq_client() -> AsyncGroq:
+    """
+    Returns the AsyncGroq client for the running event loop, creating it on
+    first use. Pool limits and timeouts are the same as get_groq_client's.
+    Must be called from inside a coroutine.
+    
+    Raises:
+        ValueError: If GROQ_API_KEY is not configured
+    """
+    if not settings.groq_api_key:
+        raise ValueError("GROQ_API_KEY is missing. Add it to your .env file.")
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        options = _pool_options()
+        client = AsyncGroq(
+            api_key=settings.groq_api_key,
+            http_client=httpx.AsyncClient(**options),
+            timeout=options["timeout"],
+            max_retries=settings.groq_max_retries
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def reset_groq_client() -> None:
+    """Closes the shared client and its connections; the next call builds a new one."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
@@ -0,0 +1,220 @@
+"""
+Document ingestion (extract -> clean -> chunk -> tokenize) with a
+process-wide content-hash cache, so identical uploads are processed once
+no matter which session or user sends them or what the file is called.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import hashlib
+import io
+import threading
+
+from backend.config import settings
+from backend.loaders.pdf_loader import iter_pdf_pages
+from backend.loaders.text_loader import read_text_bytes
+from backend.storage.in_memory_store import DocChunk
+from backend.storage.vector_index import embed_chunk_texts, embeddings_enabled
+from backend.utils.chunking import ChunkSpan, chunk_text_spans, validate_chunk
+from backend.utils.error_handler import StudyBuddyError, ErrorCategory
+from backend.utils.tokenizer import encode_terms, vocabulary
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class IngestedDocument:
+    """Chunked, tokenized content of one file, independent of its name."""
+    content_hash: str
+    chunk_texts: Tuple[str, ...]
+    term_counts: Tuple[Dict[int, int], ...]
+    # Per chunk: (page_start, page_end, char_start, char_end); pages are None for text files
+    locations: Tuple[Tuple[Optional[int], Optional[int], int, int], ...] = ()
+    # (chunks, dim) float32 chunk embeddings for dense retrieval; None when embeddings are off
+    embeddings: Optional[object] = field(default=None, compare=False, repr=False)
+
+    def to_chunks(self, doc_id: str, doc_name: str) -> List[DocChunk]:
+        """Builds DocChunks for a store. Term counts are shared, not copied."""
+        locations = self.locations or ((None, None, None, None),) * len(self.chunk_texts)
+        return [
+            DocChunk(
+                doc_id=doc_id, doc_name=doc_name, chunk_id=i, text=text,
+                page_start=page_start, page_end=page_end, char_start=char_start, char_end=char_end,
+                term_counts=terms
+            )
+            for i, (text, terms, (page_start, page_end, char_start, char_end))
+            in enumerate(zip(self.chunk_texts, self.term_counts, locations))
+        ]
+
+
+def content_hash(data: Union[bytes, io.BytesIO]) -> str:
+    """
+    BLAKE2b digest of the upload, hashed in fixed-size blocks.
+
+    Args:
+        data: File bytes or a seekable binary file object (position is restored)
+
+    Returns:
+        Hex digest identifying the content
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        view = memoryview(data)
+        for start in range(0, len(view), HASH_BLOCK_SIZE):
+            hasher.update(view[start:start + HASH_BLOCK_SIZE])
+    else:
+        current_pos = data.tell()
+        data.seek(0)
+        for block in iter(lambda: data.read(HASH_BLOCK_SIZE), b""):
+            hasher.update(block)
+        data.seek(current_pos)
+    return hasher.hexdigest()
+
+
+class IngestCache:
+    """
+    Bounded LRU cache of IngestedDocument by content hash.
+
+    Concurrent requests for the same hash are single-flighted: the first
+    caller ingests while the others wait for its result.
+    """
+    def __init__(self, max_docs: int = settings.ingest_cache_docs) -> None:
+        self.max_docs = max_docs
+        self._docs: "OrderedDict[str, IngestedDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[IngestedDocument]:
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is not None:
+                self._docs.move_to_end(key)
+            return doc
+
+    def get_or_ingest(self, key: str, ingest: Callable[[], IngestedDocument]) -> IngestedDocument:
+        doc = self.get(key)
+        if doc is not None:
+            with self._lock:
+                self.hits += 1
+            return doc
+
+        with self._lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+        with key_lock:
+            doc = self.get(key)
+            if doc is not None:
+                with self._lock:
+                    self.hits += 1
+                return doc
+            try:
+                doc = ingest()
+            except BaseException:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                raise
+            # Publish before releasing the in-flight entry, in one critical section,
+            # so a caller arriving in between finds the document instead of ingesting again
+            with self._lock:
+                self.misses += 1
+                self._docs[key] = doc
+                while len(self._docs) > self.max_docs:
+                    self._docs.popitem(last=False)
+                self._inflight.pop(key, None)
+            return doc
+
+    def clear(self) -> None:
+        with self._lock:
+            self._docs.clear()
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            return {"docs": len(self._docs), "hits": self.hits, "misses": self.misses}
+
+
+ingest_cache = IngestCache()
+
+
+def is_pdf(filename: str) -> bool:
+    return filename.lower().endswith(".pdf")
+
+
+def _chunk_spans(pages: Iterable[Tuple[int, str]]) -> Iterator[ChunkSpan]:
+    """Chunks pages with the configured unit (characters or estimated tokens)."""
+    if settings.chunk_unit == "tokens":
+        return chunk_text_spans(pages, settings.chunk_size_tokens, settings.chunk_overlap_tokens, unit="tokens")
+    return chunk_text_spans(pages, settings.chunk_size, settings.chunk_overlap, unit=settings.chunk_unit)
+
+
+def _ingest(
+    file_bytes: bytes,
+    filename: str,
+    key: str,
+    progress_callback: Optional[Callable[[int, int], None]]
+) -> IngestedDocument:
+    if is_pdf(filename):
+        # Pages stream straight into the chunker; the full document text is never built
+        pages = iter_pdf_pages(
+            file_bytes,
+            max_size_mb=settings.max_file_size_mb,
+            max_pages=settings.max_pdf_pages,
+            progress_callback=progress_callback,
+            batch_size=settings.pdf_batch_size,
+            workers=settings.pdf_workers
+        )
+        spans = _chunk_spans(pages)
+    else:
+        # A text file is one "page"; its chunks carry offsets but no page numbers
+        spans = (
+            span._replace(page_start=None, page_end=None)
+            for span in _chunk_spans([(1, read_text_bytes(file_bytes))])
+        )
+
+    kept: List[ChunkSpan] = [span for span in spans if validate_chunk(span.text)]
+    if not kept:
+        raise StudyBuddyError(
+            "No valid text found in document.",
+            category=ErrorCategory.VALIDATION_ERROR
+        )
+    # Tokenize and embed once at ingest; retrieval only looks at term ids and vectors
+    chunk_texts = tuple(span.text for span in kept)
+    embeddings = embed_chunk_texts(chunk_texts) if embeddings_enabled() else None
+    doc = IngestedDocument(
+        content_hash=key,
+        chunk_texts=chunk_texts,
+        term_counts=tuple(encode_terms(text) for text in chunk_texts),
+        locations=tuple((span.page_start, span.page_end, span.char_start, span.char_end) for span in kept),
+        embeddings=embeddings
+    )
+    # The document keeps its terms in the vocabulary for as long as it is cached or in use
+    vocabulary.release_with(doc, doc.term_counts)
+    return doc
+
+
+def ingest_bytes(
+    file_bytes: bytes,
+    filename: str,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    key: Optional[str] = None
+) -> IngestedDocument:
+    """
+    Extracts, chunks and tokenizes an uploaded file, reusing earlier work for
+    identical content.
+
+    Args:
+        file_bytes: Raw upload
+        filename: Used only to pick the loader (PDF vs text) and for messages
+        progress_callback: Optional callback(current_page, total_pages), PDFs only
+        key: Precomputed content_hash(file_bytes), if the caller already has it
+
+    Returns:
+        IngestedDocument (shared; do not mutate)
+
+    Raises:
+        StudyBuddyError: If the document yields no valid chunks
+    """
+    key = key or content_hash(file_bytes)
+    # The same bytes parse differently as PDF and as plain text
+    cache_key = f"{key}:{'pdf' if is_pdf(filename) else 'text'}"
+    return ingest_cache.get_or_ingest(cache_key, lambda: _ingest(file_bytes, filename, key, progress_callback))
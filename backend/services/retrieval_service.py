@@ -1,27 +1,330 @@
-from typing import List, Tuple
-from backend.storage.in_memory_store import DocChunk
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from backend.config import settings
+from backend.storage.in_memory_store import DocChunk, InMemoryStore
+from backend.storage.inverted_index import InvertedIndex
+from backend.storage.vector_index import FlatVectorIndex, embed_chunk_texts, embeddings_enabled
+from backend.services.sparse_engine import SparseScoringEngine, get_sparse_engine
+from backend.utils.embeddings import get_embedder
+from backend.utils.tokenizer import encode_query
 
-def score_chunk_optimized(query_tokens: List[str], text_lower: str) -> float:
-    """Optimized keyword overlap scoring."""
+RETRIEVAL_MODES = ("keyword", "bm25", "sparse", "dense", "hybrid")
+HYBRID_FUSIONS = ("rrf", "weighted")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def score_chunk_terms(query_terms: List[int], term_counts: Dict[int, int]) -> float:
+    """Keyword overlap scoring against a chunk's pre-tokenized term counts."""
     score = 0.0
-    for w in query_tokens:
-        if w in text_lower:
+    for t in query_terms:
+        if t in term_counts:
             score += 1.0
     return score
 
-def retrieve_top_k(query: str, chunks: List[DocChunk], top_k: int) -> List[Tuple[DocChunk, float]]:
-    # Pre-process query once
-    query_tokens = [w for w in query.lower().split() if len(w) > 2]
-    if not query_tokens:
+def score_keyword_postings(query_terms: List[int], index: InvertedIndex) -> Dict[int, float]:
+    """
+    Keyword overlap scoring driven by the inverted index.
+    Only chunks that share at least one term with the query are visited.
+    """
+    scores: Dict[int, float] = {}
+    for t in query_terms:
+        for slot in index.get_postings(t):
+            scores[slot] = scores.get(slot, 0.0) + 1.0
+    return scores
+
+def bm25_idf(num_chunks: int, doc_freq: int) -> float:
+    """BM25 inverse document frequency (Lucene variant, never negative)."""
+    return math.log(1.0 + (num_chunks - doc_freq + 0.5) / (doc_freq + 0.5))
+
+def score_bm25_postings(
+    query_terms: List[int],
+    index: InvertedIndex,
+    k1: float = settings.bm25_k1,
+    b: float = settings.bm25_b
+) -> Dict[int, float]:
+    """
+    Okapi BM25 scoring over the posting lists of the query terms.
+    Cost is proportional to the postings touched, not to corpus size.
+    """
+    num_chunks = len(index)
+    if num_chunks == 0:
+        return {}
+    avg_len = index.avg_chunk_length() or 1.0
+    lengths = index.chunk_lengths
+
+    scores: Dict[int, float] = {}
+    # Repeated query words would otherwise double-count a term
+    for t in dict.fromkeys(query_terms):
+        posting = index.get_postings(t)
+        if not posting:
+            continue
+        idf = bm25_idf(num_chunks, len(posting))
+        for slot, tf in posting.items():
+            norm = k1 * (1.0 - b + b * lengths[slot] / avg_len)
+            scores[slot] = scores.get(slot, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+    return scores
+
+def select_top_k(scores: Iterable[Tuple[int, float]], top_k: int) -> List[Tuple[int, float]]:
+    """
+    Bounded-heap selection of the best (slot, score) pairs.
+    O(n log k) time and O(k) extra memory instead of sorting everything;
+    ties keep slot (insertion) order like the linear scan.
+    """
+    return heapq.nsmallest(top_k, scores, key=lambda x: (-x[1], x[0]))
+
+def score_bm25_maxscore(
+    query_terms: List[int],
+    index: InvertedIndex,
+    top_k: int,
+    k1: float = settings.bm25_k1,
+    b: float = settings.bm25_b
+) -> List[Tuple[int, float]]:
+    """
+    Exact BM25 top_k with MaxScore-style early termination.
+    
+    Terms are processed from highest to lowest score upper bound. Once the sum
+    of the remaining bounds cannot lift an unseen chunk past the current k-th
+    best score, no new candidates are admitted: the remaining (usually common,
+    long) posting lists are only probed for existing candidates, and
+    candidates that cannot reach the threshold are dropped unscored.
+    """
+    num_chunks = len(index)
+    if num_chunks == 0 or top_k <= 0:
+        return []
+    avg_len = index.avg_chunk_length() or 1.0
+    lengths = index.chunk_lengths
+
+    terms = []
+    for t in dict.fromkeys(query_terms):
+        posting = index.get_postings(t)
+        if not posting:
+            continue
+        idf = bm25_idf(num_chunks, len(posting))
+        max_tf, min_len = index.term_bounds[t]
+        upper = idf * max_tf * (k1 + 1.0) / (max_tf + k1 * (1.0 - b + b * min_len / avg_len))
+        terms.append((upper, idf, posting))
+    terms.sort(key=lambda t: t[0], reverse=True)
+
+    # Suffix sums of the bounds; the last entry is exactly 0.0 so no float drift prunes the winners
+    suffix = [0.0] * (len(terms) + 1)
+    for i in range(len(terms) - 1, -1, -1):
+        suffix[i] = suffix[i + 1] + terms[i][0]
+
+    acc: Dict[int, float] = {}
+    threshold = 0.0
+    for i, (upper, idf, posting) in enumerate(terms):
+        remaining = suffix[i + 1]
+        if suffix[i] >= threshold or len(acc) < top_k:
+            # Unseen chunks can still reach the top_k: walk the whole posting list
+            for slot, tf in posting.items():
+                norm = k1 * (1.0 - b + b * lengths[slot] / avg_len)
+                acc[slot] = acc.get(slot, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+        else:
+            # Only existing candidates can still qualify; probe from the smaller side
+            if len(acc) < len(posting):
+                hits = [(slot, posting[slot]) for slot in acc if slot in posting]
+            else:
+                hits = [(slot, tf) for slot, tf in posting.items() if slot in acc]
+            for slot, tf in hits:
+                norm = k1 * (1.0 - b + b * lengths[slot] / avg_len)
+                acc[slot] += idf * tf * (k1 + 1.0) / (tf + norm)
+        if len(acc) >= top_k:
+            threshold = heapq.nlargest(top_k, acc.values())[-1]
+            if remaining < threshold:
+                acc = {slot: s for slot, s in acc.items() if s + remaining >= threshold}
+    return select_top_k(acc.items(), top_k)
+
+def retrieve_dense(
+    query: str,
+    chunks: List[DocChunk],
+    top_k: int,
+    store: Optional[InMemoryStore] = None
+) -> List[Tuple[DocChunk, float]]:
+    """
+    Embedding (cosine) retrieval: one matrix-vector product over the chunk
+    embeddings plus argpartition. Uses the store's vectors when given;
+    otherwise `chunks` are embedded on the fly.
+
+    A compressed (int8/pq) index only ranks candidates: the best
+    top_k x VECTOR_RERANK_CANDIDATES are re-embedded from their text and
+    re-scored exactly, so float32 vectors never have to be kept.
+    """
+    query_vector = get_embedder().embed(query)
+    if not query_vector.any():
         return []
+    if store is None:
+        vectors = FlatVectorIndex(len(query_vector))
+        vectors.add_doc("", list(range(len(chunks))), embed_chunk_texts(chunk.text for chunk in chunks))
+        return [(chunks[slot], s) for slot, s in vectors.search(query_vector, top_k)]
+
+    with getattr(store, "lock", None) or nullcontext():
+        vectors = store.vectors
+        if vectors is None:
+            raise ValueError("Dense retrieval needs chunk embeddings; set EMBEDDING_BACKEND and install NumPy.")
+        if not vectors.approximate:
+            return [(store.chunk_at(slot), s) for slot, s in vectors.search(query_vector, top_k)]
+        candidates = [store.chunk_at(slot) for slot, _ in vectors.search(query_vector, top_k * settings.vector_rerank_candidates)]
+    if not candidates:
+        return []
+    # Embedding is deterministic, so re-embedding reproduces the stored vectors before quantization
+    exact = (embed_chunk_texts(chunk.text for chunk in candidates) @ query_vector).tolist()
+    ranked = sorted(zip(candidates, exact), key=lambda pair: -pair[1])
+    return [(chunk, s) for chunk, s in ranked[:top_k] if s > 0]
+
+def _retrieval_executor() -> ThreadPoolExecutor:
+    """Process-wide pool the hybrid mode runs its retrievers on."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(2, settings.retrieval_threads), thread_name_prefix="retrieval")
+        return _executor
+
+def _timed(fn: Callable[[], List[Tuple[DocChunk, float]]]) -> Tuple[List[Tuple[DocChunk, float]], float]:
+    start = time.perf_counter()
+    ranked = fn()
+    return ranked, (time.perf_counter() - start) * 1000.0
+
+def fuse_rankings(
+    rankings: List[List[Tuple[DocChunk, float]]],
+    top_k: int,
+    fusion: str = settings.hybrid_fusion,
+    weights: Optional[List[float]] = None,
+    rrf_k: int = settings.hybrid_rrf_k
+) -> List[Tuple[DocChunk, float]]:
+    """
+    Merges ranked (chunk, score) lists into one top_k list.
+
+    "rrf" (reciprocal-rank fusion) scores a chunk sum(w / (rrf_k + rank)),
+    ignoring raw scores, which are not comparable across retrievers.
+    "weighted" min-max normalizes each list's scores to [0, 1] and adds them
+    with the given weights. Chunks are matched by (doc_id, chunk_id); ties
+    keep the order in which chunks were first seen.
+    """
+    if fusion not in HYBRID_FUSIONS:
+        raise ValueError(f"Unknown fusion '{fusion}'. Expected one of: {', '.join(HYBRID_FUSIONS)}")
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[Tuple[str, int], float] = {}
+    chunks: Dict[Tuple[str, int], DocChunk] = {}
+    for ranked, weight in zip(rankings, weights):
+        if not ranked:
+            continue
+        if fusion == "weighted":
+            high, low = ranked[0][1], ranked[-1][1]
+            span = high - low
+        for rank, (chunk, score) in enumerate(ranked, start=1):
+            key = (chunk.doc_id, chunk.chunk_id)
+            chunks.setdefault(key, chunk)
+            if fusion == "rrf":
+                contribution = weight / (rrf_k + rank)
+            else:
+                contribution = weight * ((score - low) / span if span > 0 else 1.0)
+            fused[key] = fused.get(key, 0.0) + contribution
+    order = {key: i for i, key in enumerate(chunks)}
+    best = select_top_k(((order[key], score) for key, score in fused.items()), top_k)
+    keys = list(chunks)
+    return [(chunks[keys[i]], score) for i, score in best]
+
+def retrieve_hybrid(
+    query: str,
+    chunks: List[DocChunk],
+    top_k: int,
+    store: Optional[InMemoryStore] = None,
+    timings: Optional[Dict[str, float]] = None
+) -> List[Tuple[DocChunk, float]]:
+    """
+    Lexical (settings.hybrid_lexical_mode) and dense retrieval run
+    concurrently on a shared thread pool, each fetching
+    top_k * settings.hybrid_candidates results, then fused with
+    fuse_rankings (settings.hybrid_fusion; settings.hybrid_dense_weight
+    weighs the dense list). Per-retriever and fusion wall times in
+    milliseconds are written to `timings` when given.
+    Without chunk embeddings only the lexical ranking is returned.
+    """
+    lexical_mode = settings.hybrid_lexical_mode
+    if not embeddings_enabled() or (store is not None and store.vectors is None):
+        return retrieve_top_k(query, chunks, top_k, store=store, mode=lexical_mode, timings=timings)
+    depth = top_k * max(1, settings.hybrid_candidates)
+    pool = _retrieval_executor()
+    lexical = pool.submit(_timed, lambda: retrieve_top_k(query, chunks, depth, store=store, mode=lexical_mode))
+    dense = pool.submit(_timed, lambda: retrieve_dense(query, chunks, depth, store))
+    (lexical_ranked, lexical_ms), (dense_ranked, dense_ms) = lexical.result(), dense.result()
+
+    start = time.perf_counter()
+    dense_weight = settings.hybrid_dense_weight
+    ranked = fuse_rankings([lexical_ranked, dense_ranked], top_k, weights=[1.0 - dense_weight, dense_weight])
+    if timings is not None:
+        timings.update({lexical_mode: lexical_ms, "dense": dense_ms, "fusion": (time.perf_counter() - start) * 1000.0})
+    return ranked
+
+def retrieve_top_k(
+    query: str,
+    chunks: List[DocChunk],
+    top_k: int,
+    store: Optional[InMemoryStore] = None,
+    mode: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None
+) -> List[Tuple[DocChunk, float]]:
+    """
+    Returns the top_k chunks for a query as (chunk, score) pairs.
+    When a store is given its inverted index is used and `chunks` is ignored;
+    otherwise `chunks` is scanned (keyword) or indexed on the fly (bm25, sparse).
+    `mode` is one of RETRIEVAL_MODES and defaults to settings.retrieval_mode.
+    Pass a dict as `timings` to receive per-retriever wall times in
+    milliseconds (keyed by mode; hybrid adds "fusion").
+    """
+    mode = mode or settings.retrieval_mode
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode '{mode}'. Expected one of: {', '.join(RETRIEVAL_MODES)}")
+    if mode == "hybrid":
+        return retrieve_hybrid(query, chunks, top_k, store, timings)
+    if timings is not None:
+        ranked, timings[mode] = _timed(lambda: retrieve_top_k(query, chunks, top_k, store, mode))
+        return ranked
+    if mode == "dense":
+        return retrieve_dense(query, chunks, top_k, store)
+
+    # Terms must be in the vocabulary before the query is encoded: a lazily loaded
+    # store index is built now, and chunks built without term counts are tokenized
+    # once here (caching the result)
+    if store is None:
+        chunk_terms = [ch.get_term_counts() for ch in chunks]
+    else:
+        index = store.index
+
+    # Pre-process query once; chunks were tokenized at ingest
+    query_terms = encode_query(query)
+    if not query_terms:
+        return []
+
+    if store is not None:
+        resolve = store.chunk_at
+    elif mode != "keyword":
+        # Ad-hoc index so BM25 has corpus statistics for a plain chunk list
+        index = InvertedIndex()
+        slots = index.add_doc("", chunk_terms)
+        resolve = dict(zip(slots, chunks)).__getitem__
+    else:
+        # Stream (position, score) pairs through a bounded heap instead of sorting all matches
+        scored = (
+            (i, score_chunk_terms(query_terms, terms))
+            for i, terms in enumerate(chunk_terms)
+        )
+        return [(chunks[i], s) for i, s in select_top_k((x for x in scored if x[1] > 0), top_k)]
 
-    scored = []
-    for ch in chunks:
-        # Pre-process chunk text if not already lowercased (or assume it's small enough)
-        s = score_chunk_optimized(query_tokens, ch.text.lower())
-        if s > 0:
-            scored.append((ch, s))
-            
-    # Sort and return
-    scored.sort(key=lambda x: x[1], reverse=True)
-    return scored[:top_k]
\ No newline at end of file
+    # Shared stores (SQLiteStore) expose a lock so other sessions cannot mutate the index mid-query
+    with getattr(store, "lock", None) or nullcontext():
+        if mode == "sparse":
+            engine = get_sparse_engine(index) if store is not None else SparseScoringEngine(index)
+            ranked = engine.search(query_terms, top_k)
+        elif mode == "bm25":
+            ranked = score_bm25_maxscore(query_terms, index, top_k)
+        else:
+            # Slots grow with insertion order, so ties keep document order like the scan
+            ranked = select_top_k(score_keyword_postings(query_terms, index).items(), top_k)
+        return [(resolve(slot), s) for slot, s in ranked]
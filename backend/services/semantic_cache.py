@@ -0,0 +1,154 @@
+"""
+Semantic answer cache: reuses an answer when a new question is a close
+paraphrase of an earlier one asked over the same documents.
+
+Questions are embedded with the local HashingEmbedder and kept in a
+fixed-size float32 matrix (the flat vector index). A lookup is one
+matrix-vector product restricted to entries of the same scope; the best
+match is returned if its cosine similarity reaches the threshold. Memory is
+bounded by `max_entries` rows; when full, the least recently used entry is
+overwritten. Requires NumPy; without it the cache is disabled.
+"""
+from dataclasses import dataclass
+from itertools import count
+from typing import Dict, Iterable, List, Optional
+import hashlib
+import json
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+from backend.config import settings
+from backend.utils.embeddings import QUESTION_STOPWORDS, HashingEmbedder
+
+
+def document_scope(
+    doc_ids: Iterable[str],
+    model: str,
+    options: Dict[str, object],
+    system_prompt: str = "",
+    retrieval: Optional[Dict[str, object]] = None
+) -> str:
+    """
+    Identifies what an answer depends on besides the question: the set of
+    loaded documents (by id, i.e. content hash), the model, the generation
+    parameters, the system prompt and the retrieval settings that picked
+    the excerpts (e.g. top_k and ranking mode).
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in (
+        *sorted(set(doc_ids)), "", model, json.dumps(options, sort_keys=True), system_prompt,
+        json.dumps(retrieval or {}, sort_keys=True)
+    ):
+        hasher.update(part.encode("utf-8"))
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+@dataclass(frozen=True)
+class SemanticHit:
+    question: str                 # the earlier question that matched
+    similarity: float
+    result: Dict[str, object]     # answer dict as originally returned
+
+
+class SemanticCache:
+    """Bounded nearest-question cache; see the module docstring."""
+    def __init__(
+        self,
+        max_entries: int = settings.semantic_cache_entries,
+        threshold: float = settings.semantic_cache_threshold,
+        ttl_s: float = settings.answer_cache_ttl_s,
+        dim: int = settings.semantic_cache_dim
+    ) -> None:
+        self.max_entries = max_entries if np is not None else 0
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if not self.enabled:
+            return
+        self._embedder = HashingEmbedder(dim, stopwords=QUESTION_STOPWORDS, negation=True)
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._scopes = np.full(max_entries, -1, dtype=np.int64)    # row -> scope id (-1 = free)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._expires = np.zeros(max_entries, dtype=np.float64)
+        self._questions: List[Optional[str]] = [None] * max_entries
+        self._results: List[Optional[Dict[str, object]]] = [None] * max_entries
+        self._scope_ids: Dict[str, int] = {}
+        # Never reused: a pruned id may still be the last owner of evicted-but-unexpired rows
+        self._next_scope_id = count()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def lookup(self, question: str, scope: str) -> Optional[SemanticHit]:
+        """Returns the closest earlier question in `scope` at or above the threshold, if any."""
+        if not self.enabled:
+            return None
+        vector = self._embedder.embed(question)
+        now = time.time()
+        with self._lock:
+            scope_id = self._scope_ids.get(scope)
+            if scope_id is not None and vector.any():
+                candidates = np.flatnonzero((self._scopes == scope_id) & (self._expires > now))
+                if candidates.size:
+                    similarities = self._vectors[candidates] @ vector
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.threshold:
+                        row = int(candidates[best])
+                        self._last_used[row] = now
+                        self.hits += 1
+                        return SemanticHit(self._questions[row], float(similarities[best]), self._results[row])
+            self.misses += 1
+            return None
+
+    def add(self, question: str, scope: str, result: Dict[str, object]) -> None:
+        """Caches an answer dict for `question` in `scope`, evicting the LRU entry if full."""
+        if not self.enabled:
+            return
+        vector = self._embedder.embed(question)
+        if not vector.any():
+            return
+        now = time.time()
+        with self._lock:
+            scope_id = self._scope_ids.get(scope)
+            if scope_id is None:
+                scope_id = self._scope_ids[scope] = next(self._next_scope_id)
+            free = np.flatnonzero((self._scopes < 0) | (self._expires <= now))
+            row = int(free[0]) if free.size else int(np.argmin(self._last_used))
+            self._vectors[row] = vector
+            self._scopes[row] = scope_id
+            self._last_used[row] = now
+            self._expires[row] = now + self.ttl_s
+            self._questions[row] = question
+            self._results[row] = result
+            self._drop_unused_scopes()
+
+    def _drop_unused_scopes(self) -> None:
+        # Scope ids are only needed while some row uses them; keeps the map bounded too
+        if len(self._scope_ids) > self.max_entries:
+            live = set(self._scopes[self._scopes >= 0].tolist())
+            self._scope_ids = {s: i for s, i in self._scope_ids.items() if i in live}
+
+    def clear(self) -> None:
+        with self._lock:
+            if self.enabled:
+                self._scopes[:] = -1
+                self._questions = [None] * self.max_entries
+                self._results = [None] * self.max_entries
+                self._scope_ids.clear()
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            entries = int((self._scopes >= 0).sum()) if self.enabled else 0
+            return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+
+semantic_cache = SemanticCache()
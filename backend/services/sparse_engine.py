@@ -0,0 +1,89 @@
+"""
+Vectorized BM25 scoring over a CSR term-chunk matrix.
+
+Optional engine (requires NumPy). Rows are terms, columns are chunks, and each
+stored value is the precomputed BM25 weight of a term in a chunk, so scoring a
+query is a single sparse vector-matrix product followed by argpartition.
+"""
+from itertools import chain
+from typing import Dict, List, Tuple
+import weakref
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+from backend.config import settings
+from backend.storage.inverted_index import InvertedIndex
+
+
+class SparseScoringEngine:
+    """
+    Immutable CSR snapshot of an InvertedIndex.
+    
+    Built from the index in one pass; `version` records which index version it
+    reflects so callers can rebuild after documents are added or removed.
+    """
+    def __init__(self, index: InvertedIndex, k1: float = settings.bm25_k1, b: float = settings.bm25_b) -> None:
+        if np is None:
+            raise ImportError("The sparse retrieval engine requires NumPy. Install it with `pip install numpy`.")
+
+        self.version = index.version
+        terms = list(index.postings)
+        posting_lists = [index.postings[t] for t in terms]
+        self.term_rows: Dict[int, int] = {t: row for row, t in enumerate(terms)}
+
+        # Column j of the matrix is the j-th smallest slot
+        self.slots = np.fromiter(sorted(index.chunk_lengths), dtype=np.int64, count=len(index.chunk_lengths))
+        self.num_chunks = len(self.slots)
+
+        df = np.fromiter((len(p) for p in posting_lists), dtype=np.int64, count=len(posting_lists))
+        self.indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(df, out=self.indptr[1:])
+        nnz = int(self.indptr[-1])
+
+        posting_slots = np.fromiter(chain.from_iterable(p.keys() for p in posting_lists), dtype=np.int64, count=nnz)
+        tf = np.fromiter(chain.from_iterable(p.values() for p in posting_lists), dtype=np.float64, count=nnz)
+        self.indices = np.searchsorted(self.slots, posting_slots).astype(np.int32)
+
+        lengths = np.fromiter((index.chunk_lengths[s] for s in self.slots.tolist()), dtype=np.float64, count=self.num_chunks)
+        avg_len = index.avg_chunk_length() or 1.0
+        norm = k1 * (1.0 - b + b * lengths / avg_len)
+        idf = np.log1p((self.num_chunks - df + 0.5) / (df + 0.5))
+        self.data = (np.repeat(idf, df) * tf * (k1 + 1.0) / (tf + norm[self.indices])).astype(np.float32)
+
+    def search(self, query_terms: List[int], top_k: int) -> List[Tuple[int, float]]:
+        """
+        Scores every chunk against the query and returns the best top_k.
+        
+        Returns:
+            (slot, score) pairs, best first; ties keep slot order
+        """
+        rows = [self.term_rows[t] for t in dict.fromkeys(query_terms) if t in self.term_rows]
+        if not rows or top_k <= 0 or self.num_chunks == 0:
+            return []
+
+        spans = [slice(self.indptr[r], self.indptr[r + 1]) for r in rows]
+        cols = np.concatenate([self.indices[s] for s in spans])
+        weights = np.concatenate([self.data[s] for s in spans])
+        # q^T M with a 0/1 query vector: sum the selected rows into chunk columns
+        scores = np.bincount(cols, weights=weights, minlength=self.num_chunks)
+
+        k = min(top_k, self.num_chunks)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[scores[top] > 0]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [(int(self.slots[c]), float(scores[c])) for c in top]
+
+
+_engines: "weakref.WeakKeyDictionary[InvertedIndex, SparseScoringEngine]" = weakref.WeakKeyDictionary()
+
+
+def get_sparse_engine(index: InvertedIndex) -> SparseScoringEngine:
+    """Returns the cached CSR engine for an index, rebuilding it if the index changed."""
+    engine = _engines.get(index)
+    if engine is None or engine.version != index.version:
+        engine = SparseScoringEngine(index)
+        _engines[index] = engine
+    return engine
@@ -0,0 +1,190 @@
+"""
+Compact columnar chunk store backed by a single text arena.
+"""
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+import sys
+
+from backend.storage.in_memory_store import DocChunk
+from backend.storage.inverted_index import InvertedIndex
+from backend.storage.vector_index import create_vector_index, embed_chunk_texts
+
+
+def _encode_optional(value: Optional[int]) -> int:
+    return -1 if value is None else value
+
+
+def _decode_optional(value: int) -> Optional[int]:
+    return None if value < 0 else value
+
+
+class ColumnarStore:
+    """
+    Drop-in alternative to InMemoryStore for large libraries.
+    
+    All chunk text lives in one UTF-8 bytearray; per-chunk metadata is kept in
+    typed arrays (byte offset, index slot, chunk id, doc index, page range,
+    character offsets; -1 stands for None), so a chunk costs its text plus
+    48 bytes instead of a DocChunk object, its __dict__ and two more string
+    references. Doc names are interned once per document.
+    DocChunk views are built lazily on access and are not cached.
+    
+    A document's rows are contiguous; removing a document compacts the arena
+    and frees its doc table entry for the next document.
+    """
+    def __init__(self) -> None:
+        self.docs: Dict[str, str] = {}                  # doc_id -> doc_name
+        self.index = InvertedIndex()
+        self.vectors = create_vector_index()            # chunk embeddings (None = off)
+        self._arena = bytearray()                       # concatenated UTF-8 chunk text
+        self._starts = array('q')                       # row -> byte offset of its text
+        self._slots = array('q')                        # row -> index slot (increasing)
+        self._chunk_ids = array('i')                    # row -> chunk_id
+        self._doc_index = array('i')                    # row -> position in _doc_table
+        self._page_starts = array('i')                  # row -> first page (-1 = unknown)
+        self._page_ends = array('i')                    # row -> last page (-1 = unknown)
+        self._char_starts = array('q')                  # row -> start offset in document text (-1 = unknown)
+        self._char_ends = array('q')                    # row -> end offset in document text (-1 = unknown)
+        self._doc_table: List[Optional[Tuple[str, str]]] = []  # doc index -> (doc_id, doc_name)
+        self._free_doc_indexes: List[int] = []          # _doc_table entries of removed documents
+        self._doc_rows: Dict[str, Tuple[int, int]] = {}  # doc_id -> [first row, end row)
+
+    def upsert_doc(self, doc_id: str, doc_name: str, chunks: List[DocChunk], embeddings=None) -> None:
+        """Add or update a document with its chunks (and their embeddings, computed if omitted)."""
+        self.remove_doc(doc_id)
+        doc_id, doc_name = sys.intern(doc_id), sys.intern(doc_name)
+        if self._free_doc_indexes:
+            doc_idx = self._free_doc_indexes.pop()
+            self._doc_table[doc_idx] = (doc_id, doc_name)
+        else:
+            doc_idx = len(self._doc_table)
+            self._doc_table.append((doc_id, doc_name))
+        self.docs[doc_id] = doc_name
+
+        slots = self.index.add_doc(doc_id, (chunk.get_term_counts() for chunk in chunks))
+        first_row = len(self._starts)
+        for chunk, slot in zip(chunks, slots):
+            self._starts.append(len(self._arena))
+            self._arena += chunk.text.encode("utf-8")
+            self._slots.append(slot)
+            self._chunk_ids.append(chunk.chunk_id)
+            self._doc_index.append(doc_idx)
+            self._page_starts.append(_encode_optional(chunk.page_start))
+            self._page_ends.append(_encode_optional(chunk.page_end))
+            self._char_starts.append(_encode_optional(chunk.char_start))
+            self._char_ends.append(_encode_optional(chunk.char_end))
+        self._doc_rows[doc_id] = (first_row, len(self._starts))
+        if self.vectors is not None:
+            if embeddings is None:
+                embeddings = embed_chunk_texts(chunk.text for chunk in chunks)
+            self.vectors.add_doc(doc_id, slots, embeddings)
+
+    def list_docs(self) -> List[tuple]:
+        """List all documents as (doc_id, doc_name) tuples."""
+        return [(doc_id, name) for doc_id, name in self.docs.items()]
+
+    def get_chunks(self, doc_id: str) -> List[DocChunk]:
+        """Materialize all chunks for a specific document."""
+        first, end = self._doc_rows.get(doc_id, (0, 0))
+        return [self._materialize(row) for row in range(first, end)]
+
+    def remove_doc(self, doc_id: str) -> None:
+        """Remove a document and compact its text out of the arena."""
+        rows = self._doc_rows.pop(doc_id, None)
+        self.docs.pop(doc_id, None)
+        if rows is None:
+            return
+        self.index.remove_doc(doc_id)
+        if self.vectors is not None:
+            self.vectors.remove_doc(doc_id)
+
+        first, end = rows
+        byte_start = self._starts[first]
+        byte_end = self._row_end(end - 1)
+        removed = byte_end - byte_start
+        self._doc_table[self._doc_index[first]] = None
+        self._free_doc_indexes.append(self._doc_index[first])
+
+        del self._arena[byte_start:byte_end]
+        for column in self._columns():
+            del column[first:end]
+        for row in range(first, len(self._starts)):
+            self._starts[row] -= removed
+        num_rows = end - first
+        self._doc_rows = {
+            d: (a - num_rows, b - num_rows) if a >= end else (a, b)
+            for d, (a, b) in self._doc_rows.items()
+        }
+
+    def clear(self) -> None:
+        """Remove every document."""
+        self.__init__()
+
+    def chunk_at(self, slot: int) -> DocChunk:
+        """Resolve an index slot back to its chunk."""
+        row = bisect_left(self._slots, slot)
+        if row == len(self._slots) or self._slots[row] != slot:
+            raise KeyError(slot)
+        return self._materialize(row)
+
+    def _columns(self) -> Tuple[array, ...]:
+        return (
+            self._starts, self._slots, self._chunk_ids, self._doc_index,
+            self._page_starts, self._page_ends, self._char_starts, self._char_ends,
+        )
+
+    def _row_end(self, row: int) -> int:
+        return self._starts[row + 1] if row + 1 < len(self._starts) else len(self._arena)
+
+    def _materialize(self, row: int) -> DocChunk:
+        doc_id, doc_name = self._doc_table[self._doc_index[row]]
+        slot = self._slots[row]
+        return DocChunk(
+            doc_id=doc_id,
+            doc_name=doc_name,
+            chunk_id=self._chunk_ids[row],
+            text=self._arena[self._starts[row]:self._row_end(row)].decode("utf-8"),
+            page_start=_decode_optional(self._page_starts[row]),
+            page_end=_decode_optional(self._page_ends[row]),
+            char_start=_decode_optional(self._char_starts[row]),
+            char_end=_decode_optional(self._char_ends[row]),
+            term_counts=self.index.term_counts(slot),
+        )
+
+    def get_total_chunks(self) -> int:
+        """Get total number of chunks across all documents."""
+        return len(self._starts)
+
+    def get_memory_usage_mb(self) -> float:
+        """
+        Memory held by the store in MB: allocated arena, column and embedding
+        buffers (exact), plus the inverted index and the doc table (estimated
+        with sys.getsizeof, see InvertedIndex.memory_bytes).
+        """
+        total_bytes = self._arena.__alloc__() + self.index.memory_bytes()
+        if self.vectors is not None:
+            total_bytes += self.vectors.memory_bytes()
+        for column in self._columns():
+            total_bytes += column.buffer_info()[1] * column.itemsize
+        total_bytes += sys.getsizeof(self._doc_table)
+        for entry in self._doc_table:
+            if entry is not None:
+                total_bytes += sys.getsizeof(entry) + sys.getsizeof(entry[0]) + sys.getsizeof(entry[1])
+        return total_bytes / (1024 * 1024)
+
+    def get_statistics(self) -> Dict:
+        """Get storage statistics."""
+        return {
+            "total_docs": len(self.docs),
+            "total_chunks": self.get_total_chunks(),
+            "memory_mb": round(self.get_memory_usage_mb(), 2),
+            "docs": [
+                {
+                    "doc_id": doc_id,
+                    "doc_name": doc_name,
+                    "num_chunks": self._doc_rows[doc_id][1] - self._doc_rows[doc_id][0]
+                }
+                for doc_id, doc_name in self.docs.items()
+            ]
+        }
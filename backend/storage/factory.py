@@ -0,0 +1,36 @@
+from typing import Optional, Union
+import threading
+import weakref
+from backend.config import settings
+from backend.storage.in_memory_store import InMemoryStore
+from backend.storage.columnar_store import ColumnarStore
+from backend.storage.sqlite_store import SQLiteStore
+
+STORE_BACKENDS = ("memory", "columnar", "sqlite")
+
+# (path, owner) -> store; an entry lives as long as some session holds the store
+_sqlite_stores: "weakref.WeakValueDictionary" = weakref.WeakValueDictionary()
+_sqlite_lock = threading.Lock()
+
+def create_store(backend: Optional[str] = None, owner: str = "") -> Union[InMemoryStore, ColumnarStore, SQLiteStore]:
+    """
+    Builds an empty document store. All backends share the InMemoryStore interface.
+    `backend` is one of STORE_BACKENDS and defaults to settings.store_backend.
+    The sqlite backend is persistent and holds one library per `owner`:
+    every call with the same owner returns the same instance (documents
+    included), and owners never see each other's documents. The memory
+    backends are private to the caller, so `owner` is ignored.
+    """
+    backend = backend or settings.store_backend
+    if backend == "memory":
+        return InMemoryStore()
+    if backend == "columnar":
+        return ColumnarStore()
+    if backend == "sqlite":
+        with _sqlite_lock:
+            key = (settings.store_path, owner)
+            store = _sqlite_stores.get(key)
+            if store is None:
+                store = _sqlite_stores[key] = SQLiteStore(settings.store_path, owner=owner)
+            return store
+    raise ValueError(f"Unknown store backend '{backend}'. Expected one of: {', '.join(STORE_BACKENDS)}")
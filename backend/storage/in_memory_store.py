@@ -1,7 +1,11 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 import sys
 
+from backend.storage.inverted_index import InvertedIndex
+from backend.storage.vector_index import create_vector_index, embed_chunk_texts
+from backend.utils.tokenizer import encode_terms, vocabulary
+
 
 @dataclass
 class DocChunk:
@@ -9,21 +13,61 @@ class DocChunk:
     doc_name: str
     chunk_id: int
     text: str
+    # Provenance: 1-based page range (PDFs only) and [start, end) character
+    # offsets into the extracted document text; None when unknown
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    char_start: Optional[int] = None
+    char_end: Optional[int] = None
+    # {term id: count}, normally computed once at ingest via encode_terms
+    term_counts: Optional[Dict[int, int]] = field(default=None, repr=False, compare=False)
+
+    def get_term_counts(self) -> Dict[int, int]:
+        """Returns the tokenized form of the chunk, computing it on first use."""
+        if self.term_counts is None:
+            self.term_counts = encode_terms(self.text)
+            vocabulary.release_with(self, [self.term_counts])
+        return self.term_counts
+
+    def page_label(self) -> Optional[str]:
+        """Human-readable page reference such as "p. 4" or "pp. 4-5", if known."""
+        if self.page_start is None:
+            return None
+        if self.page_end is None or self.page_end == self.page_start:
+            return f"p. {self.page_start}"
+        return f"pp. {self.page_start}-{self.page_end}"
 
 
 class InMemoryStore:
     """
     Stores documents and chunks in memory (per Streamlit session).
     Enhanced with memory tracking and statistics.
+    Maintains an inverted index so retrieval only touches matching chunks,
+    and a matrix of chunk embeddings (`vectors`, None when embeddings are
+    off) for dense retrieval.
     """
     def __init__(self) -> None:
         self.docs: Dict[str, str] = {}          # doc_id -> doc_name
         self.chunks: Dict[str, List[DocChunk]] = {}  # doc_id -> list of chunks
+        self.index = InvertedIndex()
+        self.vectors = create_vector_index()
+        self._slot_chunks: Dict[int, DocChunk] = {}  # index slot -> chunk
 
-    def upsert_doc(self, doc_id: str, doc_name: str, chunks: List[DocChunk]) -> None:
-        """Add or update a document with its chunks."""
+    def upsert_doc(self, doc_id: str, doc_name: str, chunks: List[DocChunk], embeddings=None) -> None:
+        """
+        Add or update a document with its chunks.
+        `embeddings` are the chunks' precomputed vectors (see ingest_service);
+        they are computed here when omitted.
+        """
+        self._unindex(doc_id)
         self.docs[doc_id] = doc_name
         self.chunks[doc_id] = chunks
+        slots = self.index.add_doc(doc_id, (chunk.get_term_counts() for chunk in chunks))
+        self._slot_chunks.update(zip(slots, chunks))
+        if self.vectors is not None:
+            if embeddings is None:
+                embeddings = embed_chunk_texts(chunk.text for chunk in chunks)
+            self.vectors.add_doc(doc_id, slots, embeddings)
 
     def list_docs(self) -> List[tuple]:
         """List all documents as (doc_id, doc_name) tuples."""
@@ -35,8 +79,24 @@ class InMemoryStore:
 
     def remove_doc(self, doc_id: str) -> None:
         """Remove a document and its chunks."""
+        self._unindex(doc_id)
         self.docs.pop(doc_id, None)
         self.chunks.pop(doc_id, None)
+
+    def clear(self) -> None:
+        """Remove every document."""
+        self.__init__()
+
+    def _unindex(self, doc_id: str) -> None:
+        """Drop a document's chunks from the inverted index and the vectors."""
+        for slot in self.index.remove_doc(doc_id):
+            self._slot_chunks.pop(slot, None)
+        if self.vectors is not None:
+            self.vectors.remove_doc(doc_id)
+
+    def chunk_at(self, slot: int) -> DocChunk:
+        """Resolve an index slot back to its chunk."""
+        return self._slot_chunks[slot]
     
     def get_total_chunks(self) -> int:
         """Get total number of chunks across all documents."""
@@ -45,13 +105,16 @@ class InMemoryStore:
     def get_memory_usage_mb(self) -> float:
         """
         Estimate memory usage of stored documents in MB.
-        This is an approximation based on text size.
+        This is an approximation based on text size, plus the inverted
+        index and embeddings.
         """
-        total_bytes = 0
+        total_bytes = self.index.memory_bytes()
         for chunks in self.chunks.values():
             for chunk in chunks:
                 # Estimate size of chunk text
                 total_bytes += sys.getsizeof(chunk.text)
+        if self.vectors is not None:
+            total_bytes += self.vectors.memory_bytes()
         return total_bytes / (1024 * 1024)
     
     def get_statistics(self) -> Dict:
@@ -0,0 +1,147 @@
+"""
+Inverted index over document chunks for sub-linear keyword retrieval.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import sys
+import weakref
+
+from backend.utils.tokenizer import vocabulary
+
+
+class InvertedIndex:
+    """
+    Maps every term id to the chunks that contain it (term -> posting list).
+    
+    Chunks are addressed by integer slots handed out on insertion. The owning
+    store keeps the slot -> DocChunk mapping, so the index itself never holds
+    chunk text. Corpus statistics used by BM25 (document frequencies, chunk
+    lengths, total length) are maintained incrementally on add/remove, as are
+    per-term (max tf, min chunk length) pairs from which score upper bounds
+    for early termination are derived. Bounds are not tightened on removal;
+    a stale bound is looser but still a valid upper bound.
+    
+    The index holds one vocabulary reference per term it has postings for,
+    taken when the posting list is created and dropped when it empties (or
+    when the index is garbage collected).
+    """
+    def __init__(self) -> None:
+        self.postings: Dict[int, Dict[int, int]] = {}     # term id -> {slot: term frequency}
+        self.doc_slots: Dict[str, List[int]] = {}         # doc_id -> slots of its chunks
+        self._slot_terms: Dict[int, Dict[int, int]] = {}  # slot -> chunk term counts (for removal)
+        self.chunk_lengths: Dict[int, int] = {}           # slot -> number of terms
+        self.term_bounds: Dict[int, Tuple[int, int]] = {}  # term id -> (max tf, min chunk length)
+        self.total_length = 0
+        self.version = 0  # bumped on every mutation so derived structures can detect staleness
+        self._next_slot = 0
+        weakref.finalize(self, vocabulary.release, self.postings)
+
+    def add_doc(
+        self,
+        doc_id: str,
+        chunk_terms: Iterable[Dict[int, int]],
+        slots: Optional[Iterable[int]] = None
+    ) -> List[int]:
+        """
+        Indexes the chunks of a document, replacing any previous version.
+        
+        Args:
+            doc_id: Document identifier
+            chunk_terms: Per-chunk {term id: count} maps (see encode_terms), in chunk order
+            slots: Explicit slots to reuse (e.g. when reloading a persisted index);
+                new slots are allocated when omitted
+            
+        Returns:
+            Slots assigned to the chunks, in the same order as `chunk_terms`
+        """
+        if doc_id in self.doc_slots:
+            self.remove_doc(doc_id)
+
+        slot_iter = iter(slots) if slots is not None else None
+        assigned: List[int] = []
+        new_terms: List[int] = []
+        for term_counts in chunk_terms:
+            if slot_iter is None:
+                slot = self._next_slot
+            else:
+                slot = next(slot_iter)
+            self._next_slot = max(self._next_slot, slot + 1)
+
+            length = sum(term_counts.values())
+            for term, tf in term_counts.items():
+                bound = self.term_bounds.get(term)
+                if bound is None:
+                    self.postings[term] = {slot: tf}
+                    new_terms.append(term)
+                    self.term_bounds[term] = (tf, length)
+                    continue
+                self.postings[term][slot] = tf
+                if tf > bound[0] or length < bound[1]:
+                    self.term_bounds[term] = (max(tf, bound[0]), min(length, bound[1]))
+            self._slot_terms[slot] = term_counts
+            self.chunk_lengths[slot] = length
+            self.total_length += length
+            assigned.append(slot)
+
+        vocabulary.acquire(new_terms)
+        self.doc_slots[doc_id] = assigned
+        self.version += 1
+        return assigned
+
+    def remove_doc(self, doc_id: str) -> List[int]:
+        """
+        Drops a document's chunks from every posting list they appear in.
+        
+        Returns:
+            Slots that were released
+        """
+        slots = self.doc_slots.pop(doc_id, [])
+        dropped_terms: List[int] = []
+        for slot in slots:
+            self.total_length -= self.chunk_lengths.pop(slot, 0)
+            for term in self._slot_terms.pop(slot, ()):
+                posting = self.postings.get(term)
+                if posting is None:
+                    continue
+                posting.pop(slot, None)
+                if not posting:
+                    del self.postings[term]
+                    del self.term_bounds[term]
+                    dropped_terms.append(term)
+        vocabulary.release(dropped_terms)
+        if slots:
+            self.version += 1
+        return slots
+
+    def get_postings(self, term: int) -> Dict[int, int]:
+        """Returns {slot: term frequency} for a term id (empty if unseen)."""
+        return self.postings.get(term, {})
+
+    def term_counts(self, slot: int) -> Dict[int, int]:
+        """Returns the {term id: count} map a slot was indexed with."""
+        return self._slot_terms[slot]
+
+    def doc_freq(self, term: int) -> int:
+        """Number of chunks containing the term."""
+        return len(self.postings.get(term, ()))
+
+    def avg_chunk_length(self) -> float:
+        """Average chunk length in terms (0.0 for an empty index)."""
+        n = len(self.chunk_lengths)
+        return self.total_length / n if n else 0.0
+
+    def memory_bytes(self) -> int:
+        """
+        Approximate bytes held by the index: every posting list, per-chunk
+        term-count map, bound and slot list, measured shallowly with
+        sys.getsizeof. Term ids, counts and slots are ints, mostly small ones
+        shared by the interpreter, and are not counted.
+        """
+        size = sys.getsizeof
+        tables = (self.postings, self._slot_terms, self.chunk_lengths, self.term_bounds, self.doc_slots)
+        total = sum(map(size, tables))
+        for table in (self.postings, self._slot_terms, self.term_bounds, self.doc_slots):
+            total += sum(map(size, table.values()))
+        return total
+
+    def __len__(self) -> int:
+        return len(self._slot_terms)
@@ -0,0 +1,260 @@
+"""
+Approximate nearest-neighbour search over chunk embeddings with an
+inverted-file (IVF) index, for corpora where an exact scan is too slow.
+"""
+from array import array
+from typing import Dict, List, Optional, Tuple
+import math
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+from backend.config import settings
+from backend.storage.vector_index import _doc_table, save_arrays, select_top_k_scores
+
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64     # Training sample size per cluster
+ASSIGN_BLOCK_ROWS = 16384       # Rows per matrix product when assigning clusters
+RETRAIN_GROWTH = 4              # Retrain once the index is this many times its training size
+
+
+class IVFVectorIndex:
+    """
+    Same interface as FlatVectorIndex, searched approximately.
+
+    Vectors are clustered with spherical k-means; each cluster keeps the rows
+    assigned to it (its inverted list). A query is compared with the
+    centroids, and only the rows of the `nprobe` closest clusters are scored
+    exactly, so a query costs about nlist + chunks x nprobe / nlist dot
+    products instead of one per chunk. Raising nprobe trades latency for
+    recall; nprobe = nlist is an exact search.
+
+    Built incrementally: new rows join the nearest existing cluster. Until
+    `train_min` vectors are indexed the search is exact; the clusters are
+    (re)trained once, and again whenever the index has grown RETRAIN_GROWTH
+    times past its last training size. Removing a document only tombstones
+    its rows; they are compacted away once they outnumber the live rows.
+    """
+    kind = "ivf"
+    approximate = False    # Scores are exact; only the candidate rows are approximate
+
+    def __init__(
+        self,
+        dim: int = settings.embedding_dim,
+        nlist: int = settings.ivf_nlist,
+        nprobe: int = settings.ivf_nprobe,
+        train_min: int = settings.ivf_train_min,
+        seed: int = 0
+    ) -> None:
+        if np is None:
+            raise ImportError("Dense retrieval requires NumPy. Install it with `pip install numpy`.")
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_min = train_min
+        self.seed = seed
+        self._vectors = np.zeros((0, dim), dtype=np.float32)   # rows [0, _size) are used
+        self._slots = np.zeros(0, dtype=np.int64)             # row -> index slot
+        self._alive = np.zeros(0, dtype=bool)                 # row -> not tombstoned
+        self._assign = np.zeros(0, dtype=np.int32)            # row -> cluster (-1 = untrained)
+        self._size = 0
+        self._live = 0
+        self._doc_rows: Dict[str, Tuple[int, int]] = {}       # doc_id -> [first row, end row)
+        self.centroids: Optional["np.ndarray"] = None          # (nlist, dim), unit norm
+        self._lists: List[array] = []                         # cluster -> rows ('q')
+        self._trained_size = 0
+        self.version = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    @property
+    def slots(self) -> "np.ndarray":
+        """Slots of the live rows, in row order."""
+        return self._slots[:self._size][self._alive[:self._size]]
+
+    @property
+    def vectors(self) -> "np.ndarray":
+        """Live rows of the matrix (a copy when rows are tombstoned)."""
+        return self._vectors[:self._size][self._alive[:self._size]]
+
+    def add_doc(self, doc_id: str, slots: List[int], vectors: "np.ndarray") -> None:
+        """Adds (or replaces) a document's chunk embeddings; see FlatVectorIndex.add_doc."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(slots), self.dim):
+            raise ValueError(f"Expected embeddings of shape ({len(slots)}, {self.dim}), got {vectors.shape}")
+        self.remove_doc(doc_id)
+
+        first, end = self._size, self._size + len(slots)
+        if end > len(self._vectors):
+            self._grow(max(end, 2 * len(self._vectors), 64))
+        self._vectors[first:end] = vectors
+        self._slots[first:end] = slots
+        self._alive[first:end] = True
+        self._size = end
+        self._live += len(slots)
+        self._doc_rows[doc_id] = (first, end)
+
+        if self.centroids is not None and (self._live < RETRAIN_GROWTH * self._trained_size):
+            self._assign_rows(first, end)
+        elif self._live >= self.train_min:
+            self._train()
+        else:
+            self._assign[first:end] = -1
+        self.version += 1
+
+    def remove_doc(self, doc_id: str) -> None:
+        """Tombstones a document's rows, compacting once most rows are dead."""
+        rows = self._doc_rows.pop(doc_id, None)
+        if rows is None:
+            return
+        first, end = rows
+        self._alive[first:end] = False
+        self._live -= end - first
+        if self._size - self._live > max(self._live, 1024):
+            self._compact()
+        self.version += 1
+
+    def search(self, query: "np.ndarray", top_k: int, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Approximate cosine top_k for a unit-norm query vector.
+
+        Args:
+            query: Query embedding
+            top_k: Number of results
+            nprobe: Clusters to scan (defaults to self.nprobe)
+
+        Returns:
+            (slot, similarity) pairs, best first, as FlatVectorIndex.search
+        """
+        if top_k <= 0 or self._live == 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        if self.centroids is None:
+            rows = np.flatnonzero(self._alive[:self._size])
+        else:
+            nprobe = min(nprobe or self.nprobe, len(self.centroids))
+            probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            rows = np.concatenate([np.frombuffer(self._lists[c], dtype=np.int64) for c in probe.tolist()])
+            rows = rows[self._alive[rows]]
+        return select_top_k_scores(self._vectors[rows] @ query, self._slots[rows], top_k)
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the row arrays, centroids and inverted lists."""
+        total = self._vectors.nbytes + self._slots.nbytes + self._alive.nbytes + self._assign.nbytes
+        if self.centroids is not None:
+            total += self.centroids.nbytes
+        return total + sum(len(rows) * rows.itemsize for rows in self._lists)
+
+    def _grow(self, capacity: int) -> None:
+        def grown(column, shape):
+            new = np.zeros(shape, dtype=column.dtype)
+            new[:self._size] = column[:self._size]
+            return new
+        self._vectors = grown(self._vectors, (capacity, self.dim))
+        self._slots = grown(self._slots, capacity)
+        self._alive = grown(self._alive, capacity)
+        self._assign = grown(self._assign, capacity)
+
+    def _nearest_centroids(self, vectors: "np.ndarray") -> "np.ndarray":
+        assign = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+            block = vectors[start:start + ASSIGN_BLOCK_ROWS]
+            assign[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return assign
+
+    def _assign_rows(self, first: int, end: int) -> None:
+        assign = self._nearest_centroids(self._vectors[first:end])
+        self._assign[first:end] = assign
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(self.centroids) + 1))
+        rows = np.arange(first, end, dtype=np.int64)[order]
+        for c in np.flatnonzero(np.diff(bounds)).tolist():
+            self._lists[c].extend(rows[bounds[c]:bounds[c + 1]].tolist())
+
+    def _train(self) -> None:
+        """Spherical k-means on a sample of live rows, then reassigns every row."""
+        live_rows = np.flatnonzero(self._alive[:self._size])
+        nlist = self.nlist or max(1, int(4 * math.sqrt(len(live_rows))))
+        nlist = min(nlist, len(live_rows))
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(live_rows), nlist * KMEANS_SAMPLE_PER_LIST)
+        sample = self._vectors[np.sort(rng.choice(live_rows, sample_size, replace=False))]
+
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            self.centroids = centroids
+            assign = self._nearest_centroids(sample)
+            order = np.argsort(assign, kind="stable")
+            counts = np.bincount(assign, minlength=nlist)
+            nonempty = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            centroids = centroids.copy()
+            centroids[nonempty] = sums / np.maximum(norms, 1e-12)
+
+        self.centroids = centroids.astype(np.float32)
+        self._lists = [array('q') for _ in range(nlist)]
+        self._assign[:self._size] = -1
+        self._assign_rows(0, self._size)
+        self._trained_size = len(live_rows)
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self._alive[:self._size])
+        new_row = np.full(self._size, -1, dtype=np.int64)
+        new_row[keep] = np.arange(len(keep))
+        self._vectors = self._vectors[keep]
+        self._slots = self._slots[keep]
+        self._alive = self._alive[keep]
+        self._assign = self._assign[keep]
+        self._size = self._live = len(keep)
+        # Every live document's rows stay contiguous, only shifted
+        self._doc_rows = {
+            d: (int(new_row[a]), int(new_row[a]) + (b - a)) for d, (a, b) in self._doc_rows.items()
+        }
+        if self.centroids is not None:
+            self._rebuild_lists()
+
+    def _rebuild_lists(self) -> None:
+        assign = self._assign[:self._size]
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(self.centroids) + 1))
+        self._lists = [array('q', order[bounds[c]:bounds[c + 1]].tolist()) for c in range(len(self.centroids))]
+
+    def save(self, path: str) -> None:
+        """Serializes the index (compacted, clusters included) to an .npz file."""
+        if self._live < self._size:
+            self._compact()
+        centroids = self.centroids if self.centroids is not None else np.zeros((0, self.dim), dtype=np.float32)
+        save_arrays(
+            path,
+            kind=np.array("ivf"),
+            vectors=self._vectors[:self._size],
+            slots=self._slots[:self._size],
+            assign=self._assign[:self._size],
+            centroids=centroids,
+            params=np.array([self.nlist, self.nprobe, self.train_min, self.seed, self._trained_size], dtype=np.int64),
+            **_doc_table(self._doc_rows)
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "IVFVectorIndex":
+        nlist, nprobe, train_min, seed, trained_size = (int(x) for x in arrays["params"])
+        index = cls(arrays["vectors"].shape[1], nlist=nlist, nprobe=nprobe, train_min=train_min, seed=seed)
+        index._vectors = np.array(arrays["vectors"], dtype=np.float32)
+        index._slots = np.array(arrays["slots"], dtype=np.int64)
+        index._assign = np.array(arrays["assign"], dtype=np.int32)
+        index._size = index._live = len(index._slots)
+        index._alive = np.ones(index._size, dtype=bool)
+        index._doc_rows = {
+            str(d): (int(a), int(b)) for d, (a, b) in zip(arrays["doc_ids"], arrays["doc_bounds"])
+        }
+        if len(arrays["centroids"]):
+            index.centroids = np.array(arrays["centroids"], dtype=np.float32)
+            index._trained_size = trained_size
+            index._rebuild_lists()
+        return index
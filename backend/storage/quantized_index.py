@@ -0,0 +1,258 @@
+"""
+Compressed chunk embeddings: int8 scalar quantization or product
+quantization (PQ), searched with approximate scores and meant to be
+re-ranked exactly (see retrieval_service.retrieve_dense).
+"""
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+from backend.config import settings
+from backend.storage.vector_index import _doc_table, save_arrays, select_top_k_scores
+
+QUANTIZATION_METHODS = ("int8", "pq")
+PQ_CENTROIDS = 256              # One uint8 code per subspace
+PQ_KMEANS_ITERATIONS = 12
+PQ_TRAIN_SAMPLE = 8192          # Rows used to train the codebooks
+SCAN_BLOCK_ROWS = 4096          # Rows decoded per block when scanning
+
+
+class QuantizedVectorIndex:
+    """
+    Same interface as FlatVectorIndex, storing codes instead of float32.
+
+    "int8": each vector is scaled by its largest component and rounded to
+    int8 (dim + 4 bytes, about 4x smaller). Scores are exact up to rounding.
+
+    "pq": the vector is split into `subspaces` equal parts and each part is
+    replaced by the id of its nearest of 256 k-means centroids (one byte per
+    subspace, e.g. 128 bytes instead of 2 KB for 512-d: 16x). A query is
+    scored by asymmetric distance computation: the query's dot product with
+    every centroid is tabulated once (subspaces x 256), and a row's score is
+    the sum of its codes' table entries. The codebooks are trained once
+    `train_min` vectors are indexed; until then rows are kept as int8.
+
+    Scores are approximate, so callers fetch extra candidates and re-rank
+    them with exact vectors (`approximate` is True). Codes are stored
+    subspace-major, so each table lookup reads one contiguous column.
+    Rows of a document are contiguous; removing a document compacts the
+    rows behind it.
+    """
+    approximate = True
+
+    def __init__(
+        self,
+        dim: int = settings.embedding_dim,
+        method: str = "pq",
+        subspaces: int = settings.pq_subspaces,
+        train_min: int = settings.pq_train_min,
+        seed: int = 0
+    ) -> None:
+        if np is None:
+            raise ImportError("Dense retrieval requires NumPy. Install it with `pip install numpy`.")
+        if method not in QUANTIZATION_METHODS:
+            raise ValueError(f"Unknown quantization '{method}'. Expected one of: {', '.join(QUANTIZATION_METHODS)}")
+        if method == "pq" and (subspaces <= 0 or dim % subspaces):
+            raise ValueError(f"PQ subspaces ({subspaces}) must divide the embedding size ({dim})")
+        self.dim = dim
+        self.kind = method
+        self.subspaces = subspaces
+        self.train_min = max(train_min, PQ_CENTROIDS)
+        self.seed = seed
+        self._int8 = np.zeros((0, dim), dtype=np.int8)        # row -> int8 code (until PQ is trained)
+        self._scales = np.zeros(0, dtype=np.float32)          # row -> int8 scale
+        self._pq = None                                       # (subspaces, capacity) uint8 once trained
+        self.codebooks = None                                 # (subspaces, 256, dim // subspaces)
+        self._slots = np.zeros(0, dtype=np.int64)             # row -> index slot
+        self._size = 0
+        self._doc_rows: Dict[str, Tuple[int, int]] = {}       # doc_id -> [first row, end row)
+        self.version = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def slots(self) -> "np.ndarray":
+        """Slot of each live row (a view; do not mutate)."""
+        return self._slots[:self._size]
+
+    @property
+    def trained(self) -> bool:
+        return self._pq is not None
+
+    def add_doc(self, doc_id: str, slots: List[int], vectors: "np.ndarray") -> None:
+        """Adds (or replaces) a document's chunk embeddings; see FlatVectorIndex.add_doc."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(slots), self.dim):
+            raise ValueError(f"Expected embeddings of shape ({len(slots)}, {self.dim}), got {vectors.shape}")
+        self.remove_doc(doc_id)
+
+        first, end = self._size, self._size + len(slots)
+        if end > len(self._slots):
+            self._grow(max(end, 2 * len(self._slots), 64))
+        self._slots[first:end] = slots
+        if self.trained:
+            self._pq[:, first:end] = self._encode_pq(vectors)
+        else:
+            self._int8[first:end], self._scales[first:end] = self._encode_int8(vectors)
+        self._size = end
+        self._doc_rows[doc_id] = (first, end)
+        if self.kind == "pq" and not self.trained and self._size >= self.train_min:
+            self._train_pq()
+        self.version += 1
+
+    def remove_doc(self, doc_id: str) -> None:
+        """Drops a document's rows, shifting later rows down."""
+        rows = self._doc_rows.pop(doc_id, None)
+        if rows is None:
+            return
+        first, end = rows
+        removed, size = end - first, self._size
+        self._slots[first:size - removed] = self._slots[end:size]
+        if self.trained:
+            self._pq[:, first:size - removed] = self._pq[:, end:size]
+        else:
+            self._int8[first:size - removed] = self._int8[end:size]
+            self._scales[first:size - removed] = self._scales[end:size]
+        self._size -= removed
+        self._doc_rows = {
+            d: (a - removed, b - removed) if a >= end else (a, b)
+            for d, (a, b) in self._doc_rows.items()
+        }
+        self.version += 1
+
+    def search(self, query: "np.ndarray", top_k: int) -> List[Tuple[int, float]]:
+        """
+        Approximate cosine top_k for a unit-norm query vector.
+
+        Returns:
+            (slot, approximate similarity) pairs, best first, as FlatVectorIndex.search
+        """
+        if top_k <= 0 or self._size == 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        scores = self._scores_pq(query) if self.trained else self._scores_int8(query)
+        return select_top_k_scores(scores, self.slots, top_k)
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the codes, scales, codebooks and slot array."""
+        total = self._int8.nbytes + self._scales.nbytes + self._slots.nbytes
+        if self.trained:
+            total += self._pq.nbytes + self.codebooks.nbytes
+        return total
+
+    def _grow(self, capacity: int) -> None:
+        def grown(column, shape):
+            new = np.zeros(shape, dtype=column.dtype)
+            new[..., :self._size] = column[..., :self._size]
+            return new
+        self._slots = grown(self._slots, capacity)
+        if self.trained:
+            self._pq = grown(self._pq, (self.subspaces, capacity))
+        else:
+            new = np.zeros((capacity, self.dim), dtype=np.int8)
+            new[:self._size] = self._int8[:self._size]
+            self._int8 = new
+            self._scales = grown(self._scales, capacity)
+
+    @staticmethod
+    def _encode_int8(vectors: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.rint(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+    def _decode_int8(self, start: int, end: int) -> "np.ndarray":
+        return self._int8[start:end].astype(np.float32) * self._scales[start:end, None]
+
+    def _scores_int8(self, query: "np.ndarray") -> "np.ndarray":
+        # Blocks are widened into one cache-sized float32 buffer so the product stays in BLAS
+        scores = np.empty(self._size, dtype=np.float32)
+        buffer = np.empty((min(SCAN_BLOCK_ROWS, self._size), self.dim), dtype=np.float32)
+        for start in range(0, self._size, SCAN_BLOCK_ROWS):
+            end = min(start + SCAN_BLOCK_ROWS, self._size)
+            block = buffer[:end - start]
+            np.copyto(block, self._int8[start:end], casting="unsafe")
+            np.matmul(block, query, out=scores[start:end])
+        scores *= self._scales[:self._size]
+        return scores
+
+    def _split(self, vectors: "np.ndarray") -> "np.ndarray":
+        """(n, dim) -> (subspaces, n, dim // subspaces)"""
+        return vectors.reshape(len(vectors), self.subspaces, -1).transpose(1, 0, 2)
+
+    def _encode_pq(self, vectors: "np.ndarray") -> "np.ndarray":
+        codes = np.empty((self.subspaces, len(vectors)), dtype=np.uint8)
+        half_norms = 0.5 * np.einsum("mkd,mkd->mk", self.codebooks, self.codebooks)
+        for j, part in enumerate(self._split(vectors)):
+            # argmin ||x - c||^2 == argmax (x.c - ||c||^2 / 2)
+            codes[j] = np.argmax(part @ self.codebooks[j].T - half_norms[j], axis=1)
+        return codes
+
+    def _scores_pq(self, query: "np.ndarray") -> "np.ndarray":
+        # Asymmetric distance computation: the query stays exact, rows are codes
+        table = np.einsum("mkd,md->mk", self.codebooks, query.reshape(self.subspaces, -1))
+        scores = np.zeros(self._size, dtype=np.float32)
+        for j in range(self.subspaces):
+            scores += table[j].take(self._pq[j, :self._size])
+        return scores
+
+    def _train_pq(self) -> None:
+        """k-means per subspace on a sample of the (int8) rows, then re-encodes every row."""
+        rng = np.random.default_rng(self.seed)
+        sample_rows = np.sort(rng.choice(self._size, min(self._size, PQ_TRAIN_SAMPLE), replace=False))
+        sample = self._split(self._int8[sample_rows].astype(np.float32) * self._scales[sample_rows, None])
+        k = min(PQ_CENTROIDS, len(sample_rows))
+        codebooks = np.zeros((self.subspaces, PQ_CENTROIDS, self.dim // self.subspaces), dtype=np.float32)
+        for j, part in enumerate(sample):
+            centroids = part[rng.choice(len(part), k, replace=False)].copy()
+            for _ in range(PQ_KMEANS_ITERATIONS):
+                assign = np.argmax(part @ centroids.T - 0.5 * (centroids * centroids).sum(axis=1), axis=1)
+                counts = np.bincount(assign, minlength=k)
+                nonempty = counts > 0
+                for d in range(part.shape[1]):
+                    sums = np.bincount(assign, weights=part[:, d], minlength=k)
+                    centroids[nonempty, d] = sums[nonempty] / counts[nonempty]
+            codebooks[j, :k] = centroids
+        self.codebooks = codebooks
+
+        codes = np.zeros((self.subspaces, len(self._slots)), dtype=np.uint8)
+        for start in range(0, self._size, SCAN_BLOCK_ROWS):
+            end = min(start + SCAN_BLOCK_ROWS, self._size)
+            codes[:, start:end] = self._encode_pq(self._decode_int8(start, end))
+        self._pq = codes
+        self._int8 = np.zeros((0, self.dim), dtype=np.int8)
+        self._scales = np.zeros(0, dtype=np.float32)
+
+    def save(self, path: str) -> None:
+        """Serializes the codes (and codebooks) to an .npz file (see load_vector_index)."""
+        arrays = {
+            "kind": np.array(self.kind),
+            "slots": self.slots,
+            "params": np.array([self.dim, self.subspaces, self.train_min, self.seed], dtype=np.int64),
+            **_doc_table(self._doc_rows),
+        }
+        if self.trained:
+            arrays.update(pq=self._pq[:, :self._size], codebooks=self.codebooks)
+        else:
+            arrays.update(int8=self._int8[:self._size], scales=self._scales[:self._size])
+        save_arrays(path, **arrays)
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "QuantizedVectorIndex":
+        dim, subspaces, train_min, seed = (int(x) for x in arrays["params"])
+        index = cls(dim, method=str(arrays["kind"]), subspaces=subspaces, train_min=train_min, seed=seed)
+        index._slots = np.array(arrays["slots"], dtype=np.int64)
+        index._size = len(index._slots)
+        if "pq" in arrays.files:
+            index._pq = np.array(arrays["pq"], dtype=np.uint8)
+            index.codebooks = np.array(arrays["codebooks"], dtype=np.float32)
+        else:
+            index._int8 = np.array(arrays["int8"], dtype=np.int8)
+            index._scales = np.array(arrays["scales"], dtype=np.float32)
+        index._doc_rows = {
+            str(d): (int(a), int(b)) for d, (a, b) in zip(arrays["doc_ids"], arrays["doc_bounds"])
+        }
+        return index
@@ -0,0 +1,406 @@
+"""
+Persistent document store on a local SQLite file with memory-mapped reads.
+"""
+from typing import Dict, List, Optional
+import hashlib
+import os
+import sqlite3
+import threading
+
+from backend.config import settings
+from backend.storage.in_memory_store import DocChunk
+from backend.storage.inverted_index import InvertedIndex
+from backend.storage.vector_index import (
+    FlatVectorIndex, create_vector_index, embed_chunk_texts, load_vector_index
+)
+from backend.utils.tokenizer import vocabulary
+
+_DOCS_TABLE = """
+CREATE TABLE IF NOT EXISTS docs (
+    owner    TEXT NOT NULL DEFAULT '',
+    doc_id   TEXT NOT NULL,
+    doc_name TEXT NOT NULL,
+    seq      INTEGER NOT NULL,
+    PRIMARY KEY (owner, doc_id)
+)"""
+_SCHEMA = _DOCS_TABLE + """;
+CREATE TABLE IF NOT EXISTS chunks (
+    slot     INTEGER PRIMARY KEY,
+    doc_id   TEXT NOT NULL,
+    chunk_id INTEGER NOT NULL,
+    text     TEXT NOT NULL,
+    page_start INTEGER,
+    page_end   INTEGER,
+    char_start INTEGER,
+    char_end   INTEGER,
+    owner    TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    tf   INTEGER NOT NULL,
+    PRIMARY KEY (term, slot)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_slot ON postings (slot);
+CREATE TABLE IF NOT EXISTS owners (
+    owner      TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS vector_files (
+    name       TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL
+);
+"""
+# Created after _migrate, since older files lack the owner column
+_OWNER_INDEX = "CREATE INDEX IF NOT EXISTS chunks_owner ON chunks (owner, doc_id, chunk_id)"
+
+# Columns added after the first release; older files gain them on open
+_CHUNK_PROVENANCE_COLUMNS = ("page_start", "page_end", "char_start", "char_end")
+# The vectors sidecar is rewritten once this many chunks changed since the last
+# save, or as many as it held then if that is more (amortized O(1) per chunk)
+VECTORS_SAVE_MIN_CHANGES = 4096
+# Selected (in this order) to build a DocChunk row
+_CHUNK_COLUMNS = ", ".join(("chunk_id", "text") + _CHUNK_PROVENANCE_COLUMNS)
+
+
+class SQLiteStore:
+    """
+    Same interface as InMemoryStore, persisted to a single SQLite file.
+
+    Every document belongs to an `owner` (one user's library); a store
+    instance only sees, retrieves from and removes its own owner's
+    documents, so several libraries can share one file. The same content
+    uploaded by two owners is stored once per owner.
+
+    Chunks and the inverted index (postings keyed by term string, since term
+    ids are process-local) are written on upsert. The file is opened with
+    mmap enabled, so opening is near-instant and chunk text pages are only
+    read when a chunk is actually touched. The in-memory InvertedIndex is
+    rebuilt from the postings table on first use, never by re-parsing PDFs.
+    Chunk embeddings (`vectors`) are loaded on first use from a sidecar
+    .npz file next to the database, or computed from the stored chunk text
+    if that file is missing or stale. Every write bumps the owner's
+    generation in the database and a sidecar is only trusted if it was
+    saved at the current generation, so writes made while the vectors were
+    not loaded (or not yet saved) can never resurrect old embeddings. Once
+    loaded, the vectors are kept up to date in memory and the sidecar is
+    rewritten lazily: after VECTORS_SAVE_MIN_CHANGES changed chunks or as
+    many as it held, whichever is more, and on close().
+
+    Writes run in one SQL transaction and are applied to the in-memory
+    index only after it commits, so a failed write leaves both unchanged.
+    One instance is meant to be shared by every session of the same owner
+    (see create_store); all access goes through `lock`.
+    """
+    def __init__(
+        self,
+        path: str = settings.store_path,
+        mmap_mb: int = settings.store_mmap_mb,
+        owner: str = ""
+    ) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.owner = owner
+        owner_tag = f".{hashlib.blake2b(owner.encode(), digest_size=8).hexdigest()}" if owner else ""
+        self.vectors_path = f"{path}{owner_tag}.{settings.embedding_backend}-{settings.embedding_dim}.vectors.npz"
+        self.lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(f"PRAGMA mmap_size = {int(mmap_mb) * 1024 * 1024}")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._conn.execute(_OWNER_INDEX)
+        self.docs: Dict[str, str] = {
+            doc_id: name for doc_id, name in self._conn.execute(
+                "SELECT doc_id, doc_name FROM docs WHERE owner = ? ORDER BY seq", (owner,)
+            )
+        }
+        self._index: Optional[InvertedIndex] = None
+        self._vectors: Optional[FlatVectorIndex] = None
+        self._vectors_loaded = False
+        self._saved_vector_rows = 0      # rows in the sidecar at its last save
+        self._unsaved_vector_rows = 0    # chunks added or removed since then
+
+    def _migrate(self) -> None:
+        with self._conn:
+            # Immediate, so two processes opening an old file do not both rebuild it
+            self._conn.execute("BEGIN IMMEDIATE")
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(chunks)")}
+            for column in _CHUNK_PROVENANCE_COLUMNS:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE chunks ADD COLUMN {column} INTEGER")
+            if "owner" not in existing:
+                self._conn.execute("ALTER TABLE chunks ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+                self._conn.execute("DROP INDEX IF EXISTS chunks_doc")
+            if "owner" not in {row[1] for row in self._conn.execute("PRAGMA table_info(docs)")}:
+                # The primary key changes, so the table is rebuilt; older documents get the default owner
+                self._conn.execute("ALTER TABLE docs RENAME TO docs_unowned")
+                self._conn.execute(_DOCS_TABLE)
+                self._conn.execute("INSERT INTO docs (doc_id, doc_name, seq) SELECT doc_id, doc_name, seq FROM docs_unowned")
+                self._conn.execute("DROP TABLE docs_unowned")
+
+    @property
+    def index(self) -> InvertedIndex:
+        """The retrieval index, loaded from the postings table on first access."""
+        with self.lock:
+            if self._index is None:
+                self._index = self._load_index()
+            return self._index
+
+    @property
+    def vectors(self) -> Optional[FlatVectorIndex]:
+        """Chunk embeddings for dense retrieval (None when off), built on first access."""
+        with self.lock:
+            if not self._vectors_loaded:
+                self._vectors = self._load_vectors()
+                self._vectors_loaded = True
+            return self._vectors
+
+    def _load_vectors(self) -> Optional[FlatVectorIndex]:
+        vectors = create_vector_index()
+        if vectors is None:
+            return None
+        saved = self._read_saved_vectors(vectors.kind, vectors.dim)
+        if saved is not None:
+            self._saved_vector_rows, self._unsaved_vector_rows = len(saved), 0
+            return saved
+        for doc_id in self.docs:
+            rows = self._conn.execute(
+                "SELECT slot, text FROM chunks WHERE owner = ? AND doc_id = ? ORDER BY slot", (self.owner, doc_id)
+            ).fetchall()
+            vectors.add_doc(doc_id, [slot for slot, _ in rows], embed_chunk_texts(text for _, text in rows))
+        self._save_vectors(vectors)
+        return vectors
+
+    def _read_saved_vectors(self, kind: str, dim: int) -> Optional[FlatVectorIndex]:
+        """The sidecar index, if it was saved at the current generation and covers exactly our chunks."""
+        row = self._conn.execute(
+            "SELECT generation FROM vector_files WHERE name = ?", (os.path.basename(self.vectors_path),)
+        ).fetchone()
+        if row is None or row[0] != self._generation() or not os.path.exists(self.vectors_path):
+            return None
+        try:
+            saved = load_vector_index(self.vectors_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        slots = [slot for slot, in self._conn.execute("SELECT slot FROM chunks WHERE owner = ? ORDER BY slot", (self.owner,))]
+        if saved.kind != kind or saved.dim != dim or sorted(saved.slots.tolist()) != slots:
+            return None
+        return saved
+
+    def _generation(self) -> int:
+        row = self._conn.execute("SELECT generation FROM owners WHERE owner = ?", (self.owner,)).fetchone()
+        return row[0] if row is not None else 0
+
+    def _bump_generation(self) -> None:
+        """Marks the owner's documents as changed (inside the caller's transaction)."""
+        self._conn.execute(
+            "INSERT INTO owners (owner, generation) VALUES (?, 1)"
+            " ON CONFLICT (owner) DO UPDATE SET generation = generation + 1",
+            (self.owner,)
+        )
+
+    def _save_vectors(self, vectors) -> None:
+        """Writes the sidecar, then records the generation it reflects."""
+        vectors.save(self.vectors_path)
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO vector_files (name, generation) VALUES (?, ?)",
+                (os.path.basename(self.vectors_path), self._generation())
+            )
+        self._saved_vector_rows, self._unsaved_vector_rows = len(vectors), 0
+
+    def _vectors_changed(self, rows: int) -> None:
+        self._unsaved_vector_rows += rows
+        if self._unsaved_vector_rows >= max(self._saved_vector_rows, VECTORS_SAVE_MIN_CHANGES):
+            self._save_vectors(self._vectors)
+
+    def _load_index(self) -> InvertedIndex:
+        slot_terms: Dict[int, Dict[int, int]] = {}
+        term_ids: Dict[str, int] = {}  # one vocabulary reference each, held until the index has its own
+        for term, slot, tf in self._conn.execute(
+            "SELECT p.term, p.slot, p.tf FROM postings p JOIN chunks c ON c.slot = p.slot WHERE c.owner = ?", (self.owner,)
+        ):
+            term_id = term_ids.get(term)
+            if term_id is None:
+                term_id = term_ids[term] = vocabulary.add(term)
+            slot_terms.setdefault(slot, {})[term_id] = tf
+
+        index = InvertedIndex()
+        doc_slots: Dict[str, List[int]] = {}
+        for slot, doc_id in self._conn.execute("SELECT slot, doc_id FROM chunks WHERE owner = ? ORDER BY slot", (self.owner,)):
+            doc_slots.setdefault(doc_id, []).append(slot)
+        for doc_id, slots in doc_slots.items():
+            index.add_doc(doc_id, (slot_terms.get(slot, {}) for slot in slots), slots=slots)
+        vocabulary.release(term_ids.values())
+        return index
+
+    def upsert_doc(self, doc_id: str, doc_name: str, chunks: List[DocChunk], embeddings=None) -> None:
+        """
+        Add or update a document with its chunks. `embeddings` (precomputed
+        chunk vectors) are only used once `vectors` has been loaded.
+        """
+        with self.lock:
+            index, vectors = self.index, self._vectors
+            if vectors is not None and embeddings is None:
+                embeddings = embed_chunk_texts(chunk.text for chunk in chunks)
+            with self._conn:
+                # Slots are shared by every owner of the file; the write lock is held while one is picked
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._bump_generation()
+                removed = self._delete_rows(doc_id)
+                first = self._conn.execute("SELECT COALESCE(MAX(slot), -1) + 1 FROM chunks").fetchone()[0]
+                slots = list(range(first, first + len(chunks)))
+                self._conn.execute(
+                    "INSERT INTO docs (owner, doc_id, doc_name, seq)"
+                    " VALUES (?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM docs))",
+                    (self.owner, doc_id, doc_name),
+                )
+                self._conn.executemany(
+                    "INSERT INTO chunks (slot, owner, doc_id, chunk_id, text, page_start, page_end, char_start, char_end)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        (slot, self.owner, doc_id, chunk.chunk_id, chunk.text,
+                         chunk.page_start, chunk.page_end, chunk.char_start, chunk.char_end)
+                        for slot, chunk in zip(slots, chunks)
+                    ),
+                )
+                term = vocabulary.term
+                self._conn.executemany(
+                    "INSERT INTO postings (term, slot, tf) VALUES (?, ?, ?)",
+                    (
+                        (term(term_id), slot, tf)
+                        for slot, chunk in zip(slots, chunks)
+                        for term_id, tf in chunk.get_term_counts().items()
+                    ),
+                )
+            # Committed: bring the in-memory structures in line
+            index.add_doc(doc_id, (chunk.get_term_counts() for chunk in chunks), slots=slots)
+            self.docs.pop(doc_id, None)
+            self.docs[doc_id] = doc_name
+            if vectors is not None:
+                vectors.add_doc(doc_id, slots, embeddings)
+                self._vectors_changed(removed + len(slots))
+
+    def list_docs(self) -> List[tuple]:
+        """List all documents as (doc_id, doc_name) tuples."""
+        return [(doc_id, name) for doc_id, name in self.docs.items()]
+
+    def get_chunks(self, doc_id: str) -> List[DocChunk]:
+        """Get all chunks for a specific document."""
+        doc_name = self.docs.get(doc_id)
+        if doc_name is None:
+            return []
+        with self.lock:
+            rows = self._conn.execute(
+                f"SELECT slot, {_CHUNK_COLUMNS} FROM chunks WHERE owner = ? AND doc_id = ? ORDER BY chunk_id",
+                (self.owner, doc_id)
+            ).fetchall()
+            return [self._to_chunk(doc_id, doc_name, *row) for row in rows]
+
+    def remove_doc(self, doc_id: str) -> None:
+        """Remove a document and its chunks."""
+        with self.lock:
+            if doc_id not in self.docs:
+                return
+            with self._conn:
+                self._bump_generation()
+                removed = self._delete_rows(doc_id)
+            self.docs.pop(doc_id)
+            if self._index is not None:
+                self._index.remove_doc(doc_id)
+            if self._vectors is not None:
+                self._vectors.remove_doc(doc_id)
+                self._vectors_changed(removed)
+
+    def clear(self) -> None:
+        """Remove every document of this owner."""
+        with self.lock:
+            with self._conn:
+                self._bump_generation()
+                self._conn.execute(
+                    "DELETE FROM postings WHERE slot IN (SELECT slot FROM chunks WHERE owner = ?)", (self.owner,)
+                )
+                self._conn.execute("DELETE FROM chunks WHERE owner = ?", (self.owner,))
+                self._conn.execute("DELETE FROM docs WHERE owner = ?", (self.owner,))
+            self.docs.clear()
+            self._index = InvertedIndex()
+            self._vectors, self._vectors_loaded = create_vector_index(), True
+            self._saved_vector_rows = self._unsaved_vector_rows = 0
+            if os.path.exists(self.vectors_path):
+                os.remove(self.vectors_path)
+
+    def _delete_rows(self, doc_id: str) -> int:
+        """
+        Deletes a document's rows inside the caller's transaction (memory is
+        updated after commit). Returns the number of chunks deleted.
+        """
+        if doc_id not in self.docs:
+            return 0
+        self._conn.execute(
+            "DELETE FROM postings WHERE slot IN (SELECT slot FROM chunks WHERE owner = ? AND doc_id = ?)",
+            (self.owner, doc_id)
+        )
+        removed = self._conn.execute("DELETE FROM chunks WHERE owner = ? AND doc_id = ?", (self.owner, doc_id)).rowcount
+        self._conn.execute("DELETE FROM docs WHERE owner = ? AND doc_id = ?", (self.owner, doc_id))
+        return removed
+
+    def chunk_at(self, slot: int) -> DocChunk:
+        """Resolve an index slot back to its chunk (reads only that row)."""
+        with self.lock:
+            row = self._conn.execute(
+                f"SELECT doc_id, {_CHUNK_COLUMNS} FROM chunks WHERE slot = ? AND owner = ?", (slot, self.owner)
+            ).fetchone()
+        if row is None:
+            raise KeyError(slot)
+        doc_id = row[0]
+        return self._to_chunk(doc_id, self.docs[doc_id], slot, *row[1:])
+
+    def _to_chunk(self, doc_id: str, doc_name: str, slot: int, chunk_id: int, text: str, *provenance) -> DocChunk:
+        term_counts = self._index.term_counts(slot) if self._index is not None else None
+        page_start, page_end, char_start, char_end = provenance
+        return DocChunk(
+            doc_id=doc_id, doc_name=doc_name, chunk_id=chunk_id, text=text,
+            page_start=page_start, page_end=page_end, char_start=char_start, char_end=char_end,
+            term_counts=term_counts
+        )
+
+    def get_total_chunks(self) -> int:
+        """Get total number of chunks across all documents."""
+        with self.lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks WHERE owner = ?", (self.owner,)).fetchone()[0]
+
+    def get_memory_usage_mb(self) -> float:
+        """On-disk size of the database (shared by all owners) in MB; pages are mapped, not held in memory."""
+        with self.lock:
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        return page_count * page_size / (1024 * 1024)
+
+    def get_statistics(self) -> Dict:
+        """Get storage statistics."""
+        with self.lock:
+            counts = dict(self._conn.execute(
+                "SELECT doc_id, COUNT(*) FROM chunks WHERE owner = ? GROUP BY doc_id", (self.owner,)
+            ))
+        return {
+            "total_docs": len(self.docs),
+            "total_chunks": sum(counts.values()),
+            "memory_mb": round(self.get_memory_usage_mb(), 2),
+            "docs": [
+                {
+                    "doc_id": doc_id,
+                    "doc_name": doc_name,
+                    "num_chunks": counts.get(doc_id, 0)
+                }
+                for doc_id, doc_name in self.docs.items()
+            ]
+        }
+
+    def close(self) -> None:
+        """Saves pending vector changes and closes the database."""
+        with self.lock:
+            if self._vectors is not None and self._unsaved_vector_rows:
+                self._save_vectors(self._vectors)
+            self._conn.close()
@@ -0,0 +1,213 @@
+"""
+Flat (exact) vector index over chunk embeddings for dense retrieval.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+from backend.config import settings
+from backend.utils.embeddings import get_embedder
+
+
+VECTOR_INDEX_KINDS = ("flat", "ivf", "int8", "pq")
+
+
+def embed_chunk_texts(texts: Iterable[str]) -> "np.ndarray":
+    """Embeds chunk texts with the configured backend, as an (n, dim) float32 matrix."""
+    return get_embedder().embed_batch(texts)
+
+
+def select_top_k_scores(scores: "np.ndarray", slots: "np.ndarray", top_k: int) -> List[Tuple[int, float]]:
+    """
+    Best top_k (slot, score) pairs from parallel score/slot arrays via
+    argpartition; non-positive scores are dropped and ties keep slot order.
+    """
+    if top_k <= 0 or len(scores) == 0:
+        return []
+    k = min(top_k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[scores[top] > 0]
+    top = top[np.lexsort((slots[top], -scores[top]))]
+    return [(int(slots[i]), float(scores[i])) for i in top]
+
+
+def save_arrays(path: str, **arrays) -> None:
+    """Writes arrays to an .npz file atomically (a crash leaves the old file intact)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _doc_table(doc_rows: Dict[str, Tuple[int, int]]) -> Dict[str, "np.ndarray"]:
+    doc_ids = list(doc_rows)
+    return {
+        "doc_ids": np.array(doc_ids, dtype=str),
+        "doc_bounds": np.array([doc_rows[d] for d in doc_ids], dtype=np.int64).reshape(-1, 2),
+    }
+
+
+class FlatVectorIndex:
+    """
+    Chunk embeddings in one contiguous float32 matrix, addressed by the same
+    slots as the store's InvertedIndex.
+
+    Rows of a document are contiguous; the matrix grows by doubling and
+    removing a document compacts the rows behind it. A query is one
+    matrix-vector product over the live rows followed by argpartition, so
+    search is exact and costs O(chunks x dim).
+    """
+    kind = "flat"
+    approximate = False
+
+    def __init__(self, dim: int = settings.embedding_dim) -> None:
+        if np is None:
+            raise ImportError("Dense retrieval requires NumPy. Install it with `pip install numpy`.")
+        self.dim = dim
+        self._vectors = np.zeros((0, dim), dtype=np.float32)   # rows [0, _size) are live
+        self._slots = np.zeros(0, dtype=np.int64)             # row -> index slot
+        self._size = 0
+        self._doc_rows: Dict[str, Tuple[int, int]] = {}       # doc_id -> [first row, end row)
+        self.version = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> "np.ndarray":
+        """Live rows of the matrix (a view; do not mutate)."""
+        return self._vectors[:self._size]
+
+    @property
+    def slots(self) -> "np.ndarray":
+        """Slot of each live row (a view; do not mutate)."""
+        return self._slots[:self._size]
+
+    def add_doc(self, doc_id: str, slots: List[int], vectors: "np.ndarray") -> None:
+        """
+        Adds (or replaces) a document's chunk embeddings.
+
+        Args:
+            doc_id: Document identifier
+            slots: Index slots of the chunks, in the same order as `vectors`
+            vectors: (len(slots), dim) unit-norm embeddings
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(slots), self.dim):
+            raise ValueError(f"Expected embeddings of shape ({len(slots)}, {self.dim}), got {vectors.shape}")
+        self.remove_doc(doc_id)
+
+        first, end = self._size, self._size + len(slots)
+        if end > len(self._vectors):
+            capacity = max(end, 2 * len(self._vectors), 64)
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            grown_slots = np.zeros(capacity, dtype=np.int64)
+            grown_slots[:self._size] = self._slots[:self._size]
+            self._vectors, self._slots = grown, grown_slots
+        self._vectors[first:end] = vectors
+        self._slots[first:end] = slots
+        self._size = end
+        self._doc_rows[doc_id] = (first, end)
+        self.version += 1
+
+    def remove_doc(self, doc_id: str) -> None:
+        """Drops a document's rows, shifting later rows down."""
+        rows = self._doc_rows.pop(doc_id, None)
+        if rows is None:
+            return
+        first, end = rows
+        removed = end - first
+        self._vectors[first:self._size - removed] = self._vectors[end:self._size]
+        self._slots[first:self._size - removed] = self._slots[end:self._size]
+        self._size -= removed
+        self._doc_rows = {
+            d: (a - removed, b - removed) if a >= end else (a, b)
+            for d, (a, b) in self._doc_rows.items()
+        }
+        self.version += 1
+
+    def search(self, query: "np.ndarray", top_k: int) -> List[Tuple[int, float]]:
+        """
+        Exact cosine top_k for a unit-norm query vector.
+
+        Returns:
+            (slot, similarity) pairs, best first; chunks with no positive
+            similarity are left out and ties keep slot order
+        """
+        if top_k <= 0 or self._size == 0:
+            return []
+        return select_top_k_scores(self.vectors @ np.asarray(query, dtype=np.float32), self.slots, top_k)
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the (possibly over-allocated) matrix and slot array."""
+        return self._vectors.nbytes + self._slots.nbytes
+
+    def save(self, path: str) -> None:
+        """Serializes the live rows to an .npz file (see load_vector_index)."""
+        save_arrays(path, kind=np.array("flat"), vectors=self.vectors, slots=self.slots, **_doc_table(self._doc_rows))
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "FlatVectorIndex":
+        index = cls(arrays["vectors"].shape[1])
+        index._vectors = np.array(arrays["vectors"], dtype=np.float32)
+        index._slots = np.array(arrays["slots"], dtype=np.int64)
+        index._size = len(index._slots)
+        index._doc_rows = {
+            str(d): (int(a), int(b)) for d, (a, b) in zip(arrays["doc_ids"], arrays["doc_bounds"])
+        }
+        return index
+
+
+def embeddings_enabled() -> bool:
+    """Whether chunks get embeddings (a backend is configured and NumPy is installed)."""
+    return np is not None and settings.embedding_backend != "none"
+
+
+def create_vector_index(kind: Optional[str] = None):
+    """
+    A new, empty index for a store, or None when embeddings are off or NumPy
+    is missing. `kind` is one of VECTOR_INDEX_KINDS and defaults to
+    settings.vector_index: "flat" (exact), "ivf" (approximate, see ivf_index),
+    or "int8" / "pq" (compressed, see quantized_index).
+    """
+    kind = kind or settings.vector_index
+    if kind not in VECTOR_INDEX_KINDS:
+        raise ValueError(f"Unknown vector index '{kind}'. Expected one of: {', '.join(VECTOR_INDEX_KINDS)}")
+    if not embeddings_enabled():
+        return None
+    if kind == "ivf":
+        from backend.storage.ivf_index import IVFVectorIndex  # imports this module
+        return IVFVectorIndex(get_embedder().dim)
+    if kind in ("int8", "pq"):
+        from backend.storage.quantized_index import QuantizedVectorIndex  # imports this module
+        return QuantizedVectorIndex(get_embedder().dim, method=kind)
+    return FlatVectorIndex(get_embedder().dim)
+
+
+def load_vector_index(path: str):
+    """
+    Reads an index written by the save method of FlatVectorIndex,
+    IVFVectorIndex or QuantizedVectorIndex.
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If it is not a saved vector index
+    """
+    with np.load(path, allow_pickle=False) as arrays:
+        kind = str(arrays["kind"]) if "kind" in arrays.files else ""
+        if kind == "ivf":
+            from backend.storage.ivf_index import IVFVectorIndex
+            return IVFVectorIndex.from_arrays(arrays)
+        if kind in ("int8", "pq"):
+            from backend.storage.quantized_index import QuantizedVectorIndex
+            return QuantizedVectorIndex.from_arrays(arrays)
+        if kind == "flat":
+            return FlatVectorIndex.from_arrays(arrays)
+    raise ValueError(f"{path} is not a saved vector index")
@@ -0,0 +1,19 @@
+"""
+Turns chunk embeddings on for dense and hybrid retrieval tests; they are
+off by default unless RETRIEVAL_MODE is dense or hybrid.
+"""
+import dataclasses
+from unittest import mock
+
+from backend.config import settings
+from backend.storage import sqlite_store, vector_index
+from backend.utils import embeddings
+
+
+def enable_embeddings(test, backend: str = "hashing") -> None:
+    """Patches settings.embedding_backend for the duration of `test`."""
+    enabled = dataclasses.replace(settings, embedding_backend=backend)
+    for module in (embeddings, vector_index, sqlite_store):
+        patcher = mock.patch.object(module, "settings", enabled)
+        patcher.start()
+        test.addCleanup(patcher.stop)
@@ -0,0 +1,77 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services import answer_cache as answer_cache_module
+from backend.services.answer_cache import AnswerCache, answer_cache_key, normalize_question
+
+OPTIONS = {"temperature": 0.6, "max_tokens": 1500}
+
+class TestAnswerCache(unittest.TestCase):
+    def test_key_covers_question_context_and_parameters(self):
+        """Test that only trivial rewordings share a key."""
+        key = answer_cache_key("What is a B-tree?", ["[Source 1] ..."], "llama", OPTIONS)
+        self.assertEqual(normalize_question("  What is\na B-tree ?! "), "what is a b-tree")
+        self.assertEqual(answer_cache_key("what is a  b-tree", ["[Source 1] ..."], "llama", OPTIONS), key)
+        self.assertNotEqual(answer_cache_key("What is a B-tree?", ["[Source 1] other"], "llama", OPTIONS), key)
+        self.assertNotEqual(answer_cache_key("What is a B-tree?", ["[Source 1] ..."], "mixtral", OPTIONS), key)
+        self.assertNotEqual(answer_cache_key("What is a B-tree?", ["[Source 1] ..."], "llama", {**OPTIONS, "temperature": 0}), key)
+
+    def test_lru_and_ttl(self):
+        """Test that the cache is bounded, keeps recently used entries and expires old ones."""
+        cache = AnswerCache(max_entries=2, ttl_s=60, path=None)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.get("a")
+        cache.put("c", "C")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "A")
+        with mock.patch.object(answer_cache_module.time, "time", return_value=answer_cache_module.time.time() + 61):
+            self.assertIsNone(cache.get("c"))
+        self.assertEqual(cache.get_statistics(), {"entries": 1, "hits": 2, "disk_hits": 0, "misses": 2})
+
+    def test_disk_tier(self):
+        """Test that answers persist on disk and are promoted into a new process's memory."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "answers.sqlite3")
+            AnswerCache(max_entries=4, ttl_s=60, path=path).put("k", "cached answer")
+            fresh = AnswerCache(max_entries=4, ttl_s=60, path=path)
+            self.assertEqual(fresh.get("k"), "cached answer")
+            self.assertEqual(fresh.get("k"), "cached answer")
+            self.assertEqual(fresh.get_statistics(), {"entries": 1, "hits": 2, "disk_hits": 1, "misses": 0})
+
+    def test_disk_tier_drops_expired_and_excess_rows(self):
+        """Test that the disk tier deletes expired answers and keeps at most max_disk_entries."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "answers.sqlite3")
+            cache = AnswerCache(max_entries=4, ttl_s=60, path=path, max_disk_entries=100)
+            now = answer_cache_module.time.time()
+            with mock.patch.object(answer_cache_module.time, "time", return_value=now - 120):
+                cache.put("stale", "expired answer")
+            for i in range(3 * answer_cache_module.DISK_PURGE_INTERVAL):
+                with mock.patch.object(answer_cache_module.time, "time", return_value=now + i / 100):
+                    cache.put(f"k{i}", f"answer {i}")
+            count = lambda: cache._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            self.assertLessEqual(count(), 100 + answer_cache_module.DISK_PURGE_INTERVAL)
+            self.assertEqual(cache._conn.execute("SELECT COUNT(*) FROM answers WHERE key = 'stale'").fetchone()[0], 0)
+
+            reopened = AnswerCache(max_entries=4, ttl_s=60, path=path, max_disk_entries=100)
+            self.assertEqual(count(), 100)
+            last = 3 * answer_cache_module.DISK_PURGE_INTERVAL - 1
+            self.assertEqual(reopened.get(f"k{last - 10}"), f"answer {last - 10}")
+            self.assertIsNone(reopened.get("k0"))
+
+    def test_disabled(self):
+        """Test that max_entries=0 turns the cache off."""
+        cache = AnswerCache(max_entries=0, path=None)
+        cache.put("k", "v")
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.get_statistics()["misses"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import asyncio
+import concurrent.futures
+import dataclasses
+import os
+import sys
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services import async_chat_service, chat_service
+from backend.services.answer_cache import AnswerCache
+from backend.services.semantic_cache import SemanticCache
+from backend.storage.in_memory_store import DocChunk
+
+CHUNKS = [DocChunk(doc_id="d", doc_name="nets.pdf", chunk_id=0, text="TCP retransmits lost segments after a timeout.")]
+
+class SlowClient:
+    """AsyncGroq stand-in that records how many requests overlap."""
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages, model, **options):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="TCP uses timeouts."))])
+
+class TestAsyncChatService(unittest.TestCase):
+    def setUp(self):
+        self.client = SlowClient()
+        patchers = [
+            mock.patch.object(async_chat_service, "get_async_groq_client", return_value=self.client),
+            mock.patch.object(async_chat_service, "answer_cache", AnswerCache(max_entries=0, path=None)),
+            mock.patch.object(chat_service, "answer_cache", AnswerCache(max_entries=0, path=None)),
+            mock.patch.object(chat_service, "semantic_cache", SemanticCache(max_entries=0)),
+            mock.patch.object(
+                async_chat_service, "settings",
+                dataclasses.replace(async_chat_service.settings, groq_max_concurrent_requests=2)
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_matches_sync_result(self):
+        """Test that the async answer has the same shape and excerpts as the sync one."""
+        result = asyncio.run(async_chat_service.answer_question_from_docs_async("tcp timeout", all_chunks=CHUNKS))
+        self.assertEqual(result["answer"], "TCP uses timeouts.")
+        _, packed = chat_service.prepare_messages("tcp timeout", CHUNKS, 5, None, None)
+        self.assertEqual(result["used_excerpts"], packed.used_excerpts)
+        self.assertEqual(result["context_budget"], packed.budget)
+
+    def test_caches_are_used_off_the_event_loop(self):
+        """Test that cache lookups and stores run in worker threads, not on the loop thread."""
+        threads = {}
+        def recorded(name, fn):
+            def call(*args):
+                threads[name] = threading.current_thread()
+                return fn(*args)
+            return call
+        cache = async_chat_service.answer_cache
+        with mock.patch.object(async_chat_service, "similar_answer", recorded("similar", chat_service.similar_answer)), \
+                mock.patch.object(cache, "get", recorded("get", cache.get)), \
+                mock.patch.object(async_chat_service, "remember_answer", recorded("remember", chat_service.remember_answer)):
+            result = asyncio.run(async_chat_service.answer_question_from_docs_async("tcp timeout", all_chunks=CHUNKS))
+        self.assertEqual(result["answer"], "TCP uses timeouts.")
+        self.assertEqual(set(threads), {"similar", "get", "remember"})
+        self.assertNotIn(threading.current_thread(), threads.values())
+
+    def test_concurrency_is_bounded(self):
+        """Test that simultaneous sessions share a bounded number of in-flight requests."""
+        async def many():
+            return await asyncio.gather(*(
+                async_chat_service.answer_question_from_docs_async(f"tcp {i}", all_chunks=CHUNKS) for i in range(6)
+            ))
+        results = asyncio.run(many())
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.client.max_in_flight, 2)
+
+    def test_submitted_question_can_be_cancelled(self):
+        """Test that cancelling a submitted question stops it and frees its slot."""
+        self.client.delay = 5.0
+        future = async_chat_service.submit_question("tcp", all_chunks=CHUNKS)
+        for _ in range(100):
+            if self.client.in_flight:
+                break
+            concurrent.futures.wait([future], timeout=0.01)
+        self.assertTrue(future.cancel())
+        with self.assertRaises(concurrent.futures.CancelledError):
+            future.result(timeout=1)
+
+        self.client.delay = 0.0
+        follow_up = async_chat_service.submit_question("tcp again", all_chunks=CHUNKS)
+        self.assertEqual(follow_up.result(timeout=5)["answer"], "TCP uses timeouts.")
+        self.assertEqual(self.client.in_flight, 0)
+
+if __name__ == "__main__":
+    unittest.main()
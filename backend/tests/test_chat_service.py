@@ -0,0 +1,103 @@
+import unittest
+import os
+import sys
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services import chat_service
+from backend.services.answer_cache import AnswerCache
+from backend.services.semantic_cache import SemanticCache
+from backend.storage.in_memory_store import DocChunk
+
+CHUNKS = [
+    DocChunk(doc_id="d", doc_name="sorting.pdf", chunk_id=0, text="Quicksort partitions around a pivot element."),
+    DocChunk(doc_id="d", doc_name="sorting.pdf", chunk_id=1, text="Merge sort splits the list and merges sorted halves."),
+]
+ANSWER_PARTS = ["Quicksort ", "picks a ", None, "pivot [Source 1]."]
+
+def fake_client(fail_after=None):
+    """Groq stand-in: a full completion, or a stream of delta chunks when stream=True."""
+    def create(messages, model, stream=False, **options):
+        if not stream:
+            content = "".join(p for p in ANSWER_PARTS if p)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        def chunks():
+            for i, part in enumerate(ANSWER_PARTS):
+                if i == fail_after:
+                    raise ConnectionError("connection reset")
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+        return chunks()
+    client = mock.Mock()
+    client.chat.completions.create.side_effect = create
+    return client
+
+class TestChatService(unittest.TestCase):
+    def setUp(self):
+        for name, cache in (("answer_cache", AnswerCache(max_entries=0, path=None)),
+                            ("semantic_cache", SemanticCache(max_entries=0))):
+            patcher = mock.patch.object(chat_service, name, cache)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_stream_matches_blocking_answer(self):
+        """Test that joined deltas and excerpts equal the blocking result."""
+        client = fake_client()
+        with mock.patch.object(chat_service, "get_groq_client", return_value=client):
+            blocking = chat_service.answer_question_from_docs("quicksort pivot", all_chunks=CHUNKS)
+            streaming = chat_service.stream_answer_from_docs("quicksort pivot", all_chunks=CHUNKS)
+            self.assertEqual(client.chat.completions.create.call_count, 1)  # not sent until iterated
+            deltas = list(streaming["answer_stream"])
+
+        self.assertEqual(deltas, ["Quicksort ", "picks a ", "pivot [Source 1]."])
+        self.assertEqual("".join(deltas), blocking["answer"])
+        self.assertEqual(streaming["used_excerpts"], blocking["used_excerpts"])
+        self.assertEqual(streaming["context_budget"], blocking["context_budget"])
+        self.assertTrue(client.chat.completions.create.call_args.kwargs["stream"])
+
+    def test_stream_error_is_reported_inline(self):
+        """Test that a failure mid-stream keeps the partial answer and appends the error."""
+        with mock.patch.object(chat_service, "get_groq_client", return_value=fake_client(fail_after=1)):
+            answer = "".join(chat_service.stream_answer_from_docs("quicksort", all_chunks=CHUNKS)["answer_stream"])
+        self.assertEqual(answer, "Quicksort \n\nError generating answer: connection reset")
+
+    def test_abandoned_stream_is_closed(self):
+        """Test that closing the answer stream early closes the Groq stream and caches nothing."""
+        groq_stream = mock.MagicMock()
+        groq_stream.__iter__.return_value = iter(
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))]) for part in ANSWER_PARTS
+        )
+        client = mock.Mock()
+        client.chat.completions.create.return_value = groq_stream
+        with mock.patch.object(chat_service, "get_groq_client", return_value=client), \
+                mock.patch.object(chat_service, "remember_answer") as remember:
+            answer_stream = chat_service.stream_answer_from_docs("quicksort", all_chunks=CHUNKS)["answer_stream"]
+            self.assertEqual(next(answer_stream), "Quicksort ")
+            answer_stream.close()
+        groq_stream.close.assert_called_once()
+        remember.assert_not_called()
+
+    def test_repeated_question_served_from_cache(self):
+        """Test that a rephrased repeat skips Groq in both the blocking and streaming paths."""
+        cache = AnswerCache(max_entries=8, path=None)
+        client = fake_client()
+        with mock.patch.object(chat_service, "answer_cache", cache), \
+                mock.patch.object(chat_service, "get_groq_client", return_value=client):
+            first = chat_service.answer_question_from_docs("Quicksort pivot?", all_chunks=CHUNKS)
+            again = chat_service.answer_question_from_docs("  quicksort   PIVOT ", all_chunks=CHUNKS)
+            streamed = chat_service.stream_answer_from_docs("quicksort pivot", all_chunks=CHUNKS)
+            other = chat_service.answer_question_from_docs("merge sort halves", all_chunks=CHUNKS)
+
+        self.assertFalse(first["cached"])
+        self.assertTrue(again["cached"])
+        self.assertEqual(again["answer"], first["answer"])
+        self.assertTrue(streamed["cached"])
+        self.assertEqual("".join(streamed["answer_stream"]), first["answer"])
+        self.assertFalse(other["cached"])
+        self.assertEqual(client.chat.completions.create.call_count, 2)
+        self.assertEqual(cache.get_statistics()["hits"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
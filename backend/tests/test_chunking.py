@@ -1,11 +1,13 @@
 import unittest
+import random
 import sys
 import os
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from backend.utils.chunking import chunk_text, validate_chunk
+from backend.utils.chunking import chunk_sentences, chunk_text, chunk_text_spans, chunk_text_stream, iter_sentences, split_into_sentences, validate_chunk
+from backend.utils.token_estimator import estimate_tokens
 
 class TestChunking(unittest.TestCase):
     def test_chunk_validation(self):
@@ -26,5 +28,109 @@ class TestChunking(unittest.TestCase):
         for chunk in chunks:
             self.assertTrue(len(chunk) <= 120) # A bit of flexibility for sentence boundaries
 
+    def test_large_text_stays_sentence_aware(self):
+        """Test that big documents are chunked at sentence boundaries, not by characters."""
+        text = "Eigenvalues scale eigenvectors under a linear map. " * 6000  # ~300 KB, past the old cutoff
+        chunks = list(chunk_text(text, chunk_size=1200, overlap=200))
+        self.assertGreater(len(chunks), 200)
+        for chunk in chunks:
+            self.assertTrue(chunk.startswith("Eigenvalues") and chunk.endswith("map."))
+            self.assertLessEqual(len(chunk), 1200 + 30)
+
+    def test_unpunctuated_text_splits_at_words(self):
+        """Test that text without sentence ends still yields bounded chunks of whole words."""
+        words = ["alpha", "beta", "gamma", "delta"] * 5000
+        chunks = list(chunk_text_stream([" ".join(words[:9000]), " ".join(words[9000:])], chunk_size=300, overlap=50))
+        self.assertGreater(len(chunks), 100)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk), 300)
+            self.assertTrue(set(chunk.split()) <= {"alpha", "beta", "gamma", "delta"})
+        self.assertEqual(list(chunk_text("x" * 1000, chunk_size=300, overlap=0)), ["x" * 300] * 3 + ["x" * 100])
+
+    def test_long_unpunctuated_sentence_spans_map_to_text(self):
+        """Test that one huge sentence is cut into whole-word pieces whose offsets point into the text."""
+        rng = random.Random(3)
+        text = " ".join(rng.choice(["tree", "graph", "heap", "queue\n"]) for _ in range(60000))
+        spans = list(chunk_text_spans([(1, text)], chunk_size=500, overlap=0))
+        self.assertGreater(len(spans), 500)
+        for chunk, _, _, start, end in spans:
+            self.assertLessEqual(len(chunk), 500)
+            self.assertEqual(text[start:end], chunk)
+            self.assertTrue(start == 0 or text[start - 1].isspace())
+        self.assertEqual(" ".join(text.split()), " ".join(" ".join(span.text for span in spans).split()))
+
+    def test_character_chunking_terminates(self):
+        """Test that plain character chunking stops at the end of the text."""
+        chunks = list(chunk_text("abcdefghij" * 10, chunk_size=30, overlap=10, sentence_aware=False))
+        self.assertEqual(len(chunks), 5)
+        self.assertTrue(chunks[-1].endswith("hij"))
+
+    def test_token_estimates(self):
+        """Test that the token estimate tracks text type, not just length."""
+        prose = "The derivative measures how a function changes as its input changes."
+        code = "for(i=0;i<n;i++){a[i]=b[i]*c[i];}"
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertLess(estimate_tokens(prose), len(prose) / 3)
+        self.assertGreater(estimate_tokens(code), len(code) / 2)
+        self.assertEqual(estimate_tokens("12345678"), 3)
+        self.assertEqual(estimate_tokens(prose + " " + prose), 2 * estimate_tokens(prose))
+
+    def test_token_unit_chunking(self):
+        """Test that token-sized chunks stay within the token budget."""
+        text = "Gradient descent updates weights against the gradient. x_{t+1} = x_t - eta * g(x_t). " * 200
+        chunks = list(chunk_text(text, chunk_size=120, overlap=20, unit="tokens"))
+        self.assertGreater(len(chunks), 10)
+        for chunk in chunks:
+            self.assertLessEqual(estimate_tokens(chunk), 120)
+        with self.assertRaises(ValueError):
+            list(chunk_text(text, chunk_size=120, overlap=20, unit="words"))
+
+    def test_token_chunks_of_code_and_math_stay_within_budget(self):
+        """Test that token-dense text without sentence ends is cut by its token estimate, not by characters."""
+        code = "for(i=0;i<n;i++){a[i]=b[i]*c[i];}"
+        for text in (code * 400, (code + " ") * 400, "x_{t+1} = x_t - eta * g(x_t) " * 400):
+            chunks = list(chunk_text(text, chunk_size=300, overlap=50, unit="tokens"))
+            self.assertGreater(len(chunks), 10)
+            for chunk in chunks:
+                self.assertLessEqual(estimate_tokens(chunk), 300)
+            self.assertTrue(all(chunk in text for chunk in chunks))
+
+    def test_overlap_carries_trailing_sentences(self):
+        """Test that the sentences fitting in the overlap start the next chunk."""
+        chunks = list(chunk_sentences(["aaaa.", "bbbb.", "cccc.", "dddd."], chunk_size=11, overlap=5))
+        self.assertEqual(chunks, ["aaaa. bbbb.", "bbbb. cccc.", "cccc. dddd."])
+        no_overlap = list(chunk_sentences(["aaaa.", "bbbb.", "cccc."], chunk_size=11, overlap=0))
+        self.assertEqual(no_overlap, ["aaaa. bbbb.", "cccc."])
+
+    def test_iter_sentences_matches_split(self):
+        """Test that streaming sentence splitting is independent of where pieces are cut."""
+        text = "Cells divide! Mitosis has four phases... Why?  Energy comes from ATP.\nDone. Tail without end"
+        rng = random.Random(3)
+        for _ in range(50):
+            cuts = sorted(rng.sample(range(1, len(text)), 5))
+            pieces = [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+            self.assertEqual(list(iter_sentences(pieces)), split_into_sentences(text))
+
+    def test_chunk_text_stream_matches_chunk_text(self):
+        """Test that chunking pages as a stream gives the same chunks as the joined text."""
+        pages = [f"Page {p} starts here. " + "Photosynthesis makes sugar from light. " * 7 for p in range(6)]
+        pages = [page.strip() for page in pages]
+        expected = list(chunk_text("\n\n".join(pages), chunk_size=150, overlap=40))
+        self.assertEqual(list(chunk_text_stream(iter(pages), chunk_size=150, overlap=40)), expected)
+
+    def test_chunk_spans_record_pages_and_offsets(self):
+        """Test that each chunk knows its page range and where it sits in the document text."""
+        pages = [(2, "Stacks are LIFO. Queues are FIFO."), (3, "Heaps keep the minimum on top. Tries index prefixes.")]
+        joined = "\n\n".join(text for _, text in pages)
+        spans = list(chunk_text_spans(iter(pages), chunk_size=40, overlap=20))
+
+        self.assertEqual([span.text for span in spans], list(chunk_text(joined, chunk_size=40, overlap=20)))
+        for span in spans:
+            self.assertTrue(joined[span.char_start:span.char_end].startswith(span.text[:10]))
+            self.assertTrue(joined[span.char_start:span.char_end].endswith(span.text[-10:]))
+        self.assertEqual((spans[0].page_start, spans[0].page_end), (2, 2))
+        self.assertEqual((spans[1].page_start, spans[1].page_end), (2, 3))
+        self.assertEqual((spans[-1].page_start, spans[-1].page_end), (3, 3))
+
 if __name__ == "__main__":
     unittest.main()
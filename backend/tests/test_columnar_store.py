@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.storage.columnar_store import ColumnarStore
+from backend.storage.in_memory_store import InMemoryStore, DocChunk
+from backend.services.retrieval_service import retrieve_top_k
+
+def make_chunks(doc_id, doc_name, texts):
+    return [DocChunk(doc_id=doc_id, doc_name=doc_name, chunk_id=i, text=t) for i, t in enumerate(texts)]
+
+DOCS = {
+    "d1": ("calculus.pdf", ["Derivatives measure the rate of change.", "Integrals accumulate área under curves."]),
+    "d2": ("python.txt", ["Python lists are dynamic arrays.", "Dictionaries are hash tables.", "Sets drop duplicates."]),
+    "d3": ("graphs.pdf", ["Dijkstra finds shortest paths with non-negative weights."]),
+}
+
+class TestColumnarStore(unittest.TestCase):
+    def setUp(self):
+        self.store = ColumnarStore()
+        for doc_id, (name, texts) in DOCS.items():
+            self.store.upsert_doc(doc_id, name, make_chunks(doc_id, name, texts))
+
+    def test_chunks_round_trip(self):
+        """Test that lazily materialized chunks equal the ingested ones (incl. non-ASCII)."""
+        for doc_id, (name, texts) in DOCS.items():
+            self.assertEqual(self.store.get_chunks(doc_id), make_chunks(doc_id, name, texts))
+
+    def test_provenance_round_trip(self):
+        """Test that page ranges and offsets survive storage, including unknown ones."""
+        chunks = make_chunks("d9", "notes.pdf", ["Binary search halves the range.", "Merge sort is stable."])
+        chunks[0].page_start, chunks[0].page_end, chunks[0].char_start, chunks[0].char_end = 4, 5, 1200, 1231
+        self.store.upsert_doc("d9", "notes.pdf", chunks)
+        stored = self.store.get_chunks("d9")
+        self.assertEqual((stored[0].page_start, stored[0].page_end, stored[0].char_start, stored[0].char_end), (4, 5, 1200, 1231))
+        self.assertIsNone(stored[1].page_start)
+        self.assertIsNone(stored[1].char_end)
+
+    def test_remove_compacts_arena(self):
+        """Test that removing a document keeps later documents intact."""
+        self.store.remove_doc("d1")
+        self.assertEqual(self.store.get_chunks("d2"), make_chunks("d2", *DOCS["d2"]))
+        self.assertEqual(self.store.get_chunks("d3"), make_chunks("d3", *DOCS["d3"]))
+        self.assertEqual(len(self.store._arena), sum(len(t.encode()) for d in ("d2", "d3") for t in DOCS[d][1]))
+        self.assertEqual(self.store.get_statistics()["total_chunks"], 4)
+
+    def test_retrieval_matches_in_memory_store(self):
+        """Test that retrieval through the columnar store equals InMemoryStore."""
+        reference = InMemoryStore()
+        for doc_id, (name, texts) in DOCS.items():
+            reference.upsert_doc(doc_id, name, make_chunks(doc_id, name, texts))
+        self.store.upsert_doc("d2", "python.txt", make_chunks("d2", *DOCS["d2"]))
+        reference.upsert_doc("d2", "python.txt", make_chunks("d2", *DOCS["d2"]))
+        for query in ("hash tables arrays", "shortest paths", "rate of change"):
+            self.assertEqual(
+                retrieve_top_k(query, [], top_k=3, store=self.store),
+                retrieve_top_k(query, [], top_k=3, store=reference),
+            )
+
+    def test_memory_usage_reports_buffers(self):
+        """Test that the reported footprint covers at least the stored text."""
+        text_bytes = sum(len(t.encode()) for _, texts in DOCS.values() for t in texts)
+        self.assertGreaterEqual(self.store.get_memory_usage_mb() * 1024 * 1024, text_bytes)
+        self.assertGreater(self.store.get_memory_usage_mb() * 1024 * 1024, text_bytes + self.store.index.memory_bytes())
+        self.assertGreater(self.store.index.memory_bytes(), 0)
+
+    def test_removed_doc_entries_are_reused(self):
+        """Test that replacing and removing documents does not grow the doc table."""
+        for i in range(50):
+            self.store.upsert_doc("d2", f"python-{i}.txt", make_chunks("d2", *DOCS["d2"]))
+            self.store.upsert_doc(f"tmp{i}", "tmp.txt", make_chunks(f"tmp{i}", "tmp.txt", ["Scratch notes."]))
+            self.store.remove_doc(f"tmp{i}")
+        self.assertLessEqual(len(self.store._doc_table), len(DOCS) + 1)
+        self.assertEqual(self.store.get_chunks("d2")[0].doc_name, "python-49.txt")
+        self.assertEqual(self.store.get_chunks("d3"), make_chunks("d3", *DOCS["d3"]))
+
+if __name__ == "__main__":
+    unittest.main()
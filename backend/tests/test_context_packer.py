@@ -0,0 +1,75 @@
+import unittest
+import os
+import sys
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services import chat_service
+from backend.services.answer_cache import AnswerCache
+from backend.services.semantic_cache import SemanticCache
+from backend.services.context_packer import MIN_TRUNCATED_EXCERPT_CHARS, pack_context
+from backend.storage.in_memory_store import DocChunk
+from backend.utils.token_estimator import estimate_tokens
+
+def ranked(lengths):
+    word = "entropy "
+    return [
+        (DocChunk(doc_id="d", doc_name="thermo.pdf", chunk_id=i, text=(word * (n // len(word) + 1))[:n].strip()), 10.0 - i)
+        for i, n in enumerate(lengths)
+    ]
+
+class TestContextPacker(unittest.TestCase):
+    def test_everything_fits(self):
+        """Test that excerpts under budget are all packed and numbered in order."""
+        packed = pack_context(ranked([300, 300, 300]), max_chars=5000)
+        self.assertEqual(len(packed.excerpts), 3)
+        self.assertTrue(packed.excerpts[2].startswith("[Source 3] (Doc: thermo.pdf)"))
+        self.assertEqual(packed.budget["chars_used"], sum(len(e) for e in packed.excerpts))
+        self.assertEqual(packed.budget["excerpts_dropped"], 0)
+
+    def test_budget_enforced_with_truncation(self):
+        """Test that 15 full-size chunks are cut down to the character budget."""
+        packed = pack_context(ranked([1200] * 15), max_chars=14000)
+        self.assertLessEqual(packed.budget["chars_used"], 14000)
+        self.assertEqual(packed.budget["excerpts_packed"], 12)
+        self.assertEqual(packed.budget["excerpts_truncated"], 1)
+        self.assertEqual(packed.budget["excerpts_dropped"], 3)
+        self.assertTrue(packed.used_excerpts[-1]["text"].endswith("…"))
+        self.assertEqual([e["chunk_id"] for e in packed.used_excerpts], list(range(12)))
+
+    def test_small_excerpt_fills_gap_after_drop(self):
+        """Test that an excerpt too big for the remainder is skipped, not the ones after it."""
+        header = len("[Source 1] (Doc: thermo.pdf): \n")
+        # After the first excerpt the remainder fits the 150-char one but is too small to truncate into
+        packed = pack_context(ranked([900, 900, 150]), max_chars=header + 900 + header + MIN_TRUNCATED_EXCERPT_CHARS - 10)
+        self.assertEqual([e["chunk_id"] for e in packed.used_excerpts], [0, 2])
+        self.assertTrue(packed.excerpts[1].startswith("[Source 2]"))
+        self.assertEqual(packed.budget["excerpts_dropped"], 1)
+
+    def test_token_budget(self):
+        """Test that the optional token cap is honoured as well."""
+        packed = pack_context(ranked([1200] * 5), max_chars=100000, max_tokens=500)
+        self.assertLessEqual(packed.budget["tokens_used"], 500)
+        self.assertEqual(packed.budget["tokens_used"], sum(estimate_tokens(e) for e in packed.excerpts))
+        self.assertEqual(packed.budget["max_tokens"], 500)
+
+    def test_answer_prompt_respects_budget(self):
+        """Test that the chat service sends a bounded prompt and reports the budget."""
+        client = mock.Mock()
+        client.chat.completions.create.return_value.choices = [mock.Mock(message=mock.Mock(content="ok"))]
+        chunks = [chunk for chunk, _ in ranked([1200] * 15)]
+        with mock.patch.object(chat_service, "get_groq_client", return_value=client), \
+                mock.patch.object(chat_service, "answer_cache", AnswerCache(max_entries=0, path=None)), \
+                mock.patch.object(chat_service, "semantic_cache", SemanticCache(max_entries=0)):
+            result = chat_service.answer_question_from_docs("entropy", all_chunks=chunks, top_k=15)
+
+        prompt = client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        budget = result["context_budget"]
+        self.assertLessEqual(budget["chars_used"], chat_service.settings.max_context_chars)
+        self.assertLess(len(prompt), budget["chars_used"] + 100)
+        self.assertEqual(len(result["used_excerpts"]), budget["excerpts_packed"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import asyncio
+import dataclasses
+import os
+import sys
+import threading
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services import groq_client
+
+class TestGroqClient(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(
+            groq_client, "settings",
+            dataclasses.replace(groq_client.settings, groq_api_key="test-key", groq_max_connections=7, groq_timeout_s=12.0)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        groq_client.reset_groq_client()
+        self.addCleanup(groq_client.reset_groq_client)
+
+    def test_client_is_shared_across_threads(self):
+        """Test that every caller, on any thread, gets the same pooled client."""
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(groq_client.get_groq_client())) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len({id(c) for c in clients}), 1)
+        self.assertIs(groq_client.get_groq_client(), clients[0])
+
+    def test_pool_and_timeouts_from_settings(self):
+        """Test that pool limits and timeouts come from Settings."""
+        with mock.patch.object(groq_client.httpx, "Limits", wraps=groq_client.httpx.Limits) as limits:
+            client = groq_client.get_groq_client()
+        self.assertEqual(client.timeout.read, 12.0)
+        self.assertEqual(limits.call_args.kwargs["max_connections"], 7)
+
+    def test_reset_and_missing_key(self):
+        """Test that reset builds a fresh client and a missing key still raises."""
+        first = groq_client.get_groq_client()
+        groq_client.reset_groq_client()
+        self.assertIsNot(groq_client.get_groq_client(), first)
+        with mock.patch.object(groq_client, "settings", dataclasses.replace(groq_client.settings, groq_api_key="")):
+            with self.assertRaises(ValueError):
+                groq_client.get_groq_client()
+
+    def test_async_client_per_event_loop(self):
+        """Test that an event loop reuses its async client and other loops get their own."""
+        async def clients():
+            return groq_client.get_async_groq_client(), groq_client.get_async_groq_client()
+        first, again = asyncio.run(clients())
+        other, _ = asyncio.run(clients())
+        self.assertIs(first, again)
+        self.assertIsNot(first, other)
+        self.assertEqual(first.timeout.read, 12.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import io
+import os
+import sys
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services import ingest_service
+from backend.services.ingest_service import IngestCache, content_hash, ingest_bytes
+from backend.storage.in_memory_store import InMemoryStore
+from backend.storage.vector_index import embed_chunk_texts, np
+from backend.utils.error_handler import StudyBuddyError
+from backend.tests.embedding_settings import enable_embeddings
+from backend.tests.pdf_factory import make_pdf
+
+NOTES = b"Recursion solves a problem by reducing it to smaller instances. " * 40
+
+class TestIngestService(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(ingest_service, "ingest_cache", IngestCache(max_docs=2))
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hash_is_streaming_and_content_based(self):
+        """Test that bytes and file objects hash identically and position is kept."""
+        stream = io.BytesIO(NOTES)
+        stream.seek(7)
+        self.assertEqual(content_hash(stream), content_hash(NOTES))
+        self.assertEqual(stream.tell(), 7)
+        self.assertNotEqual(content_hash(NOTES), content_hash(NOTES + b"!"))
+
+    def test_identical_content_ingested_once(self):
+        """Test that renamed copies of a file reuse the cached chunks."""
+        with mock.patch.object(ingest_service, "read_text_bytes", wraps=ingest_service.read_text_bytes) as reader:
+            first = ingest_bytes(NOTES, "notes.txt")
+            second = ingest_bytes(NOTES, "copy of notes.txt")
+        self.assertIs(first, second)
+        self.assertEqual(reader.call_count, 1)
+        self.assertEqual(self.cache.get_statistics(), {"docs": 1, "hits": 1, "misses": 1})
+
+        chunks = second.to_chunks("doc", "copy of notes.txt")
+        self.assertEqual(chunks[0].doc_name, "copy of notes.txt")
+        self.assertIs(chunks[0].term_counts, first.term_counts[0])
+
+    def test_same_name_different_content(self):
+        """Test that files sharing a name do not collide."""
+        a = ingest_bytes(NOTES, "notes.txt")
+        b = ingest_bytes(b"Hash tables map keys to buckets in constant time. " * 40, "notes.txt")
+        self.assertNotEqual(a.content_hash, b.content_hash)
+        self.assertNotEqual(a.chunk_texts, b.chunk_texts)
+
+    def test_lru_eviction_and_failures_not_cached(self):
+        """Test that the cache is bounded and empty documents raise."""
+        for i in range(3):
+            ingest_bytes(NOTES + str(i).encode(), "notes.txt")
+        self.assertEqual(self.cache.get_statistics()["docs"], 2)
+        with self.assertRaises(StudyBuddyError):
+            ingest_bytes(b"...", "empty.txt")
+        self.assertEqual(self.cache.get_statistics()["docs"], 2)
+
+    def test_document_is_cached_before_inflight_entry_is_released(self):
+        """Test that a key never leaves the in-flight table before its document is cached."""
+        cache = IngestCache(max_docs=2)
+        released = []
+
+        class InflightTable(dict):
+            def pop(self, key, *default):
+                released.append(key in cache._docs)
+                return super().pop(key, *default)
+
+        cache._inflight = InflightTable()
+        doc = ingest_service.IngestedDocument("k", ("text",), ({},))
+        self.assertIs(cache.get_or_ingest("k", lambda: doc), doc)
+        self.assertEqual(released, [True])
+        with self.assertRaises(ValueError):
+            cache.get_or_ingest("bad", mock.Mock(side_effect=ValueError))
+        self.assertEqual(released, [True, False])
+        self.assertEqual(dict(cache._inflight), {})
+
+    def test_chunks_carry_provenance(self):
+        """Test that PDF chunks know their pages and text files get offsets only."""
+        pdf = make_pdf(["Graphs have vertices and edges. " * 30, "", "Trees are acyclic connected graphs. " * 30])
+        chunks = ingest_bytes(pdf, "graphs.pdf").to_chunks("g", "graphs.pdf")
+        self.assertEqual(chunks[0].page_start, 1)
+        self.assertEqual(chunks[-1].page_label(), "p. 3")
+        self.assertTrue(any(c.page_start == 1 and c.page_end == 3 for c in chunks))
+
+        notes = ingest_bytes(NOTES, "notes.txt").to_chunks("n", "notes.txt")
+        self.assertIsNone(notes[0].page_start)
+        self.assertEqual(notes[0].char_start, 0)
+        self.assertLess(notes[0].char_end, notes[1].char_end)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_embeddings_computed_once_at_ingest(self):
+        """Test that chunk embeddings are batched at ingest and reused by the store."""
+        enable_embeddings(self)
+        doc = ingest_bytes(NOTES, "notes.txt")
+        self.assertEqual(doc.embeddings.shape[0], len(doc.chunk_texts))
+        np.testing.assert_allclose(doc.embeddings, embed_chunk_texts(doc.chunk_texts))
+
+        store = InMemoryStore()
+        with mock.patch("backend.storage.in_memory_store.embed_chunk_texts") as embed:
+            store.upsert_doc("n", "notes.txt", doc.to_chunks("n", "notes.txt"), embeddings=doc.embeddings)
+        embed.assert_not_called()
+        self.assertEqual(len(store.vectors), len(doc.chunk_texts))
+
+    @unittest.skipIf({"EMBEDDING_BACKEND", "RETRIEVAL_MODE"} & set(os.environ), "Embedding settings are configured")
+    def test_bm25_default_skips_embeddings(self):
+        """Test that embeddings are neither computed nor stored unless dense retrieval is configured."""
+        with mock.patch.object(ingest_service, "embed_chunk_texts") as embed:
+            doc = ingest_bytes(NOTES, "notes.txt")
+        embed.assert_not_called()
+        self.assertIsNone(doc.embeddings)
+        self.assertIsNone(InMemoryStore().vectors)
+
+if __name__ == "__main__":
+    unittest.main()
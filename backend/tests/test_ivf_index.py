@@ -0,0 +1,108 @@
+import unittest
+import dataclasses
+import os
+import sys
+import tempfile
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.storage import vector_index
+from backend.storage.in_memory_store import InMemoryStore, DocChunk
+from backend.storage.ivf_index import IVFVectorIndex
+from backend.storage.vector_index import FlatVectorIndex, load_vector_index, np
+from backend.services.retrieval_service import retrieve_top_k
+from backend.tests.embedding_settings import enable_embeddings
+
+def clustered_vectors(rng, n, dim=32, clusters=20):
+    centers = rng.standard_normal((clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestIVFVectorIndex(unittest.TestCase):
+    def setUp(self):
+        enable_embeddings(self)
+        self.rng = np.random.default_rng(5)
+        self.vectors = clustered_vectors(self.rng, 2000)
+        self.index = IVFVectorIndex(32, nlist=16, nprobe=4, train_min=500)
+        self.flat = FlatVectorIndex(32)
+        for d in range(20):
+            rows = slice(d * 100, d * 100 + 100)
+            slots = list(range(d * 100, d * 100 + 100))
+            self.index.add_doc(f"d{d}", slots, self.vectors[rows])
+            self.flat.add_doc(f"d{d}", slots, self.vectors[rows])
+
+    def recall(self, queries, k=10, nprobe=None):
+        found = 0
+        for q in queries:
+            exact = {slot for slot, _ in self.flat.search(q, k)}
+            found += len(exact & {slot for slot, _ in self.index.search(q, k, nprobe=nprobe)})
+        return found / (k * len(queries))
+
+    def test_exact_until_trained(self):
+        """Test that a small index searches exactly and trains once it reaches train_min."""
+        small = IVFVectorIndex(32, nlist=8, train_min=500)
+        small.add_doc("a", list(range(400)), self.vectors[:400])
+        self.assertIsNone(small.centroids)
+        query = self.vectors[7]
+        flat = FlatVectorIndex(32)
+        flat.add_doc("a", list(range(400)), self.vectors[:400])
+        self.assertEqual(small.search(query, 5), flat.search(query, 5))
+        small.add_doc("b", list(range(400, 600)), self.vectors[400:600])
+        self.assertEqual(len(small.centroids), 8)
+
+    def test_recall_grows_with_nprobe(self):
+        """Test that probing more clusters raises recall up to exact search."""
+        queries = self.vectors[self.rng.integers(0, 2000, 30)]
+        low, high = self.recall(queries, nprobe=1), self.recall(queries, nprobe=8)
+        self.assertLessEqual(low, high)
+        self.assertGreater(high, 0.9)
+        self.assertEqual(self.recall(queries, nprobe=16), 1.0)
+
+    def test_tombstones_hidden_and_compacted(self):
+        """Test that removed documents never come back and dead rows are reclaimed."""
+        for d in range(15):
+            self.index.remove_doc(f"d{d}")
+            self.flat.remove_doc(f"d{d}")
+        self.assertEqual(len(self.index), 500)
+        self.assertLess(self.index._size, 2000)  # compacted once dead rows outnumbered live ones
+        for q in self.vectors[:50]:
+            self.assertTrue(all(slot >= 1500 for slot, _ in self.index.search(q, 10, nprobe=16)))
+        self.assertEqual(sorted(self.index.slots.tolist()), list(range(1500, 2000)))
+        query = self.vectors[1700]
+        self.assertEqual(self.index.search(query, 10, nprobe=16), self.flat.search(query, 10))
+
+    def test_save_and_load_round_trip(self):
+        """Test that a saved index reloads with the same clusters and results."""
+        self.index.remove_doc("d3")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "vectors.npz")
+            self.index.save(path)
+            loaded = load_vector_index(path)
+        self.assertIsInstance(loaded, IVFVectorIndex)
+        self.assertEqual(len(loaded), 1900)
+        np.testing.assert_array_equal(loaded.centroids, self.index.centroids)
+        for q in self.vectors[:20]:
+            self.assertEqual(loaded.search(q, 5), self.index.search(q, 5))
+        loaded.add_doc("d3", list(range(300, 400)), self.vectors[300:400])
+        self.assertEqual(loaded.search(self.vectors[350], 1)[0][0], 350)
+
+    def test_store_uses_configured_index(self):
+        """Test that VECTOR_INDEX=ivf gives stores an IVF index that dense retrieval uses."""
+        ivf_settings = dataclasses.replace(vector_index.settings, vector_index="ivf")
+        with mock.patch.object(vector_index, "settings", ivf_settings):
+            store = InMemoryStore()
+        self.assertIsInstance(store.vectors, IVFVectorIndex)
+        store.upsert_doc("d", "net.pdf", [
+            DocChunk(doc_id="d", doc_name="net.pdf", chunk_id=0, text="Routers forward packets between networks."),
+            DocChunk(doc_id="d", doc_name="net.pdf", chunk_id=1, text="Switches learn MAC addresses."),
+        ])
+        results = retrieve_top_k("packet forwarding router", [], top_k=1, store=store, mode="dense")
+        self.assertEqual(results[0][0].chunk_id, 0)
+        with self.assertRaises(ValueError):
+            vector_index.create_vector_index("hnsw")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,9 +6,10 @@ import sys
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from backend.loaders.pdf_loader import read_pdf_bytes, validate_pdf_integrity
+from backend.loaders.pdf_loader import iter_pdf_pages, read_pdf_bytes, validate_pdf_integrity
 from backend.utils.error_handler import PDFProcessingError
 from backend.utils.file_validator import FileValidationError
+from backend.tests.pdf_factory import make_pdf
 
 class TestPDFLoader(unittest.TestCase):
     def test_empty_pdf_validation(self):
@@ -29,9 +30,35 @@ class TestPDFLoader(unittest.TestCase):
         with self.assertRaises(FileValidationError):
             read_pdf_bytes(large_content, max_size_mb=1.0)
 
-    # Note: We can't easily test valid PDF parsing without a real PDF file
-    # unless we mock pypdf or create a valid minimal PDF.
-    # For now, we test the validation logic which was a source of errors.
+    def test_parallel_extraction_matches_sequential(self):
+        """Test that process-pool extraction keeps page order, progress and failures."""
+        pages = [f"Page {i} explains topic number {i} in detail." for i in range(25)]
+        pages[7] = ""  # a page without text is tracked as failed, not fatal
+        pdf = make_pdf(pages)
+
+        sequential = read_pdf_bytes(pdf, max_size_mb=1.0, batch_size=4)
+        progress = []
+        parallel = read_pdf_bytes(pdf, max_size_mb=1.0, batch_size=4, workers=2,
+                                  progress_callback=lambda cur, total: progress.append((cur, total)))
+
+        self.assertEqual(parallel, sequential)
+        self.assertLess(parallel.index("topic number 3 "), parallel.index("topic number 20 "))
+        self.assertNotIn("number 7 ", parallel)
+        self.assertEqual(progress[-1], (25, 25))
+        self.assertEqual(progress, sorted(progress))
+
+    def test_iter_pdf_pages_is_lazy(self):
+        """Test that pages are extracted only as the consumer asks for them."""
+        pdf = make_pdf([f"Page {i} covers chapter {i} of the course." for i in range(5)])
+        progress = []
+        pages = iter_pdf_pages(pdf, max_size_mb=1.0, progress_callback=lambda cur, total: progress.append(cur))
+
+        number, text = next(pages)
+        self.assertEqual(number, 1)
+        self.assertIn("chapter 0", text)
+        self.assertEqual(progress, [1])
+        self.assertEqual(len(list(pages)), 4)
+        self.assertEqual(progress, [1, 2, 3, 4, 5])
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import dataclasses
+import os
+import sys
+import tempfile
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.storage import vector_index
+from backend.storage.in_memory_store import InMemoryStore, DocChunk
+from backend.storage.quantized_index import QuantizedVectorIndex
+from backend.storage.sqlite_store import SQLiteStore
+from backend.storage.vector_index import FlatVectorIndex, load_vector_index, np
+from backend.services.retrieval_service import retrieve_top_k
+from backend.tests.embedding_settings import enable_embeddings
+
+DIM = 64
+
+def clustered_vectors(rng, n, dim=DIM, clusters=20):
+    centers = rng.standard_normal((clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def make_chunks(doc_id, texts):
+    return [DocChunk(doc_id=doc_id, doc_name=f"{doc_id}.pdf", chunk_id=i, text=t) for i, t in enumerate(texts)]
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestQuantizedVectorIndex(unittest.TestCase):
+    def setUp(self):
+        enable_embeddings(self)
+        self.rng = np.random.default_rng(9)
+        self.vectors = clustered_vectors(self.rng, 2000)
+        self.flat = FlatVectorIndex(DIM)
+        self.int8 = QuantizedVectorIndex(DIM, method="int8")
+        self.pq = QuantizedVectorIndex(DIM, method="pq", subspaces=16, train_min=500)
+        for d in range(20):
+            slots = list(range(d * 100, d * 100 + 100))
+            for index in (self.flat, self.int8, self.pq):
+                index.add_doc(f"d{d}", slots, self.vectors[slots])
+
+    def reranked_recall(self, index, queries, k=10, candidates=8):
+        """Recall@k after re-scoring index candidates with the exact vectors."""
+        found = 0
+        for q in queries:
+            exact = {slot for slot, _ in self.flat.search(q, k)}
+            slots = [slot for slot, _ in index.search(q, k * candidates)]
+            rescored = sorted(slots, key=lambda slot: -float(self.vectors[slot] @ q))[:k]
+            found += len(exact & set(rescored))
+        return found / (k * len(queries))
+
+    def test_memory_reduction(self):
+        """Test that int8 codes are about 4x and PQ codes 16x smaller than float32 rows."""
+        self.assertTrue(self.pq.trained)
+        self.assertEqual(self.pq._pq.shape[0], DIM * 4 // 16)   # bytes per row: dim x 4 / 16
+        self.assertGreater(self.flat.memory_bytes() / self.int8.memory_bytes(), 3)
+        self.assertGreater(self.flat.memory_bytes() / self.pq.memory_bytes(), 5)
+
+    def test_reranked_recall(self):
+        """Test that approximate scores are close and re-ranked candidates recover the exact top_k."""
+        queries = self.vectors[self.rng.integers(0, 2000, 30)]
+        for q in queries[:5]:
+            exact = dict(self.flat.search(q, 5))
+            for slot, score in self.int8.search(q, 5):
+                self.assertAlmostEqual(score, float(self.vectors[slot] @ q), delta=0.02)
+            self.assertIn(next(iter(exact)), dict(self.int8.search(q, 5)))
+        self.assertGreater(self.reranked_recall(self.int8, queries), 0.99)
+        self.assertGreater(self.reranked_recall(self.pq, queries), 0.9)
+
+    def test_remove_and_replace(self):
+        """Test that removed rows disappear and replaced documents take their new codes."""
+        for index in (self.int8, self.pq):
+            index.remove_doc("d3")
+            index.add_doc("d5", list(range(500, 600)), self.vectors[300:400])
+            self.assertEqual(len(index), 1900)
+            self.assertNotIn(350, index.slots.tolist())
+            self.assertEqual(index.search(self.vectors[350], 1)[0][0], 550)
+
+    def test_save_and_load_round_trip(self):
+        """Test that saved int8 and PQ indexes reload with identical results."""
+        with tempfile.TemporaryDirectory() as tmp:
+            for index in (self.int8, self.pq):
+                path = os.path.join(tmp, f"{index.kind}.npz")
+                index.save(path)
+                loaded = load_vector_index(path)
+                self.assertIsInstance(loaded, QuantizedVectorIndex)
+                self.assertEqual((loaded.kind, loaded.trained, len(loaded)), (index.kind, index.trained, 2000))
+                for q in self.vectors[:10]:
+                    self.assertEqual(loaded.search(q, 5), index.search(q, 5))
+
+    def test_invalid_configuration(self):
+        """Test that unknown methods and indivisible subspaces are rejected."""
+        with self.assertRaises(ValueError):
+            QuantizedVectorIndex(DIM, method="opq")
+        with self.assertRaises(ValueError):
+            QuantizedVectorIndex(DIM, method="pq", subspaces=24)
+
+    def test_stores_rerank_exactly(self):
+        """Test that VECTOR_INDEX=pq stores return exact similarities and persist their codes."""
+        pq_settings = dataclasses.replace(vector_index.settings, vector_index="pq")
+        texts = ["Routers forward packets between networks.", "Switches learn MAC addresses."]
+        with mock.patch.object(vector_index, "settings", pq_settings), tempfile.TemporaryDirectory() as tmp:
+            store, sqlite_store = InMemoryStore(), SQLiteStore(os.path.join(tmp, "store.sqlite3"))
+            self.assertIsInstance(store.vectors, QuantizedVectorIndex)
+            store.upsert_doc("d", "d.pdf", make_chunks("d", texts))
+            sqlite_store.upsert_doc("d", "d.pdf", make_chunks("d", texts))
+            results = retrieve_top_k("packet forwarding router", [], top_k=1, store=store, mode="dense")
+            self.assertEqual(results[0][0].chunk_id, 0)
+
+            self.assertEqual(sqlite_store.vectors.kind, "pq")
+            sqlite_store.close()
+            reopened = SQLiteStore(os.path.join(tmp, "store.sqlite3"))
+            with mock.patch("backend.storage.sqlite_store.embed_chunk_texts") as embed:
+                self.assertEqual(reopened.vectors.kind, "pq")
+            embed.assert_not_called()
+            reloaded = retrieve_top_k("packet forwarding router", [], top_k=1, store=reopened, mode="dense")
+            reopened.close()
+        # Re-ranking restores the exact cosine similarity of the float32 embeddings
+        reference = InMemoryStore()
+        reference.upsert_doc("d", "d.pdf", make_chunks("d", texts))
+        exact = retrieve_top_k("packet forwarding router", [], top_k=1, store=reference, mode="dense")
+        self.assertAlmostEqual(results[0][1], exact[0][1], places=5)
+        self.assertAlmostEqual(reloaded[0][1], exact[0][1], places=5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,291 @@
+import unittest
+import gc
+import random
+import sys
+import os
+import threading
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.storage.in_memory_store import InMemoryStore, DocChunk
+from backend.storage.columnar_store import ColumnarStore
+from backend.storage.vector_index import FlatVectorIndex, np
+from backend.services import retrieval_service
+from backend.services.retrieval_service import fuse_rankings, retrieve_top_k, score_bm25_maxscore, score_bm25_postings
+from backend.utils.tokenizer import encode_query, vocabulary
+from backend.tests.embedding_settings import enable_embeddings
+
+def make_chunks(doc_id, doc_name, texts):
+    return [DocChunk(doc_id=doc_id, doc_name=doc_name, chunk_id=i, text=t) for i, t in enumerate(texts)]
+
+class TestInvertedIndexRetrieval(unittest.TestCase):
+    def setUp(self):
+        self.store = InMemoryStore()
+        self.store.upsert_doc("d1", "algo.pdf", make_chunks("d1", "algo.pdf", [
+            "Binary search runs in logarithmic time.",
+            "Merge sort is a stable divide and conquer algorithm.",
+        ]))
+        self.store.upsert_doc("d2", "net.pdf", make_chunks("d2", "net.pdf", [
+            "TCP provides reliable ordered delivery.",
+            "Binary trees support search in logarithmic time when balanced.",
+        ]))
+
+    def test_only_matching_chunks_returned(self):
+        """Test that retrieval returns chunks sharing query terms, best first."""
+        results = retrieve_top_k("binary search time", [], top_k=5, store=self.store, mode="keyword")
+        names = [(ch.doc_name, ch.chunk_id) for ch, _ in results]
+        self.assertEqual(names, [("algo.pdf", 0), ("net.pdf", 1)])
+        self.assertEqual(results[0][1], 3.0)
+
+    def test_remove_doc_updates_index(self):
+        """Test that removed documents disappear from the posting lists."""
+        self.store.remove_doc("d2")
+        results = retrieve_top_k("tcp binary", [], top_k=5, store=self.store)
+        self.assertEqual([ch.doc_id for ch, _ in results], ["d1"])
+        self.assertNotIn(vocabulary.get("tcp"), self.store.index.postings)
+
+    def test_removed_terms_leave_the_vocabulary(self):
+        """Test that terms of removed documents are forgotten and their ids reused."""
+        self.store.upsert_doc("d3", "rare.pdf", make_chunks("d3", "rare.pdf", ["Quaternions xyzzyplugh rotations."]))
+        self.store.upsert_doc("d4", "also.pdf", make_chunks("d4", "also.pdf", ["Quaternions compose rotations."]))
+        term_id, size = vocabulary.get("xyzzyplugh"), len(vocabulary)
+        self.assertIsNotNone(term_id)
+        self.store.remove_doc("d3")
+        gc.collect()
+        self.assertIsNone(vocabulary.get("xyzzyplugh"))
+        self.assertEqual(len(vocabulary), size - 1)
+        self.assertEqual(len(retrieve_top_k("quaternions", [], top_k=5, store=self.store)), 1)
+
+        self.store.upsert_doc("d5", "new.pdf", make_chunks("d5", "new.pdf", ["Octonions plughxyzzy."]))
+        self.assertIn(term_id, {vocabulary.get("octonions"), vocabulary.get("plughxyzzy")})
+        self.assertEqual(len(vocabulary), size + 1)
+
+    def test_upsert_replaces_previous_chunks(self):
+        """Test that re-upserting a document reindexes it."""
+        self.store.upsert_doc("d1", "algo.pdf", make_chunks("d1", "algo.pdf", ["Quicksort partitions around a pivot."]))
+        self.assertEqual(retrieve_top_k("merge", [], top_k=5, store=self.store), [])
+        self.assertEqual(len(retrieve_top_k("pivot", [], top_k=5, store=self.store)), 1)
+
+class TestBM25Retrieval(unittest.TestCase):
+    def setUp(self):
+        self.store = InMemoryStore()
+        self.store.upsert_doc("d1", "notes.pdf", make_chunks("d1", "notes.pdf", [
+            "The heap property keeps the smallest element at the root of the heap.",
+            "The the the the the algorithm algorithm and the data the structure the.",
+            "Sorting algorithms compare elements.",
+        ]))
+
+    def test_rare_terms_outrank_common_terms(self):
+        """Test that BM25 prefers the chunk matching the rare query term."""
+        results = retrieve_top_k("the heap", [], top_k=3, store=self.store, mode="bm25")
+        self.assertEqual(results[0][0].chunk_id, 0)
+
+    def test_statistics_follow_add_and_remove(self):
+        """Test that document frequency and average length are kept incrementally."""
+        index = self.store.index
+        algorithm = vocabulary.get("algorithm")
+        self.assertEqual(index.doc_freq(algorithm), 1)
+        self.store.upsert_doc("d2", "more.pdf", make_chunks("d2", "more.pdf", ["Another algorithm here."]))
+        self.assertEqual(index.doc_freq(algorithm), 2)
+        self.store.remove_doc("d2")
+        self.assertEqual(index.doc_freq(algorithm), 1)
+        self.assertEqual(index.total_length, sum(index.chunk_lengths.values()))
+
+    def test_chunk_list_matches_store(self):
+        """Test that BM25 over a plain chunk list ranks like the indexed store."""
+        chunks = self.store.get_chunks("d1")
+        from_list = retrieve_top_k("heap algorithm", chunks, top_k=3, mode="bm25")
+        from_store = retrieve_top_k("heap algorithm", [], top_k=3, store=self.store, mode="bm25")
+        self.assertEqual(from_list, from_store)
+
+    def test_sparse_engine_matches_bm25(self):
+        """Test that the CSR engine ranks like posting-list BM25."""
+        bm25 = retrieve_top_k("heap algorithm elements", [], top_k=3, store=self.store, mode="bm25")
+        sparse = retrieve_top_k("heap algorithm elements", [], top_k=3, store=self.store, mode="sparse")
+        self.assertEqual([ch for ch, _ in sparse], [ch for ch, _ in bm25])
+        for (_, a), (_, b) in zip(sparse, bm25):
+            self.assertAlmostEqual(a, b, places=4)
+
+    def test_sparse_engine_rebuilt_after_changes(self):
+        """Test that the cached CSR snapshot tracks store mutations."""
+        retrieve_top_k("heap", [], top_k=3, store=self.store, mode="sparse")
+        self.store.upsert_doc("d2", "trees.pdf", make_chunks("d2", "trees.pdf", ["A treap mixes a heap with a tree."]))
+        results = retrieve_top_k("treap", [], top_k=3, store=self.store, mode="sparse")
+        self.assertEqual([ch.doc_id for ch, _ in results], ["d2"])
+
+    def test_unknown_mode_rejected(self):
+        with self.assertRaises(ValueError):
+            retrieve_top_k("heap", [], top_k=3, store=self.store, mode="fuzzy")
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestDenseRetrieval(unittest.TestCase):
+    def setUp(self):
+        enable_embeddings(self)
+        self.texts = [
+            "Quicksort partitions the array around a pivot element.",
+            "Hash tables resolve collisions with chaining or probing.",
+            "TCP retransmits segments that are not acknowledged.",
+        ]
+        self.store = InMemoryStore()
+        self.store.upsert_doc("d1", "cs.pdf", make_chunks("d1", "cs.pdf", self.texts))
+
+    def test_finds_chunks_without_exact_terms(self):
+        """Test that word-form variants match where keyword retrieval finds nothing."""
+        query = "retransmission of unacknowledged data"
+        self.assertEqual(retrieve_top_k(query, [], top_k=3, store=self.store, mode="keyword"), [])
+        results = retrieve_top_k(query, [], top_k=1, store=self.store, mode="dense")
+        self.assertEqual(results[0][0].chunk_id, 2)
+        self.assertEqual(retrieve_top_k("the and of", [], top_k=3, store=self.store, mode="dense"), [])
+
+    def test_chunk_list_and_stores_agree(self):
+        """Test that ad-hoc, in-memory and columnar dense retrieval rank alike."""
+        columnar = ColumnarStore()
+        columnar.upsert_doc("d1", "cs.pdf", make_chunks("d1", "cs.pdf", self.texts))
+        query = "acknowledged segment retransmission"
+        from_store = retrieve_top_k(query, [], top_k=3, store=self.store, mode="dense")
+        from_list = retrieve_top_k(query, self.store.get_chunks("d1"), top_k=3, mode="dense")
+        from_columnar = retrieve_top_k(query, [], top_k=3, store=columnar, mode="dense")
+        self.assertEqual(from_list, from_store)
+        self.assertEqual([(ch.chunk_id, s) for ch, s in from_columnar], [(ch.chunk_id, s) for ch, s in from_store])
+
+    def test_vectors_follow_upsert_and_remove(self):
+        """Test that the embedding matrix stays aligned with the inverted index."""
+        self.store.upsert_doc("d2", "net.pdf", make_chunks("d2", "net.pdf", ["UDP datagrams are never retransmitted."]))
+        self.store.remove_doc("d1")
+        vectors = self.store.vectors
+        self.assertEqual(len(vectors), 1)
+        self.assertEqual(vectors.slots.tolist(), self.store.index.doc_slots["d2"])
+        results = retrieve_top_k("retransmission", [], top_k=3, store=self.store, mode="dense")
+        self.assertEqual([ch.doc_id for ch, _ in results], ["d2"])
+
+    def test_flat_index_matches_brute_force(self):
+        """Test exact top_k against a full sort, with growth and compaction."""
+        rng = np.random.default_rng(3)
+        index = FlatVectorIndex(16)
+        all_vectors = {}
+        for d in range(10):
+            vectors = rng.standard_normal((30, 16)).astype(np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            slots = list(range(d * 30, d * 30 + 30))
+            index.add_doc(f"d{d}", slots, vectors)
+            all_vectors.update(zip(slots, vectors))
+        for d in (2, 7):
+            index.remove_doc(f"d{d}")
+            for slot in range(d * 30, d * 30 + 30):
+                del all_vectors[slot]
+
+        query = all_vectors[95]
+        expected = sorted(((slot, float(v @ query)) for slot, v in all_vectors.items()), key=lambda x: (-x[1], x[0]))
+        expected = [(slot, score) for slot, score in expected if score > 0][:10]
+        found = index.search(query, 10)
+        self.assertEqual([slot for slot, _ in found], [slot for slot, _ in expected])
+        self.assertEqual(found[0][0], 95)
+        with self.assertRaises(ValueError):
+            index.add_doc("bad", [0], np.zeros((1, 8), dtype=np.float32))
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestHybridRetrieval(unittest.TestCase):
+    def setUp(self):
+        enable_embeddings(self)
+        self.chunks = make_chunks("d1", "ml.pdf", [
+            "The update rule is theta_new = theta - alpha * grad_J.",
+            "Gradient descent repeatedly steps downhill along the negative gradient.",
+            "Regularization penalizes large weights to reduce overfitting.",
+        ])
+        self.store = InMemoryStore()
+        self.store.upsert_doc("d1", "ml.pdf", self.chunks)
+
+    def test_rrf_rewards_agreement(self):
+        """Test that reciprocal-rank fusion ranks chunks found by both retrievers first."""
+        a, b, c = self.chunks
+        fused = fuse_rankings([[(a, 9.0), (b, 5.0)], [(b, 0.9), (c, 0.8)]], top_k=3, fusion="rrf", rrf_k=60)
+        self.assertEqual([ch.chunk_id for ch, _ in fused], [1, 0, 2])
+        self.assertAlmostEqual(fused[0][1], 1 / 62 + 1 / 61)
+        self.assertAlmostEqual(fused[1][1], 1 / 61)
+
+    def test_weighted_fusion_normalizes_scores(self):
+        """Test that weighted fusion is scale-free and honours the weights."""
+        a, b, c = self.chunks
+        lexical = [(a, 12.0), (b, 2.0)]
+        dense = [(c, 0.3), (b, 0.2), (a, 0.1)]
+        fused = fuse_rankings([lexical, dense], top_k=3, fusion="weighted", weights=[0.7, 0.3])
+        self.assertEqual([ch.chunk_id for ch, _ in fused], [0, 2, 1])
+        self.assertAlmostEqual(fused[0][1], 0.7)
+        self.assertAlmostEqual(fused[2][1], 0.15)
+        with self.assertRaises(ValueError):
+            fuse_rankings([lexical], top_k=1, fusion="max")
+
+    def test_hybrid_covers_both_retrievers_and_reports_latency(self):
+        """Test that hybrid returns exact-term and semantic matches, timed per retriever."""
+        timings = {}
+        results = retrieve_top_k("grad_J descending gradients", [], top_k=2, store=self.store, mode="hybrid", timings=timings)
+        self.assertEqual({ch.chunk_id for ch, _ in results}, {0, 1})
+        self.assertEqual(set(timings), {"bm25", "dense", "fusion"})
+        self.assertTrue(all(ms >= 0 for ms in timings.values()))
+
+        from_list = retrieve_top_k("grad_J descending gradients", self.chunks, top_k=2, mode="hybrid")
+        self.assertEqual(from_list, results)
+
+    def test_retrievers_run_on_the_pool(self):
+        """Test that both retrievers run on the shared thread pool."""
+        threads = []
+        dense = retrieval_service.retrieve_dense
+        def record(*args):
+            threads.append(threading.current_thread().name)
+            return dense(*args)
+        with mock.patch.object(retrieval_service, "retrieve_dense", side_effect=record):
+            retrieve_top_k("gradient", [], top_k=2, store=self.store, mode="hybrid")
+        self.assertTrue(threads[0].startswith("retrieval"))
+
+    def test_falls_back_to_lexical_without_embeddings(self):
+        """Test that hybrid ranks like bm25 instead of failing when there are no chunk embeddings."""
+        enable_embeddings(self, "none")
+        store = InMemoryStore()
+        store.upsert_doc("d1", "ml.pdf", self.chunks)
+        self.assertIsNone(store.vectors)
+        timings = {}
+        results = retrieve_top_k("gradient descent", [], top_k=2, store=store, mode="hybrid", timings=timings)
+        self.assertEqual(results, retrieve_top_k("gradient descent", [], top_k=2, store=store, mode="bm25"))
+        self.assertEqual(set(timings), {"bm25"})
+        from_list = retrieve_top_k("gradient descent", self.chunks, top_k=2, mode="hybrid")
+        self.assertEqual(from_list, retrieve_top_k("gradient descent", self.chunks, top_k=2, mode="bm25"))
+
+class TestTopKSelection(unittest.TestCase):
+    def test_maxscore_matches_exhaustive_bm25(self):
+        """Test that early termination returns the same top_k as full scoring."""
+        rng = random.Random(7)
+        vocab = [f"word{i}" for i in range(300)]
+        weights = [1.0 / (i + 1) for i in range(300)]
+        store = InMemoryStore()
+        for d in range(20):
+            texts = [" ".join(rng.choices(vocab, weights=weights, k=rng.randint(5, 60))) for _ in range(25)]
+            store.upsert_doc(f"d{d}", f"doc{d}.pdf", make_chunks(f"d{d}", f"doc{d}.pdf", texts))
+        store.remove_doc("d3")
+
+        for _ in range(50):
+            query = encode_query(" ".join(rng.sample(vocab[:100], 1) + rng.sample(vocab, 3)))
+            for k in (1, 5, 15):
+                full = score_bm25_postings(query, store.index)
+                expected = sorted(full.items(), key=lambda x: (-x[1], x[0]))[:k]
+                fast = score_bm25_maxscore(query, store.index, k)
+                self.assertEqual([slot for slot, _ in fast], [slot for slot, _ in expected])
+                for (_, a), (_, b) in zip(fast, expected):
+                    self.assertAlmostEqual(a, b, places=9)
+
+    def test_linear_scan_keeps_order_on_ties(self):
+        """Test that heap selection in the scan path keeps chunk order for equal scores."""
+        chunks = make_chunks("d", "d.pdf", ["alpha one", "beta", "alpha two", "alpha three"])
+        results = retrieve_top_k("alpha", chunks, top_k=2, mode="keyword")
+        self.assertEqual([ch.chunk_id for ch, _ in results], [0, 2])
+
+    def test_chunks_without_term_counts_are_tokenized_once(self):
+        """Test that a chunk built without term counts caches them on first retrieval."""
+        chunks = make_chunks("d", "d.pdf", ["Graphs have vertices and edges."])
+        self.assertIsNone(chunks[0].term_counts)
+        retrieve_top_k("vertices", chunks, top_k=1, mode="keyword")
+        self.assertIn(vocabulary.get("vertices"), chunks[0].term_counts)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+import os
+import sys
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services import chat_service
+from backend.services import semantic_cache as semantic_cache_module
+from backend.services.answer_cache import AnswerCache
+from backend.services.semantic_cache import SemanticCache, document_scope
+from backend.storage.in_memory_store import DocChunk
+from backend.utils.embeddings import QUESTION_STOPWORDS, HashingEmbedder, np
+
+OPTIONS = {"temperature": 0.6, "max_tokens": 1500}
+SCOPE = document_scope(["doc-a"], "llama", OPTIONS)
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestSemanticCache(unittest.TestCase):
+    def test_paraphrases_are_close_and_topics_are_not(self):
+        """Test that the hashing embedder separates rewording from a different topic."""
+        embed = HashingEmbedder().embed
+        self.assertAlmostEqual(float(np.linalg.norm(embed("what is recursion"))), 1.0, places=5)
+        self.assertGreater(float(embed("What is big-O?") @ embed("what is big O notation")), 0.9)
+        self.assertGreater(float(embed("Explain quicksort") @ embed("Can you please explain quicksort?")), 0.9)
+        self.assertLess(float(embed("how does quicksort work") @ embed("how does merge sort work")), 0.6)
+        self.assertFalse(embed("is it the?").any())
+
+    def test_different_intent_or_negation_misses(self):
+        """Test that questions differing in interrogative, intent, negation or topic stay below the threshold."""
+        cache = SemanticCache(max_entries=8)
+        pairs = [
+            ("why is TCP reliable", "how is TCP reliable"),
+            ("define a stack", "give an example of a stack"),
+            ("is heapsort stable", "is heapsort not stable"),
+            ("is heapsort stable", "isn't heapsort stable?"),
+            ("binary search tree", "binary tree"),
+        ]
+        for asked, other in pairs:
+            cache.add(asked, SCOPE, {"answer": asked})
+            self.assertIsNone(cache.lookup(other, SCOPE), other)
+        self.assertGreaterEqual(cache.threshold, 0.9)  # the default stays conservative
+        negating = HashingEmbedder(stopwords=QUESTION_STOPWORDS, negation=True).embed
+        self.assertLess(float(negating("is heapsort stable") @ negating("is heapsort not stable")), 0.5)
+        self.assertGreater(float(negating("is heapsort not stable") @ negating("Is heapsort not stable?")), 0.99)
+
+    def test_lookup_respects_threshold_and_scope(self):
+        """Test that only a close question in the same scope hits."""
+        cache = SemanticCache(max_entries=4, threshold=0.9)
+        cache.add("How does the quicksort algorithm work?", SCOPE, {"answer": "Partition around a pivot."})
+
+        hit = cache.lookup("How does quicksort work?", SCOPE)
+        self.assertIsNotNone(hit)
+        self.assertEqual(hit.result["answer"], "Partition around a pivot.")
+        self.assertEqual(hit.question, "How does the quicksort algorithm work?")
+        self.assertIsNone(cache.lookup("how does merge sort work?", SCOPE))
+        other_docs = document_scope(["doc-a", "doc-b"], "llama", OPTIONS)
+        self.assertIsNone(cache.lookup("How does quicksort work?", other_docs))
+        self.assertEqual(cache.get_statistics(), {"entries": 1, "hits": 1, "misses": 2})
+
+    def test_memory_is_bounded_and_entries_expire(self):
+        """Test LRU replacement at capacity and TTL expiry."""
+        cache = SemanticCache(max_entries=2, threshold=0.9, ttl_s=60)
+        cache.add("what is recursion", SCOPE, {"answer": "r"})
+        cache.add("what is a hash table", SCOPE, {"answer": "h"})
+        self.assertIsNotNone(cache.lookup("What is recursion?", SCOPE))  # refreshes recursion
+        cache.add("what is a binary heap", SCOPE, {"answer": "b"})      # replaces hash table
+
+        self.assertEqual(cache.get_statistics()["entries"], 2)
+        self.assertIsNone(cache.lookup("what is a hash table", SCOPE))
+        self.assertIsNotNone(cache.lookup("What is a binary heap?", SCOPE))
+        later = semantic_cache_module.time.time() + 61
+        with mock.patch.object(semantic_cache_module.time, "time", return_value=later):
+            self.assertIsNone(cache.lookup("what is recursion", SCOPE))
+
+    def test_scope_ids_are_never_reused(self):
+        """Test that a new document set never inherits the answers of a pruned scope."""
+        cache = SemanticCache(max_entries=2, threshold=0.9)
+        scopes = [document_scope([name], "llama", OPTIONS) for name in "ABCD"]
+        for scope, answer in zip(scopes[:3], "abc"):
+            cache.add("what is recursion", scope, {"answer": answer})
+        self.assertEqual(cache.lookup("what is recursion", scopes[2]).result["answer"], "c")
+        self.assertIsNone(cache.lookup("what is recursion", scopes[3]))
+        cache.add("what is a stack", scopes[3], {"answer": "d"})
+        self.assertIsNone(cache.lookup("what is recursion", scopes[3]))
+        self.assertEqual(cache.lookup("what is recursion", scopes[2]).result["answer"], "c")
+
+    def test_chat_service_reuses_answer_for_paraphrase(self):
+        """Test that a paraphrased question skips retrieval and Groq."""
+        chunks = [DocChunk(doc_id="d", doc_name="sorting.pdf", chunk_id=0, text="Quicksort partitions around a pivot.")]
+        client = mock.Mock()
+        client.chat.completions.create.return_value.choices = [mock.Mock(message=mock.Mock(content="Pivot."))]
+        with mock.patch.object(chat_service, "answer_cache", AnswerCache(max_entries=0, path=None)), \
+                mock.patch.object(chat_service, "semantic_cache", SemanticCache(max_entries=8, threshold=0.9)), \
+                mock.patch.object(chat_service, "get_groq_client", return_value=client):
+            first = chat_service.answer_question_from_docs("Explain quicksort", all_chunks=chunks)
+            with mock.patch.object(chat_service, "prepare_messages", side_effect=AssertionError("retrieved")):
+                again = chat_service.answer_question_from_docs("Can you explain quicksort?", all_chunks=chunks)
+                streamed = chat_service.stream_answer_from_docs("Please explain quicksort.", all_chunks=chunks)
+            other_docs = chat_service.answer_question_from_docs("Explain quicksort", all_chunks=chunks[:0])
+
+        self.assertFalse(first["cached"])
+        self.assertTrue(again["cached"])
+        self.assertEqual(again["answer"], "Pivot.")
+        self.assertEqual(again["similar_question"], "Explain quicksort")
+        self.assertEqual(again["used_excerpts"], first["used_excerpts"])
+        self.assertEqual("".join(streamed["answer_stream"]), "Pivot.")
+        self.assertFalse(other_docs["cached"])
+        self.assertEqual(client.chat.completions.create.call_count, 2)
+
+    def test_retrieval_settings_are_part_of_the_scope(self):
+        """Test that asking again with another top_k or ranking mode calls Groq again."""
+        chunks = [
+            DocChunk(doc_id="d", doc_name="sorting.pdf", chunk_id=i, text=f"Quicksort partitions around pivot {i}.")
+            for i in range(4)
+        ]
+        client = mock.Mock()
+        client.chat.completions.create.return_value.choices = [mock.Mock(message=mock.Mock(content="Pivot."))]
+        with mock.patch.object(chat_service, "answer_cache", AnswerCache(max_entries=0, path=None)), \
+                mock.patch.object(chat_service, "semantic_cache", SemanticCache(max_entries=8, threshold=0.9)), \
+                mock.patch.object(chat_service, "get_groq_client", return_value=client):
+            first = chat_service.answer_question_from_docs("Explain quicksort", all_chunks=chunks, top_k=2, mode="bm25")
+            more = chat_service.answer_question_from_docs("Explain quicksort", all_chunks=chunks, top_k=4, mode="bm25")
+            keyword = chat_service.answer_question_from_docs("Explain quicksort", all_chunks=chunks, top_k=2, mode="keyword")
+            again = chat_service.answer_question_from_docs("Explain quicksort", all_chunks=chunks, top_k=2, mode="bm25")
+
+        self.assertNotIn("similar_question", more)
+        self.assertNotIn("similar_question", keyword)
+        self.assertGreater(len(more["used_excerpts"]), len(first["used_excerpts"]))
+        self.assertTrue(again["cached"])
+        self.assertEqual(client.chat.completions.create.call_count, 3)
+
+if __name__ == "__main__":
+    unittest.main()
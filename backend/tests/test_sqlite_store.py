@@ -0,0 +1,205 @@
+import unittest
+import dataclasses
+import os
+import sys
+import sqlite3
+import tempfile
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.storage import factory
+from backend.storage.sqlite_store import SQLiteStore
+from backend.storage.in_memory_store import InMemoryStore, DocChunk
+from backend.services.retrieval_service import retrieve_top_k
+from backend.tests.embedding_settings import enable_embeddings
+
+def make_chunks(doc_id, doc_name, texts):
+    return [DocChunk(doc_id=doc_id, doc_name=doc_name, chunk_id=i, text=t) for i, t in enumerate(texts)]
+
+class TestSQLiteStore(unittest.TestCase):
+    def setUp(self):
+        enable_embeddings(self)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "store.sqlite3")
+        self.store = SQLiteStore(self.path)
+        self.store.upsert_doc("d1", "os.pdf", make_chunks("d1", "os.pdf", [
+            "Processes own address spaces; threads share them.",
+            "A mutex serializes access to shared state.",
+        ]))
+        self.store.upsert_doc("d2", "db.pdf", make_chunks("d2", "db.pdf", [
+            "Transactions are atomic, consistent, isolated and durable.",
+        ]))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def reopen(self):
+        self.store.close()
+        self.store = SQLiteStore(self.path)
+
+    def test_documents_survive_reopen(self):
+        """Test that documents and chunks persist across store instances."""
+        self.reopen()
+        self.assertEqual(self.store.list_docs(), [("d1", "os.pdf"), ("d2", "db.pdf")])
+        self.assertEqual([c.text for c in self.store.get_chunks("d1")][1], "A mutex serializes access to shared state.")
+        self.assertEqual(self.store.get_statistics()["total_chunks"], 3)
+
+    def test_provenance_persists_and_old_files_migrate(self):
+        """Test that page/offset columns round-trip and are added to pre-existing files."""
+        chunks = make_chunks("d4", "algo.pdf", ["Dijkstra finds shortest paths with a heap."])
+        chunks[0].page_start, chunks[0].page_end, chunks[0].char_start, chunks[0].char_end = 2, 3, 80, 122
+        self.store.upsert_doc("d4", "algo.pdf", chunks)
+        self.reopen()
+        stored = self.store.get_chunks("d4")[0]
+        self.assertEqual((stored.page_start, stored.page_end, stored.char_start, stored.char_end), (2, 3, 80, 122))
+
+        old_path = os.path.join(self.tmp.name, "old.sqlite3")
+        conn = sqlite3.connect(old_path)
+        conn.executescript(
+            "CREATE TABLE docs (doc_id TEXT PRIMARY KEY, doc_name TEXT NOT NULL, seq INTEGER NOT NULL);"
+            "CREATE TABLE chunks (slot INTEGER PRIMARY KEY, doc_id TEXT NOT NULL, chunk_id INTEGER NOT NULL, text TEXT NOT NULL);"
+            "INSERT INTO docs VALUES ('d', 'old.pdf', 1);"
+            "INSERT INTO chunks VALUES (0, 'd', 0, 'Legacy chunk without provenance.');"
+        )
+        conn.commit()
+        conn.close()
+        old = SQLiteStore(old_path)
+        self.assertIsNone(old.get_chunks("d")[0].page_start)
+        old.close()
+
+    def test_index_reloaded_from_disk(self):
+        """Test that retrieval after reopening matches a freshly built in-memory store."""
+        reference = InMemoryStore()
+        for doc_id, _ in self.store.list_docs():
+            reference.upsert_doc(doc_id, self.store.docs[doc_id], self.store.get_chunks(doc_id))
+        self.reopen()
+        for query in ("shared threads", "atomic transactions", "mutex"):
+            self.assertEqual(
+                retrieve_top_k(query, [], top_k=3, store=self.store),
+                retrieve_top_k(query, [], top_k=3, store=reference),
+            )
+
+    def test_dense_vectors_rebuilt_after_reopen(self):
+        """Test that chunk embeddings are rebuilt from stored text and track later changes."""
+        before = retrieve_top_k("mutexes serialize", [], top_k=1, store=self.store, mode="dense")
+        self.reopen()
+        after = retrieve_top_k("mutexes serialize", [], top_k=1, store=self.store, mode="dense")
+        self.assertEqual([(ch.text, s) for ch, s in after], [(ch.text, s) for ch, s in before])
+        self.store.remove_doc("d1")
+        self.store.upsert_doc("d3", "locks.pdf", make_chunks("d3", "locks.pdf", ["Spinlocks serialize by busy waiting."]))
+        results = retrieve_top_k("mutexes serialize", [], top_k=3, store=self.store, mode="dense")
+        self.assertEqual([ch.doc_id for ch, _ in results], ["d3"])
+
+    def test_vectors_reloaded_from_sidecar_file(self):
+        """Test that saved embeddings are reused on reopen and stale files are rebuilt."""
+        self.assertEqual(len(self.store.vectors), 3)
+        self.store.remove_doc("d2")
+        self.reopen()
+        with mock.patch("backend.storage.sqlite_store.embed_chunk_texts") as embed:
+            self.assertEqual(sorted(self.store.vectors.slots.tolist()), sorted(self.store.index.doc_slots["d1"]))
+        embed.assert_not_called()
+
+        # Chunks written while vectors were never loaded make the sidecar stale
+        self.reopen()
+        self.store.upsert_doc("d3", "net.pdf", make_chunks("d3", "net.pdf", ["Routers forward packets."]))
+        self.reopen()
+        self.assertEqual(len(self.store.vectors), 3)
+
+    def test_sidecar_from_older_generation_is_not_reused(self):
+        """Test that embeddings saved before writes made without loaded vectors are rebuilt."""
+        self.store.clear()
+        self.store.upsert_doc("x", "bio.pdf", make_chunks("x", "bio.pdf", ["Photosynthesis turns light energy into sugar."]))
+        self.assertEqual(len(self.store.vectors), 1)
+        self.reopen()
+        self.store.remove_doc("x")
+        self.reopen()
+        # Reuses slot 0, so the saved file still covers exactly the stored slots
+        self.store.upsert_doc("y", "net.pdf", make_chunks("y", "net.pdf", ["Routers forward packets."]))
+        self.reopen()
+        stale = retrieve_top_k("photosynthesis light energy", [], top_k=1, store=self.store, mode="dense")
+        self.assertTrue(all(score < 0.2 for _, score in stale))  # x's embedding would score about 0.8
+        self.assertEqual(
+            [c.doc_id for c, _ in retrieve_top_k("routers forward packets", [], top_k=1, store=self.store, mode="dense")],
+            ["y"]
+        )
+
+    def test_sidecar_writes_are_deferred(self):
+        """Test that upserts do not rewrite the sidecar each time and close() saves pending changes."""
+        self.assertEqual(len(self.store.vectors), 3)
+        with mock.patch.object(type(self.store.vectors), "save", autospec=True) as save:
+            for i in range(10):
+                self.store.upsert_doc(f"n{i}", "notes.pdf", make_chunks(f"n{i}", "notes.pdf", [f"Note {i} on paging."]))
+            self.store.remove_doc("n3")
+        save.assert_not_called()
+        self.reopen()
+        with mock.patch("backend.storage.sqlite_store.embed_chunk_texts") as embed:
+            self.assertEqual(len(self.store.vectors), 12)
+        embed.assert_not_called()
+
+    def test_remove_and_clear_persist(self):
+        """Test that removals are written through to the file."""
+        self.store.remove_doc("d1")
+        self.reopen()
+        self.assertEqual(self.store.list_docs(), [("d2", "db.pdf")])
+        self.assertEqual(retrieve_top_k("mutex", [], top_k=3, store=self.store), [])
+        self.store.clear()
+        self.reopen()
+        self.assertEqual(self.store.get_statistics()["total_docs"], 0)
+
+    def test_new_docs_after_reopen_get_fresh_slots(self):
+        """Test that slots allocated after a reload do not collide with persisted ones."""
+        self.reopen()
+        self.store.upsert_doc("d3", "net.pdf", make_chunks("d3", "net.pdf", ["Routers forward packets between networks."]))
+        results = retrieve_top_k("packets mutex", [], top_k=5, store=self.store, mode="keyword")
+        self.assertEqual(sorted(c.doc_id for c, _ in results), ["d1", "d3"])
+
+    def test_owners_are_isolated(self):
+        """Test that libraries sharing a file never see, retrieve or remove each other's documents."""
+        alice = SQLiteStore(self.path, owner="alice")
+        bob = SQLiteStore(self.path, owner="bob")
+        try:
+            self.assertEqual(alice.list_docs(), [])
+            alice.upsert_doc("d1", "mine.pdf", make_chunks("d1", "mine.pdf", ["Mutexes in Alice's notes."]))
+            bob.upsert_doc("d1", "theirs.pdf", make_chunks("d1", "theirs.pdf", ["Semaphores count permits."]))
+            self.assertEqual(alice.list_docs(), [("d1", "mine.pdf")])
+            self.assertEqual([c.text for c, _ in retrieve_top_k("semaphores mutexes", [], top_k=5, store=bob)],
+                             ["Semaphores count permits."])
+
+            alice.clear()
+            bob.remove_doc("d2")  # another owner's document id: no effect
+            self.reopen()
+            self.assertEqual(self.store.list_docs(), [("d1", "os.pdf"), ("d2", "db.pdf")])
+            self.assertEqual(SQLiteStore(self.path, owner="bob").get_statistics()["total_chunks"], 1)
+            self.assertEqual(alice.get_total_chunks(), 0)
+        finally:
+            alice.close()
+            bob.close()
+
+    def test_failed_write_leaves_store_unchanged(self):
+        """Test that a write rolled back by SQLite is not applied to the in-memory index."""
+        before = retrieve_top_k("mutex", [], top_k=3, store=self.store)
+        broken = [DocChunk(doc_id="d1", doc_name="os.pdf", chunk_id=0, text=None, term_counts={})]
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.store.upsert_doc("d1", "os.pdf", broken)
+        self.assertEqual(self.store.list_docs(), [("d1", "os.pdf"), ("d2", "db.pdf")])
+        self.assertEqual(retrieve_top_k("mutex", [], top_k=3, store=self.store), before)
+        self.reopen()
+        self.assertEqual(retrieve_top_k("mutex", [], top_k=3, store=self.store), before)
+
+    def test_factory_shares_one_store_per_owner(self):
+        """Test that create_store hands every session of an owner the same instance."""
+        sqlite_settings = dataclasses.replace(factory.settings, store_path=self.path)
+        with mock.patch.object(factory, "settings", sqlite_settings):
+            first = factory.create_store("sqlite", owner="alice")
+            self.assertIs(factory.create_store("sqlite", owner="alice"), first)
+            other = factory.create_store("sqlite", owner="bob")
+        self.assertIsNot(other, first)
+        self.assertEqual(first.list_docs(), [])
+        first.close()
+        other.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,30 @@
 """
 Enhanced text chunking with sentence-aware splitting and validation.
 """
-from typing import Generator, List
+from bisect import bisect_right
+from collections import deque
+from typing import Callable, Deque, Generator, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 import re
 
+from backend.utils.token_estimator import CHARS_PER_TOKEN, _PIECE_PATTERN, _piece_tokens, _word_tokens, estimate_tokens
+
+# Sentence delimiter: a run of terminal punctuation followed by whitespace
+_SENTENCE_END = re.compile(r'([.!?]+[\s\n]+)')
+_WORD = re.compile(r'\S+')
+
+# What chunk_size and overlap are measured in
+CHUNK_UNITS = ("chars", "tokens")
+
+
+class ChunkSpan(NamedTuple):
+    """A chunk with where it came from: 1-based page range and character
+    offsets [char_start, char_end) into the separator-joined page text."""
+    text: str
+    page_start: Optional[int]
+    page_end: Optional[int]
+    char_start: int
+    char_end: int
+
 
 def split_into_sentences(text: str) -> List[str]:
     """
@@ -17,29 +38,124 @@ def split_into_sentences(text: str) -> List[str]:
     """
     # Simple sentence splitting on common punctuation
     # This handles most cases without needing heavy NLP libraries
-    sentence_endings = re.compile(r'([.!?]+[\s\n]+)')
-    sentences = sentence_endings.split(text)
+    result = list(iter_sentences([text]))
+    return result if result else [text]
+
+
+def chunk_sentences(
+    sentences: Iterable[str],
+    chunk_size: int,
+    overlap: int
+) -> Generator[str, None, None]:
+    """
+    Packs sentences into chunks of about chunk_size characters, carrying
+    trailing sentences (up to `overlap` characters) into the next chunk.
+    Consumes `sentences` lazily and holds only the open chunk.
     
-    # Recombine sentences with their punctuation
-    result = []
-    for i in range(0, len(sentences) - 1, 2):
-        sentence = sentences[i] + (sentences[i + 1] if i + 1 < len(sentences) else '')
-        if sentence.strip():
-            result.append(sentence.strip())
+    Args:
+        sentences: Sentences in document order
+        chunk_size: Target size for each chunk (in characters)
+        overlap: Number of characters to overlap between chunks
+        
+    Yields:
+        Text chunks
+    """
+    for text, _, _ in _pack_sentences(sentences, chunk_size, overlap):
+        yield text
+
+
+def _pack_sentences(
+    sentences: Iterable[str],
+    chunk_size: int,
+    overlap: int,
+    measure: Callable[[str], int] = len
+) -> Generator[Tuple[str, int, int], None, None]:
+    """
+    The chunk_sentences loop; yields (chunk, first, end) where [first, end)
+    are the ordinals of the sentences the chunk was built from. `measure`
+    sizes a sentence (len for characters, estimate_tokens for tokens).
     
-    # Add last sentence if it doesn't end with punctuation
-    if sentences and not sentence_endings.search(sentences[-1]):
-        if sentences[-1].strip():
-            result.append(sentences[-1].strip())
+    Each chunk is joined exactly once, and the overlap is found by walking
+    back from the end of the chunk over only the sentences that are kept
+    (deleting the rest in place), so every sentence costs O(1) amortized work.
+    """
+    current_chunk: List[str] = []
+    current_size = 0  # measured size of current_chunk, excluding joining spaces
+    first = 0         # ordinal of current_chunk[0]
     
-    return result if result else [text]
+    sizes: List[int] = []  # measure() of each sentence in current_chunk
+    
+    for sentence in sentences:
+        sentence_len = measure(sentence)
+        
+        # If adding this sentence would exceed chunk size
+        if current_size + sentence_len > chunk_size and current_chunk:
+            # Yield current chunk
+            chunk_text = ' '.join(current_chunk)
+            stripped = chunk_text.strip()
+            if stripped:
+                yield stripped, first, first + len(current_chunk)
+            
+            # Start new chunk with overlap: keep the longest run of trailing
+            # sentences whose sizes fit in `overlap`
+            chunk_len = len(chunk_text) if measure is len else current_size
+            if chunk_len > overlap:
+                keep_from = len(current_chunk)
+                overlap_size = 0
+                while keep_from and overlap_size + sizes[keep_from - 1] <= overlap:
+                    keep_from -= 1
+                    overlap_size += sizes[keep_from]
+                del current_chunk[:keep_from]
+                del sizes[:keep_from]
+                first += keep_from
+                current_size = overlap_size
+            else:
+                first += len(current_chunk)
+                current_chunk = []
+                sizes = []
+                current_size = 0
+        
+        # Add sentence to current chunk
+        current_chunk.append(sentence)
+        sizes.append(sentence_len)
+        current_size += sentence_len
+    
+    # Yield final chunk
+    if current_chunk:
+        chunk_text = ' '.join(current_chunk).strip()
+        if chunk_text:
+            yield chunk_text, first, first + len(current_chunk)
+
+
+def _chunk_sentence_spans(
+    spans: Iterable[Tuple[str, int, int]],
+    chunk_size: int,
+    overlap: int,
+    measure: Callable[[str], int] = len
+) -> Generator[Tuple[str, int, int], None, None]:
+    """chunk_sentences over (sentence, start, end) spans; yields (chunk, start, end)."""
+    # Offsets of the sentences from ordinal `window_first` on; older ones can no longer start a chunk
+    window: Deque[Tuple[int, int]] = deque()
+    window_first = 0
+
+    def sentences() -> Iterator[str]:
+        for sentence, start, end in spans:
+            window.append((start, end))
+            yield sentence
+
+    for text, first, end in _pack_sentences(sentences(), chunk_size, overlap, measure):
+        while window_first < first:
+            window.popleft()
+            window_first += 1
+        yield text, window[0][0], window[end - 1 - window_first][1]
 
 
 def chunk_text(
     text: str,
     chunk_size: int,
     overlap: int,
-    sentence_aware: bool = True
+    sentence_aware: bool = True,
+    unit: str = "chars"
 ) -> Generator[str, None, None]:
     """
     Yields text chunks with optional sentence-aware splitting.
@@ -47,9 +163,10 @@ def chunk_text(
     
     Args:
         text: Text to chunk
-        chunk_size: Target size for each chunk (in characters)
-        overlap: Number of characters to overlap between chunks
+        chunk_size: Target size for each chunk (in `unit`)
+        overlap: Amount to overlap between chunks (in `unit`)
         sentence_aware: If True, tries to break at sentence boundaries
+        unit: "chars", or "tokens" for estimated LLM tokens (sentence-aware only)
         
     Yields:
         Text chunks
@@ -57,58 +174,18 @@ def chunk_text(
     if chunk_size <= 0:
         yield text
         return
-        
+    
     if overlap >= chunk_size:
         overlap = max(0, chunk_size // 3)
     
-    # If sentence-aware chunking is enabled and text is not too large
-    if sentence_aware and len(text) < chunk_size * 100:
-        sentences = split_into_sentences(text)
-        
-        current_chunk = []
-        current_size = 0
-        
-        for sentence in sentences:
-            sentence_len = len(sentence)
-            
-            # If adding this sentence would exceed chunk size
-            if current_size + sentence_len > chunk_size and current_chunk:
-                # Yield current chunk
-                chunk_text = ' '.join(current_chunk)
-                if chunk_text.strip():
-                    yield chunk_text.strip()
-                
-                # Start new chunk with overlap
-                # Keep last few sentences for context
-                overlap_text = ' '.join(current_chunk)
-                if len(overlap_text) > overlap:
-                    # Find sentences that fit in overlap
-                    overlap_sentences = []
-                    overlap_size = 0
-                    for s in reversed(current_chunk):
-                        if overlap_size + len(s) <= overlap:
-                            overlap_sentences.insert(0, s)
-                            overlap_size += len(s)
-                        else:
-                            break
-                    current_chunk = overlap_sentences
-                    current_size = overlap_size
-                else:
-                    current_chunk = []
-                    current_size = 0
-            
-            # Add sentence to current chunk
-            current_chunk.append(sentence)
-            current_size += sentence_len
-        
-        # Yield final chunk
-        if current_chunk:
-            chunk_text = ' '.join(current_chunk)
-            if chunk_text.strip():
-                yield chunk_text.strip()
+    if sentence_aware:
+        # Streaming segmentation works at any size; sentences longer than a
+        # chunk are split at word boundaries
+        for span in chunk_text_spans([(1, text)], chunk_size, overlap, unit=unit):
+            yield span.text
     
     else:
-        # Fall back to character-based chunking for very large texts
+        # Plain character-based chunking
         start = 0
         n = len(text)
         
@@ -117,11 +194,253 @@ def chunk_text(
             chunk = text[start:end].strip()
             if chunk:
                 yield chunk
-            start = end - overlap
-            if start < 0:
-                start = 0
-            if start >= n:
+            if end >= n:
                 break
+            start = max(end - overlap, start + 1)
+
+
+def iter_sentences(pieces: Iterable[str], separator: str = "") -> Iterator[str]:
+    """
+    Streaming counterpart of split_into_sentences over text arriving in pieces.
+    
+    Sentences are cut at the same delimiters as split_into_sentences would
+    find in `separator.join(pieces)`, but only the unfinished tail sentence is
+    buffered between pieces.
+    
+    Args:
+        pieces: Text fragments in order (e.g. cleaned PDF pages)
+        separator: Inserted between consecutive pieces
+        
+    Yields:
+        Stripped, non-empty sentences
+    """
+    for sentence, _, _ in _sentence_spans(pieces, separator):
+        yield sentence
+
+
+def _strip_span(text: str, start: int, end: int, offset: int) -> Optional[Tuple[str, int, int]]:
+    """Strips text[start:end]; returns it with its offsets shifted by `offset`, or None if blank."""
+    raw = text[start:end]
+    sentence = raw.strip()
+    if not sentence:
+        return None
+    lead = len(raw) - len(raw.lstrip())
+    return sentence, offset + start + lead, offset + start + lead + len(sentence)
+
+
+def _split_long(span: Tuple[str, int, int], max_len: Optional[int]) -> Iterator[Tuple[str, int, int]]:
+    """
+    Cuts a sentence longer than max_len at whitespace (or hard, if there is
+    none). A cursor walks the sentence and only the pieces are sliced, so
+    the cost is linear in its length.
+    """
+    sentence, start, _ = span
+    if not max_len or len(sentence) <= max_len:
+        yield span
+        return
+    pos, n = 0, len(sentence)  # the sentence is stripped, so sentence[0] is not whitespace
+    while n - pos > max_len:
+        limit = pos + max_len
+        cut = max(sentence.rfind(" ", pos, limit + 1), sentence.rfind("\n", pos, limit + 1))
+        if cut <= pos:
+            cut = limit
+        head = _strip_span(sentence, pos, cut, start)
+        if head:
+            yield head
+        pos = cut
+        while pos < n and sentence[pos].isspace():
+            pos += 1
+    rest = _strip_span(sentence, pos, n, start)
+    if rest:
+        yield rest
+
+
+def _token_units(sentence: str, max_tokens: int) -> Iterator[Tuple[int, int, int]]:
+    """
+    (start, end, estimated tokens) of the words of a sentence. A word over
+    max_tokens (minified code, a long formula) is broken into its
+    estimate_tokens pieces, and a piece still over budget into runs of
+    max_tokens characters; a piece never costs more tokens than characters.
+    """
+    for word in _WORD.finditer(sentence):
+        cost = _word_tokens(word.group())
+        if cost <= max_tokens:
+            yield word.start(), word.end(), cost
+            continue
+        for piece in _PIECE_PATTERN.finditer(sentence, word.start(), word.end()):
+            cost = _piece_tokens(piece.group())
+            if cost <= max_tokens:
+                yield piece.start(), piece.end(), cost
+                continue
+            for a in range(piece.start(), piece.end(), max_tokens):
+                b = min(a + max_tokens, piece.end())
+                yield a, b, _piece_tokens(sentence[a:b])
+
+
+def _split_tokens(span: Tuple[str, int, int], max_tokens: int) -> Iterator[Tuple[str, int, int]]:
+    """
+    Cuts a sentence estimated at more than max_tokens into pieces of at most
+    max_tokens, accumulating estimate_tokens word by word. Cuts fall between
+    words, or between a word's pieces, so the pieces' estimates add up.
+    """
+    sentence, start, _ = span
+    if len(sentence) <= max_tokens:  # every token covers at least one character
+        yield span
+        return
+    first = end = used = 0
+    for a, b, cost in _token_units(sentence, max_tokens):
+        if used and used + cost > max_tokens:
+            yield sentence[first:end], start + first, start + end
+            used = 0
+        if not used:
+            first = a
+        used += cost
+        end = b
+    if used:
+        yield sentence[first:end], start + first, start + end
+
+
+def _sentence_spans(
+    pieces: Iterable[str],
+    separator: str,
+    max_len: Optional[int] = None
+) -> Iterator[Tuple[str, int, int]]:
+    """
+    iter_sentences that also reports each sentence's offsets in the joined text.
+    
+    With max_len, no sentence longer than max_len is yielded and the
+    unfinished tail carried between pieces stays under about 2 * max_len,
+    so memory is bounded even for text without sentence punctuation.
+    """
+    buffer = ""
+    offset = 0  # position of buffer[0] in the joined text
+    first = True
+    for piece in pieces:
+        buffer += piece if first else separator + piece
+        first = False
+        last_end = 0
+        for match in _SENTENCE_END.finditer(buffer):
+            if match.end() == len(buffer):
+                # The delimiter may continue into the next piece
+                break
+            span = _strip_span(buffer, last_end, match.end(), offset)
+            if span:
+                yield from _split_long(span, max_len)
+            last_end = match.end()
+        if max_len and len(buffer) - last_end > 2 * max_len:
+            # No sentence end in sight: release the head of the tail at a word boundary
+            cut = max(buffer.rfind(" ", last_end, len(buffer) - max_len), last_end + max_len)
+            span = _strip_span(buffer, last_end, cut, offset)
+            if span:
+                yield from _split_long(span, max_len)
+            last_end = cut
+        buffer = buffer[last_end:]
+        offset += last_end
+
+    last_end = 0
+    for match in _SENTENCE_END.finditer(buffer):
+        span = _strip_span(buffer, last_end, match.end(), offset)
+        if span:
+            yield from _split_long(span, max_len)
+        last_end = match.end()
+    span = _strip_span(buffer, last_end, len(buffer), offset)
+    if span:
+        yield from _split_long(span, max_len)
+
+
+def chunk_text_stream(
+    pieces: Iterable[str],
+    chunk_size: int,
+    overlap: int,
+    separator: str = "\n\n",
+    unit: str = "chars"
+) -> Generator[str, None, None]:
+    """
+    Sentence-aware chunking of text that arrives in pieces (e.g. PDF pages).
+    
+    Memory is bounded by the open chunk plus the sentence being assembled,
+    not by document size: pieces are consumed lazily and never joined.
+    
+    Args:
+        pieces: Text fragments in order
+        chunk_size: Target size for each chunk (in `unit`)
+        overlap: Amount to overlap between chunks (in `unit`)
+        separator: Inserted between consecutive pieces
+        unit: "chars", or "tokens" for estimated LLM tokens
+        
+    Yields:
+        Text chunks
+    """
+    for span in chunk_text_spans(enumerate(pieces, start=1), chunk_size, overlap, separator, unit):
+        yield span.text
+
+
+def chunk_text_spans(
+    pages: Iterable[Tuple[int, str]],
+    chunk_size: int,
+    overlap: int,
+    separator: str = "\n\n",
+    unit: str = "chars"
+) -> Generator[ChunkSpan, None, None]:
+    """
+    chunk_text_stream that also records where each chunk came from.
+    
+    Page numbers and offsets are tracked while the pages stream through the
+    sentence splitter, so provenance costs no extra pass over the text.
+    Offsets index into `separator.join(page texts)`.
+    
+    Args:
+        pages: (page number, page text) pairs in order
+        chunk_size: Target size for each chunk (in `unit`)
+        overlap: Amount to overlap between chunks (in `unit`)
+        separator: Inserted between consecutive pages
+        unit: "chars", or "tokens" to size chunks by estimate_tokens so each
+            costs a predictable share of the LLM context window
+        
+    Yields:
+        ChunkSpan per chunk
+        
+    Raises:
+        ValueError: If unit is not one of CHUNK_UNITS
+    """
+    if unit not in CHUNK_UNITS:
+        raise ValueError(f"Unknown chunk unit '{unit}'. Expected one of: {', '.join(CHUNK_UNITS)}")
+    # Over-long sentences are pre-split by characters (which also bounds the buffered tail);
+    # token mode allows a typical prose ratio there, then cuts each sentence by its token estimate
+    measure, max_len = (len, chunk_size) if unit == "chars" else (estimate_tokens, chunk_size * CHARS_PER_TOKEN)
+
+    page_offsets: List[int] = []  # joined-text offset where each page starts
+    page_numbers: List[int] = []
+
+    def track(pages: Iterable[Tuple[int, str]]) -> Iterator[str]:
+        offset = 0
+        for number, text in pages:
+            if page_numbers:
+                offset += len(separator)
+            page_offsets.append(offset)
+            page_numbers.append(number)
+            offset += len(text)
+            yield text
+
+    def page_of(offset: int) -> int:
+        return page_numbers[max(bisect_right(page_offsets, offset) - 1, 0)]
+
+    if chunk_size <= 0:
+        text = separator.join(track(pages))
+        if page_numbers:
+            yield ChunkSpan(text, page_numbers[0], page_numbers[-1], 0, len(text))
+        else:
+            yield ChunkSpan(text, None, None, 0, 0)
+        return
+
+    if overlap >= chunk_size:
+        overlap = max(0, chunk_size // 3)
+
+    spans = _sentence_spans(track(pages), separator, max_len=max_len)
+    if unit == "tokens":
+        spans = (piece for span in spans for piece in _split_tokens(span, chunk_size))
+    for text, start, end in _chunk_sentence_spans(spans, chunk_size, overlap, measure):
+        yield ChunkSpan(text, page_of(start), page_of(max(end - 1, start)), start, end)
 
 
 def validate_chunk(chunk: str, min_length: int = 10) -> bool:
@@ -0,0 +1,183 @@
+"""
+Local, CPU-only text embeddings via feature hashing (requires NumPy).
+
+No model download: words and their character trigrams are hashed into a
+fixed number of signed buckets and the vector is L2-normalized, so cosine
+similarity is a dot product. This captures shared vocabulary and spelling
+variants ("big-O" / "big O", "sort" / "sorting"), not deep semantics, which
+is enough to recognise paraphrased study questions over the same material
+and to match questions to passages that use different word forms.
+
+Backends are pluggable through EMBEDDING_BACKENDS; anything with `dim`,
+`embed(text)` and `embed_batch(texts)` returning unit-norm float32 vectors
+can be registered there.
+"""
+from functools import lru_cache
+from itertools import chain, filterfalse
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import re
+import threading
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+from backend.config import settings
+
+# Function words, ignored when embedding passages for retrieval
+STOPWORDS = frozenset("""
+a an and are as at be but by can could do does for from had has have how i if
+in into is it its me my of on or so than that the their then there these they
+this those to was we were what whats when where which who why will with would
+you your
+""".split())
+
+# Interrogatives and intent words ("define", "example") change what a question
+# asks for, so questions keep them as features; so do negations (see HashingEmbedder)
+INTERROGATIVES = frozenset("how what whats when where which who why".split())
+NEGATIONS = frozenset("cannot never no nor not without".split())
+
+# Function words plus question filler that says nothing about the topic or intent
+QUESTION_STOPWORDS = (STOPWORDS - INTERROGATIVES) | frozenset("""
+algorithm concept give notation please show tell understand work works
+""".split())
+
+_WORD_PATTERN = re.compile(r"\w+")
+# "isn't" -> "is not", "can't" -> "can not"
+_NEGATED_CONTRACTION = re.compile(r"(\w+?)n['’]t\b")
+_CONTRACTION_STEMS = {"ca": "can", "wo": "will", "sha": "shall"}
+CHAR_NGRAM = 3
+NGRAM_WEIGHT = 0.5
+# Texts per bincount in embed_batch (bounds the temporary float64 matrix)
+EMBED_BATCH_SIZE = 256
+
+
+@lru_cache(maxsize=1 << 16)
+def _word_buckets(word: str, dim: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Signed bucket contributions of a word and its character trigrams."""
+    padded = f"<{word}>"
+    features = [word] + [padded[i:i + CHAR_NGRAM] for i in range(len(padded) - CHAR_NGRAM + 1)]
+    hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.int64, count=len(features))
+    magnitudes = np.full(len(features), NGRAM_WEIGHT)
+    magnitudes[0] = 1.0
+    # Low bits pick the bucket, the top bit the sign (keeps collisions unbiased)
+    return hashes % dim, np.where(hashes & 0x80000000, magnitudes, -magnitudes)
+
+
+def _expand_contraction(match: "re.Match") -> str:
+    stem = match.group(1)
+    return f"{_CONTRACTION_STEMS.get(stem.lower(), stem)} not"
+
+
+class HashingEmbedder:
+    """
+    Stateless hashing vectorizer. Deterministic across processes (CRC32,
+    not Python's salted hash), so vectors can be persisted.
+
+    With `negation`, a negation word is kept as a feature and the next
+    content word is added with the opposite sign, so "is heapsort not
+    stable" points away from "is heapsort stable" instead of nearly
+    matching it.
+    """
+    def __init__(self, dim: int = 512, stopwords: Iterable[str] = QUESTION_STOPWORDS, negation: bool = False) -> None:
+        if np is None:
+            raise ImportError("Hashing embeddings require NumPy. Install it with `pip install numpy`.")
+        self.dim = dim
+        self.stopwords = frozenset(stopwords)
+        self.negation = negation
+
+    def _tokens(self, text: str) -> Tuple[List[str], List[float]]:
+        """Content words of a text with their signs (-1.0 right after a negation)."""
+        text = text.lower()
+        words = list(filterfalse(self.stopwords.__contains__, _WORD_PATTERN.findall(
+            _NEGATED_CONTRACTION.sub(_expand_contraction, text) if self.negation else text
+        )))
+        signs = [1.0] * len(words)
+        if self.negation:
+            for i in range(1, len(words)):
+                if words[i - 1] in NEGATIONS and words[i] not in NEGATIONS:
+                    signs[i] = -1.0
+        return words, signs
+
+    def embed(self, text: str) -> "np.ndarray":
+        """
+        Embeds one text.
+        
+        Args:
+            text: Question or passage
+            
+        Returns:
+            float32 vector of length dim with unit norm (all zeros if the
+            text has no non-stopword terms)
+        """
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: Iterable[str]) -> "np.ndarray":
+        """
+        Embeds several texts into an (n, dim) float32 matrix, one row per text.
+        Word features are hashed once per process; a batch is accumulated
+        with one gather and one bincount instead of per-word array work.
+        """
+        texts = list(texts)
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for first in range(0, len(texts), EMBED_BATCH_SIZE):
+            batch = texts[first:first + EMBED_BATCH_SIZE]
+            # Per token: its row and the position of its word among the batch's distinct words
+            token_lists, sign_lists = zip(*map(self._tokens, batch))
+            tokens = list(chain.from_iterable(token_lists))
+            rows = matrix[first:first + len(batch)]
+            if not tokens:
+                continue
+            positions = {word: i for i, word in enumerate(dict.fromkeys(tokens))}
+            token_words = np.fromiter(map(positions.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+            token_rows = np.repeat(np.arange(len(batch), dtype=np.int64), [len(t) for t in token_lists])
+
+            # Feature table of the distinct words, then one gather for every token
+            features = [_word_buckets(word, self.dim) for word in positions]
+            counts = np.fromiter((len(b) for b, _ in features), dtype=np.int64, count=len(features))
+            offsets = np.cumsum(counts) - counts
+            word_buckets = np.concatenate([b for b, _ in features])
+            word_weights = np.concatenate([w for _, w in features])
+
+            token_counts = counts[token_words]
+            token_starts = np.cumsum(token_counts) - token_counts
+            gather = np.repeat(offsets[token_words] - token_starts, token_counts) + np.arange(int(token_counts.sum()))
+            bins = word_buckets[gather] + np.repeat(token_rows * self.dim, token_counts)
+            weights = word_weights[gather]
+            if self.negation:
+                token_signs = np.fromiter(chain.from_iterable(sign_lists), dtype=np.float64, count=len(tokens))
+                weights *= np.repeat(token_signs, token_counts)
+            rows[:] = np.bincount(bins, weights=weights, minlength=len(batch) * self.dim).reshape(
+                len(batch), self.dim
+            )
+            norms = np.linalg.norm(rows, axis=1, keepdims=True)
+            np.divide(rows, norms, out=rows, where=norms > 0)
+        return matrix
+
+
+# Name -> factory(dim); selected with settings.embedding_backend
+EMBEDDING_BACKENDS: Dict[str, Callable[[int], object]] = {
+    "hashing": lambda dim: HashingEmbedder(dim, stopwords=STOPWORDS),
+}
+
+_embedders: Dict[Tuple[str, int], object] = {}
+_embedders_lock = threading.Lock()
+
+
+def get_embedder(backend: Optional[str] = None, dim: Optional[int] = None):
+    """
+    Returns the shared passage/query embedder for dense retrieval.
+    `backend` is one of EMBEDDING_BACKENDS and defaults to
+    settings.embedding_backend; `dim` defaults to settings.embedding_dim.
+    """
+    backend = backend or settings.embedding_backend
+    dim = dim or settings.embedding_dim
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Expected one of: {', '.join(EMBEDDING_BACKENDS)}")
+    with _embedders_lock:
+        embedder = _embedders.get((backend, dim))
+        if embedder is None:
+            embedder = _embedders[(backend, dim)] = EMBEDDING_BACKENDS[backend](dim)
+        return embedder
@@ -0,0 +1,52 @@
+"""
+Fast local approximation of LLM token counts.
+
+Groq's Llama models use a byte-pair tokenizer, which averages roughly four
+characters of English per token but far fewer for code, math and digits.
+Shipping that tokenizer would add a heavy dependency, so words are split
+into letter runs, digit runs and single symbols, and each piece is costed
+with a rule that tracks BPE behaviour. Costs are memoized per
+whitespace-separated word: study material repeats its vocabulary, so most
+words cost one cache lookup and the regex only runs on new ones.
+"""
+from functools import lru_cache
+import re
+
+# Rough characters per token for English prose; used to turn token budgets into character bounds
+CHARS_PER_TOKEN = 4
+
+# Letter runs, digit runs, and every other non-space character on its own
+_PIECE_PATTERN = re.compile(r"[^\W\d_]+|\d+|\S")
+
+
+def _piece_tokens(piece: str) -> int:
+    if len(piece) == 1:
+        return 1
+    if piece.isdigit():
+        # Numbers are split into groups of up to three digits
+        return (len(piece) + 2) // 3
+    if not piece.isascii():
+        # Non-Latin scripts are mostly one token per character
+        return len(piece)
+    # Short words are a single token; longer ones split about every five letters
+    return 1 + (len(piece) - 1) // 5
+
+
+@lru_cache(maxsize=1 << 17)
+def _word_tokens(word: str) -> int:
+    return sum(map(_piece_tokens, _PIECE_PATTERN.findall(word)))
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates how many LLM tokens `text` will use.
+    
+    Args:
+        text: Any text (prose, code, formulas)
+        
+    Returns:
+        Estimated token count (0 for empty text)
+    """
+    if not text:
+        return 0
+    return sum(map(_word_tokens, text.split()))
@@ -0,0 +1,131 @@
+"""
+Lexical tokenization shared by indexing and query processing.
+
+Terms are interned into a process-wide vocabulary so chunks can be stored
+as {term id: count} once at ingest and retrieval never re-tokenizes text.
+Terms are reference counted, so removing the last document that uses a
+term frees its entry.
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+import re
+import threading
+import weakref
+
+# Terms shorter than this carry little signal ("a", "of", "is") and bloat posting lists
+MIN_TERM_LEN = 3
+
+_TERM_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lowercase word terms suitable for indexing.
+    
+    Args:
+        text: Raw text (query or chunk)
+        
+    Returns:
+        List of terms in order of appearance (duplicates preserved)
+    """
+    if not text:
+        return []
+    return [t for t in _TERM_PATTERN.findall(text.lower()) if len(t) >= MIN_TERM_LEN]
+
+
+class Vocabulary:
+    """
+    Reference-counted term <-> id table shared by every store and session.
+
+    Every holder of term ids keeps one reference per distinct term: an
+    inverted index for each term it has postings for, and an ingested
+    document or lazily tokenized chunk until it is garbage collected (see
+    release_with). When the last reference goes, the term is forgotten and
+    its id is reused, so the table is bounded by the terms still in use
+    rather than by every term ever seen. Lookups are lock-free; counting
+    references takes the lock.
+    """
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._terms: List[Optional[str]] = []
+        self._refs: List[int] = []
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+
+    def add(self, term: str) -> int:
+        """Returns the id of a term, assigning one if unseen; the caller owns a reference to it."""
+        return self.add_all([term])[0]
+
+    def add_all(self, terms: Iterable[str]) -> List[int]:
+        """add() for several terms under one lock acquisition."""
+        ids, terms_by_id, refs, free = self._ids, self._terms, self._refs, self._free
+        result = []
+        with self._lock:
+            for term in terms:
+                term_id = ids.get(term)
+                if term_id is None:
+                    if free:
+                        term_id = free.pop()
+                        terms_by_id[term_id] = term
+                    else:
+                        term_id = len(terms_by_id)
+                        terms_by_id.append(term)
+                        refs.append(0)
+                    ids[term] = term_id
+                refs[term_id] += 1
+                result.append(term_id)
+        return result
+
+    def acquire(self, term_ids: Iterable[int]) -> None:
+        """Takes one more reference to each (live) term id."""
+        refs = self._refs
+        with self._lock:
+            for term_id in term_ids:
+                refs[term_id] += 1
+
+    def release(self, term_ids: Iterable[int]) -> None:
+        """Drops one reference to each term id, forgetting terms nobody holds any more."""
+        refs = self._refs
+        with self._lock:
+            for term_id in term_ids:
+                refs[term_id] -= 1
+                if not refs[term_id]:
+                    del self._ids[self._terms[term_id]]
+                    self._terms[term_id] = None
+                    self._free.append(term_id)
+
+    def release_with(self, owner: object, term_maps: Iterable[Dict[int, int]]) -> None:
+        """Releases the references behind `term_maps` once `owner` is garbage collected."""
+        weakref.finalize(owner, self.release, [term_id for terms in term_maps for term_id in terms])
+
+    def get(self, term: str) -> Optional[int]:
+        """Returns the id of a term, or None if nothing holds it."""
+        return self._ids.get(term)
+
+    def term(self, term_id: int) -> str:
+        return self._terms[term_id]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+vocabulary = Vocabulary()
+
+
+def encode_terms(text: str) -> Dict[int, int]:
+    """
+    Tokenizes text once into {term id: count}. Used at ingest time.
+    The caller owns one vocabulary reference per term of the result and
+    hands it on with vocabulary.release_with (or releases it).
+    """
+    counts = Counter(tokenize(text))
+    return dict(zip(vocabulary.add_all(counts), counts.values()))
+
+
+def encode_query(query: str) -> List[int]:
+    """
+    Maps query terms to ids, dropping terms no indexed or cached document
+    contains. Does not grow the vocabulary.
+    """
+    get = vocabulary.get
+    return [term_id for term_id in map(get, tokenize(query)) if term_id is not None]
@@ -1,22 +1,20 @@
 import sys
 import os
+import secrets
 import time
 import logging
 
 # Add the project root to sys.path so we can import from backend
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-import uuid
 import streamlit as st
 
 from backend.config import settings as backend_settings
-from backend.utils.chunking import chunk_text, validate_chunk
-from backend.storage.in_memory_store import InMemoryStore, DocChunk
-from backend.loaders.pdf_loader import read_pdf_bytes
-from backend.loaders.text_loader import read_text_bytes
-from backend.services.chat_service import answer_question_from_docs
+from backend.storage.factory import create_store
+from backend.services.chat_service import stream_answer_from_docs
+from backend.services.ingest_service import content_hash, ingest_bytes, is_pdf
 from backend.utils.file_validator import FileValidationError, validate_file_size, validate_file_type
-from backend.utils.error_handler import handle_error, StudyBuddyError, ErrorCategory
+from backend.utils.error_handler import handle_error
 
 from frontend.ui.sidebar import render_sidebar
 from frontend.ui.chat_widgets import render_chat, render_sources, render_welcome_message
@@ -30,6 +28,9 @@ from frontend.ui.animations import (
 )
 from frontend.ui.branding import render_logo
 
+# Minimum seconds between redraws of a streaming answer
+STREAM_RENDER_INTERVAL_S = 0.05
+
 # Page config with modern theme
 st.set_page_config(
     page_title="Agent Solver - Proactive STEM Assistant",
@@ -49,7 +50,12 @@ st.markdown(get_upload_zone_animation(), unsafe_allow_html=True)
 
 # ---------- Session State ----------
 if "store" not in st.session_state:
-    st.session_state.store = InMemoryStore()
+    # A persistent store keeps one library per owner; the owner token lives in the
+    # page URL, so reopening (or bookmarking) the link brings the same documents back
+    library = st.query_params.get("library") or secrets.token_urlsafe(12)
+    if backend_settings.store_backend == "sqlite":
+        st.query_params["library"] = library
+    st.session_state.store = create_store(owner=library)
 
 if "chat" not in st.session_state:
     st.session_state.chat = []
@@ -80,7 +86,8 @@ if ui_settings["clear_chat"]:
     st.rerun()
 
 if ui_settings["remove_docs"]:
-    st.session_state.store = InMemoryStore()
+    st.session_state.store.clear()
+    st.session_state.processed_files = set()
     st.toast("✅ All documents removed!", icon="🗑️")
     time.sleep(0.5)
     st.rerun()
@@ -112,16 +119,25 @@ uploads = ui_settings.get("uploads", [])
 
 if uploads and not st.session_state.processing:
     if "processed_files" not in st.session_state:
-        st.session_state.processed_files = set()
+        # Persistent stores already hold documents from earlier sessions
+        st.session_state.processed_files = {doc_id for doc_id, _ in st.session_state.store.list_docs()}
+    if "upload_hashes" not in st.session_state:
+        st.session_state.upload_hashes = {}
+
+    # Uploads are keyed by content, so renamed copies are not re-ingested and
+    # different files that share a name do not collide. Hash each upload once.
+    for up in uploads:
+        if up.file_id not in st.session_state.upload_hashes:
+            st.session_state.upload_hashes[up.file_id] = content_hash(up)
 
-    new_files = [up for up in uploads if up.name not in st.session_state.processed_files]
+    new_files = [up for up in uploads if st.session_state.upload_hashes[up.file_id] not in st.session_state.processed_files]
 
     if new_files:
         st.session_state.processing = True
         status_container = st.empty()
 
         for up in new_files:
-            doc_id = str(uuid.uuid4())
+            doc_id = st.session_state.upload_hashes[up.file_id]
             doc_name = up.name
             file_status = status_container.container()
 
@@ -134,32 +150,19 @@ if uploads and not st.session_state.processing:
                     validate_file_type(doc_name)
                     validate_file_size(up, max_size_mb=backend_settings.max_file_size_mb, filename=doc_name)
 
-                    full_text = ""
-                    if up.type == "application/pdf" or doc_name.lower().endswith(".pdf"):
-                        def update_progress(current, total):
-                            pct = int((current / total) * 100)
-                            progress_container.markdown(get_progress_bar(pct, text=f"Reading page {current}/{total}"), unsafe_allow_html=True)
+                    def update_progress(current, total):
+                        pct = int((current / total) * 100)
+                        progress_container.markdown(get_progress_bar(pct, text=f"Reading page {current}/{total}"), unsafe_allow_html=True)
 
-                        file_bytes = up.read()
-                        full_text = read_pdf_bytes(file_bytes, max_size_mb=backend_settings.max_file_size_mb, max_pages=backend_settings.max_pdf_pages, progress_callback=update_progress, batch_size=backend_settings.pdf_batch_size)
-                    else:
+                    if not is_pdf(doc_name):
                         progress_container.markdown(get_progress_bar(50, "Reading text file..."), unsafe_allow_html=True)
-                        file_bytes = up.read()
-                        full_text = read_text_bytes(file_bytes)
-
-                    chunks = []
-                    for ch_text in chunk_text(full_text, backend_settings.chunk_size, backend_settings.chunk_overlap):
-                        if validate_chunk(ch_text):
-                            chunks.append(DocChunk(doc_id=doc_id, doc_name=doc_name, chunk_id=len(chunks), text=ch_text))
 
-                    if not chunks:
-                        raise StudyBuddyError(
-                            "No valid text found in document.",
-                            category=ErrorCategory.VALIDATION_ERROR
-                        )
+                    # Cached across sessions: identical content is extracted and chunked once
+                    ingested = ingest_bytes(up.getvalue(), doc_name, progress_callback=update_progress, key=doc_id)
+                    chunks = ingested.to_chunks(doc_id, doc_name)
 
-                    st.session_state.store.upsert_doc(doc_id, doc_name, chunks)
-                    st.session_state.processed_files.add(doc_name)
+                    st.session_state.store.upsert_doc(doc_id, doc_name, chunks, embeddings=ingested.embeddings)
+                    st.session_state.processed_files.add(doc_id)
 
                     progress_container.markdown(get_success_animation(), unsafe_allow_html=True)
                     st.toast(f"Analyzed {doc_name}", icon="✅")
@@ -194,29 +197,34 @@ if st.session_state.chat and st.session_state.chat[-1]["role"] == "user":
             message_placeholder.markdown(get_typing_indicator(), unsafe_allow_html=True)
 
             try:
-                # Collect chunks from all docs
-                all_chunks = []
-                for doc_id, _ in st.session_state.store.list_docs():
-                    all_chunks.extend(st.session_state.store.get_chunks(doc_id))
-
-                result = answer_question_from_docs(
+                # Retrieval goes through the store's inverted index
+                result = stream_answer_from_docs(
                     question=st.session_state.chat[-1]["content"],
-                    all_chunks=all_chunks,
                     top_k=ui_settings["top_k"],
+                    store=st.session_state.store,
+                    mode=ui_settings["retrieval_mode"],
                 )
-
-                answer = result["answer"]
                 used_excerpts = result["used_excerpts"]
 
-                # Display answer directly (Typewriter removed)
+                # Render tokens as they arrive; redraws are throttled so long answers stay cheap
+                answer = ""
+                last_render = 0.0
+                for delta in result["answer_stream"]:
+                    answer += delta
+                    now = time.perf_counter()
+                    if now - last_render >= STREAM_RENDER_INTERVAL_S:
+                        message_placeholder.markdown(answer + "▌")
+                        last_render = now
                 message_placeholder.markdown(answer)
+                if result.get("similar_question"):
+                    st.caption(f"♻️ Reused the answer to a similar question: “{result['similar_question']}”")
 
                 # Store response
                 st.session_state.chat.append({"role": "assistant", "content": answer})
 
                 # Render sources
                 if used_excerpts:
-                    render_sources(used_excerpts)
+                    render_sources(used_excerpts, result.get("context_budget"), result.get("retrieval_ms"))
 
             except Exception as e:
                 error_msg = f"❌ Error: {str(e)}"
@@ -31,13 +31,24 @@ def render_chat(history):
         with st.chat_message(msg["role"], avatar=avatar):
             st.markdown(msg["content"])
 
-def render_sources(used_excerpts):
+def render_sources(used_excerpts, context_budget=None, retrieval_ms=None):
     """Render source excerpts in a modern, collapsible format."""
     if not used_excerpts:
         return
 
     with st.expander(f"🔎 Cited Sources ({len(used_excerpts)})", expanded=False):
+        if context_budget and context_budget.get("max_chars"):
+            dropped = context_budget["excerpts_dropped"]
+            st.caption(
+                f"Context: {context_budget['chars_used']:,} / {context_budget['max_chars']:,} characters"
+                + (f" · {dropped} excerpt(s) left out to fit" if dropped else "")
+            )
+        if retrieval_ms:
+            st.caption("Retrieval: " + " · ".join(f"{name} {ms:.1f} ms" for name, ms in retrieval_ms.items()))
         for i, ex in enumerate(used_excerpts, start=1):
+            # Excerpts saved before provenance existed have no page label
+            page_label = ex.get("page_label")
+            location = f" · {page_label}" if page_label else ""
             # Simple clean card for each source
             st.markdown(f"""
             <div style="margin-bottom: 1rem; border: 1px solid #30363d; border-radius: 8px; padding: 1rem; background-color: #161b22;">
@@ -48,7 +59,7 @@ def render_sources(used_excerpts):
                     </span>
                 </div>
                 <div style="color: #8b949e; font-size: 0.85rem; margin-bottom: 0.5rem;">
-                    From: <code>{ex['doc_name']}</code>
+                    From: <code>{ex['doc_name']}</code>{location}
                 </div>
                 <div style="font-style: italic; color: #c9d1d9; padding: 0.5rem; background: #0d1117; border-radius: 6px; border-left: 3px solid #46b8c9;">
                     "{ex["text"][:300]}..."
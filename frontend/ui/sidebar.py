@@ -1,5 +1,9 @@
 import streamlit as st
 from backend.config import settings as backend_settings
+from backend.services.answer_cache import answer_cache
+from backend.services.semantic_cache import semantic_cache
+from backend.services.retrieval_service import RETRIEVAL_MODES
+from backend.storage.vector_index import embeddings_enabled
 from frontend.ui.branding import render_logo
 
 def render_sidebar(store):
@@ -23,6 +27,8 @@ def render_sidebar(store):
             key="sidebar_file_uploader"
         )
         settings = {"uploads": uploads if uploads else []}
+        if getattr(store, "owner", ""):
+            st.caption("🔖 Your documents are saved with this page's link; bookmark it to come back to them.")
         
         st.markdown("---")
         
@@ -33,6 +39,12 @@ def render_sidebar(store):
             c1, c2 = st.columns(2)
             c1.metric("Docs", stats["total_docs"])
             c2.metric("Chunks", stats["total_chunks"])
+            cache_stats = answer_cache.get_statistics()
+            if cache_stats["hits"] or cache_stats["misses"]:
+                st.caption(f"Answer cache: {cache_stats['hits']} hits · {cache_stats['misses']} misses")
+            semantic_stats = semantic_cache.get_statistics()
+            if semantic_stats["hits"]:
+                st.caption(f"Similar questions reused: {semantic_stats['hits']}")
             
             st.markdown("---")
             st.markdown("### 📚 Materials")
@@ -41,8 +53,8 @@ def render_sidebar(store):
                     st.caption(f"Chunks: {doc['num_chunks']}")
                     if st.button("Unload", key=f"side_del_{doc['doc_id']}", use_container_width=True):
                         store.remove_doc(doc['doc_id'])
-                        if "processed_files" in st.session_state and doc['doc_name'] in st.session_state.processed_files:
-                            st.session_state.processed_files.remove(doc['doc_name'])
+                        if "processed_files" in st.session_state:
+                            st.session_state.processed_files.discard(doc['doc_id'])
                         st.rerun()
             st.markdown("---")
 
@@ -58,6 +70,16 @@ def render_sidebar(store):
             value=settings.get("top_k", 5) if "settings" in locals() else 5,
             help="Higher values provide more context but may be slower"
         )
+
+        # Dense and hybrid need chunk embeddings (EMBEDDING_BACKEND and NumPy)
+        modes = [m for m in RETRIEVAL_MODES if embeddings_enabled() or m not in ("dense", "hybrid")]
+        settings["retrieval_mode"] = st.selectbox(
+            "Ranking",
+            options=modes,
+            index=modes.index(backend_settings.retrieval_mode if backend_settings.retrieval_mode in modes else "bm25"),
+            help="bm25 weighs rare terms and chunk length; sparse is a vectorized bm25 for large libraries; keyword counts shared words; "
+                 "dense matches by embedding similarity; hybrid fuses bm25 and dense rankings"
+        )
         
         st.markdown("### 📊 System Status")
         
@@ -86,7 +108,7 @@ def render_sidebar(store):
                 "🗑️ Reset",
                 use_container_width=True,
                 type="primary",
-                help="Remove all documents"
+                help="Remove all of your documents"
             )
             
         st.markdown("---")